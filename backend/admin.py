@@ -3,22 +3,23 @@ from datetime import datetime, timedelta
 from collections import Counter
 import re
 
-def get_analytics_summary(
-    users_collection,
-    submissions_collection,
-    analysis_results_collection
-) -> Dict:
-    
-    total_users = users_collection.count_documents({})
-    total_submissions = submissions_collection.count_documents({})
-    total_analyses = analysis_results_collection.count_documents({})
-    
-    recent_analyses = list(analysis_results_collection.find().sort("created_at", -1).limit(100))
-    
-    avg_match_score = 0
-    if recent_analyses:
-        scores = [a.get('match_percentage', 0) for a in recent_analyses]
-        avg_match_score = sum(scores) / len(scores)
+from .admin_pipelines import (
+    SKILL_CATEGORIES, top_missing_skills_pipeline, job_roles_pipeline, skill_category_pipeline,
+    recommendation_pipeline, distributions_pipeline, recent_average_pipeline, trending_skills_pipeline,
+    user_activity_top_pipeline, user_activity_page_pipeline
+)
+
+RECENT_ANALYSES_PROJECTION = {
+    'user_id': 1,
+    'match_percentage': 1,
+    'comparison.recommendation': 1,
+    'created_at': 1
+}
+
+# The summarize_* helpers shape aggregation output; they are shared by these functions and the async admin path
+
+def summarize_analytics(total_users: int, total_submissions: int, total_analyses: int, average_rows: List[Dict]) -> Dict:
+    avg_match_score = (average_rows[0]['average'] if average_rows else None) or 0
     
     return {
         'total_users': total_users,
@@ -28,44 +29,43 @@ def get_analytics_summary(
         'last_updated': datetime.utcnow().isoformat()
     }
 
-def get_top_missing_skills(analysis_results_collection, limit: int = 20) -> List[Dict]:
-    
-    analyses = list(analysis_results_collection.find({}, {'comparison': 1}))
-    
-    all_missing_skills = []
-    for analysis in analyses:
-        comparison = analysis.get('comparison', {})
-        missing_skills = comparison.get('missing_skills', [])
-        all_missing_skills.extend(missing_skills)
+def get_analytics_summary(
+    users_collection,
+    submissions_collection,
+    analysis_results_collection
+) -> Dict:
     
-    skill_counts = Counter(all_missing_skills)
+    return summarize_analytics(
+        users_collection.count_documents({}),
+        submissions_collection.count_documents({}),
+        analysis_results_collection.count_documents({}),
+        list(analysis_results_collection.aggregate(recent_average_pipeline(limit=100)))
+    )
+
+def summarize_missing_skills(facets: Dict) -> List[Dict]:
+    total = facets['total'][0]['count'] if facets.get('total') else 0
     
     top_skills = []
-    for skill, count in skill_counts.most_common(limit):
+    for row in facets.get('skills', []):
         top_skills.append({
-            'skill': skill,
-            'count': count,
-            'percentage': round((count / len(analyses) * 100), 2) if analyses else 0
+            'skill': row['_id'],
+            'count': row['count'],
+            'percentage': round((row['count'] / total * 100), 2) if total else 0
         })
     
     return top_skills
 
-def get_top_job_roles(submissions_collection, limit: int = 15) -> List[Dict]:
-    
-    submissions = list(submissions_collection.find({}, {'parsed_jd_fields': 1}))
-    
-    job_roles = []
-    for submission in submissions:
-        parsed_jd = submission.get('parsed_jd_fields', {})
-        if isinstance(parsed_jd, dict):
-            role = parsed_jd.get('job_role', '')
-            if role and role != 'Not specified':
-                job_roles.append(role.lower().strip())
+def get_top_missing_skills(analysis_results_collection, limit: int = 20) -> List[Dict]:
     
-    role_counts = Counter(job_roles)
+    return summarize_missing_skills(next(analysis_results_collection.aggregate(top_missing_skills_pipeline(limit)), {}))
+
+def summarize_job_roles(rows: List[Dict], limit: int = 15) -> List[Dict]:
+    role_counts = Counter()
+    for row in rows:
+        role_counts[row['_id'].strip()] += row['count']
     
     top_roles = []
-    for role, count in role_counts.most_common(limit):
+    for role, count in sorted(role_counts.items(), key=lambda r: (-r[1], r[0]))[:limit]:
         top_roles.append({
             'role': role.title(),
             'count': count
@@ -73,65 +73,51 @@ def get_top_job_roles(submissions_collection, limit: int = 15) -> List[Dict]:
     
     return top_roles
 
-def get_skill_category_distribution(analysis_results_collection) -> Dict:
-    
-    analyses = list(analysis_results_collection.find({}, {'comparison': 1}))
+def get_top_job_roles(submissions_collection, limit: int = 15) -> List[Dict]:
     
-    category_stats = {
-        'languages': {'matched': 0, 'missing': 0},
-        'frameworks': {'matched': 0, 'missing': 0},
-        'tools': {'matched': 0, 'missing': 0},
-        'databases': {'matched': 0, 'missing': 0}
+    return summarize_job_roles(submissions_collection.aggregate(job_roles_pipeline()), limit)
+
+def _category_stats(totals: Dict) -> Dict:
+    return {
+        category: {
+            'matched': totals.get(f'matched_{category}', 0),
+            'missing': totals.get(f'missing_{category}', 0)
+        }
+        for category in SKILL_CATEGORIES
     }
-    
-    for analysis in analyses:
-        comparison = analysis.get('comparison', {})
-        
-        for category in category_stats.keys():
-            matched_key = f'matched_{category}'
-            missing_key = f'missing_{category}'
-            
-            matched = comparison.get(matched_key, [])
-            missing = comparison.get(missing_key, [])
-            
-            category_stats[category]['matched'] += len(matched)
-            category_stats[category]['missing'] += len(missing)
-    
-    return category_stats
 
-def get_recommendation_distribution(analysis_results_collection) -> Dict:
-    
-    analyses = list(analysis_results_collection.find({}, {'comparison.recommendation': 1}))
-    
-    recommendations = [
-        a.get('comparison', {}).get('recommendation', 'Unknown')
-        for a in analyses
-    ]
-    
-    rec_counts = Counter(recommendations)
-    
+def _recommendation_stats(rows: List[Dict]) -> Dict:
+    rec_counts = {row['_id']: row['count'] for row in rows}
     return {
         'strong_fit': rec_counts.get('Strong Fit', 0),
         'moderate_fit': rec_counts.get('Moderate Fit', 0),
         'low_fit': rec_counts.get('Low Fit', 0),
         'not_suitable': rec_counts.get('Not Suitable', 0),
-        'total': len(analyses)
+        'total': sum(rec_counts.values())
     }
 
-def get_recent_analyses(analysis_results_collection, limit: int = 10) -> List[Dict]:
+def get_skill_category_distribution(analysis_results_collection) -> Dict:
     
-    analyses = list(
-        analysis_results_collection
-        .find({}, {
-            'user_id': 1,
-            'match_percentage': 1,
-            'comparison.recommendation': 1,
-            'created_at': 1
-        })
-        .sort("created_at", -1)
-        .limit(limit)
-    )
+    totals = next(analysis_results_collection.aggregate(skill_category_pipeline()), {})
+    return _category_stats(totals)
+
+def get_recommendation_distribution(analysis_results_collection) -> Dict:
+    
+    return _recommendation_stats(list(analysis_results_collection.aggregate(recommendation_pipeline())))
+
+def summarize_distributions(facets: Dict) -> Dict:
+    categories = facets.get('categories') or [{}]
+    return {
+        'skill_category_distribution': _category_stats(categories[0]),
+        'recommendation_distribution': _recommendation_stats(facets.get('recommendations', []))
+    }
+
+def get_distributions(analysis_results_collection) -> Dict:
+    """Category and recommendation distributions from a single aggregation."""
     
+    return summarize_distributions(next(analysis_results_collection.aggregate(distributions_pipeline()), {}))
+
+def summarize_recent_analyses(analyses: List[Dict]) -> List[Dict]:
     results = []
     for analysis in analyses:
         results.append({
@@ -143,33 +129,30 @@ def get_recent_analyses(analysis_results_collection, limit: int = 10) -> List[Di
     
     return results
 
-def get_trending_skills(analysis_results_collection, days: int = 30) -> Dict:
-    
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+def get_recent_analyses(analysis_results_collection, limit: int = 10) -> List[Dict]:
     
     analyses = list(
-        analysis_results_collection.find(
-            {'created_at': {'$gte': cutoff_date}},
-            {'comparison': 1}
-        )
+        analysis_results_collection
+        .find({}, RECENT_ANALYSES_PROJECTION)
+        .sort("created_at", -1)
+        .limit(limit)
     )
+    return summarize_recent_analyses(analyses)
+
+def get_trending_skills(analysis_results_collection, days: int = 30) -> Dict:
     
-    matched_skills = []
-    missing_skills = []
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
     
-    for analysis in analyses:
-        comparison = analysis.get('comparison', {})
-        matched_skills.extend(comparison.get('matched_skills', []))
-        missing_skills.extend(comparison.get('missing_skills', []))
+    facets = next(analysis_results_collection.aggregate(trending_skills_pipeline(cutoff_date, limit=10)), {})
     
     return {
         'most_matched': [
-            {'skill': skill, 'count': count}
-            for skill, count in Counter(matched_skills).most_common(10)
+            {'skill': row['_id'], 'count': row['count']}
+            for row in facets.get('most_matched', [])
         ],
         'most_missing': [
-            {'skill': skill, 'count': count}
-            for skill, count in Counter(missing_skills).most_common(10)
+            {'skill': row['_id'], 'count': row['count']}
+            for row in facets.get('most_missing', [])
         ]
     }
 
@@ -212,32 +195,57 @@ def get_all_skills_taxonomy(skill_taxonomy_collection) -> List[Dict]:
 
 def get_user_activity_stats(submissions_collection, analysis_results_collection) -> List[Dict]:
     
-    pipeline = [
-        {
-            '$group': {
-                '_id': '$user_id',
-                'submission_count': {'$sum': 1}
-            }
-        },
-        {'$sort': {'submission_count': -1}},
-        {'$limit': 20}
-    ]
-    
-    user_stats = list(submissions_collection.aggregate(pipeline))
+    pipeline = user_activity_top_pipeline(analysis_results_collection.name, limit=20)
     
     results = []
-    for stat in user_stats:
-        user_id = stat['_id']
-        analysis_count = analysis_results_collection.count_documents({'user_id': user_id})
-        
+    for stat in submissions_collection.aggregate(pipeline):
         results.append({
-            'user_id': user_id,
+            'user_id': stat['_id'],
             'submissions': stat['submission_count'],
-            'analyses': analysis_count
+            'analyses': stat['analysis_count']
         })
     
     return results
 
+def get_user_activity_page(
+    users_collection,
+    submissions_collection,
+    analysis_results_collection,
+    sort_by: str = 'submissions',
+    order: str = 'desc',
+    page: int = 1,
+    page_size: int = 50
+) -> Dict:
+    
+    pipeline = user_activity_page_pipeline(
+        submissions_collection.name,
+        analysis_results_collection.name,
+        sort_by=sort_by,
+        descending=order == 'desc',
+        skip=(page - 1) * page_size,
+        limit=page_size
+    )
+    facets = next(users_collection.aggregate(pipeline), {})
+    return summarize_user_activity_page(facets, sort_by, order, page, page_size)
+
+def summarize_user_activity_page(facets: Dict, sort_by: str, order: str, page: int, page_size: int) -> Dict:
+    
+    users = []
+    for user in facets.get('users', []):
+        for field in ('created_at', 'last_submission_at'):
+            if isinstance(user.get(field), datetime):
+                user[field] = user[field].isoformat()
+        users.append(user)
+    
+    return {
+        'total': facets['total'][0]['count'] if facets.get('total') else 0,
+        'page': page,
+        'page_size': page_size,
+        'sort_by': sort_by,
+        'order': order,
+        'users': users
+    }
+
 def validate_admin_role(users_collection, user_id: int) -> bool:
     
     user = users_collection.find_one({'user_id': user_id})
@@ -247,6 +255,15 @@ def validate_admin_role(users_collection, user_id: int) -> bool:
     
     return user.get('role', 'user') == 'admin'
 
+async def validate_admin_role_async(users_collection, user_id: int) -> bool:
+    
+    user = await users_collection.find_one({'user_id': user_id}, {'role': 1})
+    
+    if not user:
+        return False
+    
+    return user.get('role', 'user') == 'admin'
+
 def promote_user_to_admin(users_collection, user_id: int) -> bool:
     
     result = users_collection.update_one(
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+
+from . import analytics_rollups
+from .admin import (
+    RECENT_ANALYSES_PROJECTION, summarize_analytics, summarize_missing_skills, summarize_job_roles,
+    summarize_distributions, summarize_recent_analyses, summarize_user_activity_page
+)
+from .admin_pipelines import (
+    top_missing_skills_pipeline, job_roles_pipeline, distributions_pipeline, recent_average_pipeline,
+    user_activity_page_pipeline
+)
+
+# Repeated dashboard polls within this many seconds are served from the last assembled payload
+ADMIN_ANALYTICS_TTL = float(os.getenv("ADMIN_ANALYTICS_TTL", "30"))
+
+_cached = None
+_cached_until = 0.0
+_build_lock = None
+
+
+def _collections():
+    from .mongodb import get_async_collection
+    return (
+        get_async_collection("users"),
+        get_async_collection("submissions"),
+        get_async_collection("analysis_results"),
+        get_async_collection("analytics_rollups")
+    )
+
+
+async def _aggregate(collection, pipeline):
+    return await collection.aggregate(pipeline).to_list(length=None)
+
+
+async def _first(collection, pipeline):
+    rows = await _aggregate(collection, pipeline)
+    return rows[0] if rows else {}
+
+
+async def _summary(users, submissions, analyses):
+    # Collection metadata counts; exact counts would scan the _id index of each collection
+    total_users, total_submissions, total_analyses, average_rows = await asyncio.gather(
+        users.estimated_document_count(),
+        submissions.estimated_document_count(),
+        analyses.estimated_document_count(),
+        _aggregate(analyses, recent_average_pipeline(limit=100))
+    )
+    return summarize_analytics(total_users, total_submissions, total_analyses, average_rows)
+
+
+async def _recent(analyses, limit=10):
+    cursor = analyses.find({}, RECENT_ANALYSES_PROJECTION).sort("created_at", -1).limit(limit)
+    return summarize_recent_analyses(await cursor.to_list(length=limit))
+
+
+async def _rollup_totals(rollups, metric, limit=None):
+    return analytics_rollups.totals_from_rows(await _aggregate(rollups, analytics_rollups.totals_pipeline(metric, limit=limit)))
+
+
+async def _breakdown(submissions, analyses, rollups):
+    meta = await rollups.find_one({"_id": analytics_rollups.BACKFILL_ID}, {"status": 1})
+    if analytics_rollups.ROLLUPS_ENABLED and meta and meta.get("status") == "done":
+        missing, analyses_total, roles, matched, missing_by_category, recommendations = await asyncio.gather(
+            _rollup_totals(rollups, 'missing_skill', limit=20),
+            _rollup_totals(rollups, 'analyses'),
+            _rollup_totals(rollups, 'job_role', limit=15),
+            _rollup_totals(rollups, 'category_matched'),
+            _rollup_totals(rollups, 'category_missing'),
+            _rollup_totals(rollups, 'recommendation')
+        )
+        total = analytics_rollups.total_from_totals(analyses_total)
+        return {
+            "top_missing_skills": analytics_rollups.missing_skills_view(missing, total),
+            "top_job_roles": analytics_rollups.job_roles_view(roles),
+            "skill_category_distribution": analytics_rollups.category_view(matched, missing_by_category),
+            "recommendation_distribution": analytics_rollups.recommendation_view(recommendations, total)
+        }
+
+    missing_facets, role_rows, distribution_facets = await asyncio.gather(
+        _first(analyses, top_missing_skills_pipeline(20)),
+        _aggregate(submissions, job_roles_pipeline()),
+        _first(analyses, distributions_pipeline())
+    )
+    return {
+        "top_missing_skills": summarize_missing_skills(missing_facets),
+        "top_job_roles": summarize_job_roles(role_rows, 15),
+        **summarize_distributions(distribution_facets)
+    }
+
+
+async def build_admin_analytics():
+    """Every /admin/analytics widget, with all sub-queries in flight at once on the async driver."""
+    users, submissions, analyses, rollups = _collections()
+    summary, breakdown, recent = await asyncio.gather(
+        _summary(users, submissions, analyses),
+        _breakdown(submissions, analyses, rollups),
+        _recent(analyses, limit=10)
+    )
+    return {
+        "summary": summary,
+        "top_missing_skills": breakdown["top_missing_skills"],
+        "top_job_roles": breakdown["top_job_roles"],
+        "skill_category_distribution": breakdown["skill_category_distribution"],
+        "recommendation_distribution": breakdown["recommendation_distribution"],
+        "recent_analyses": recent
+    }
+
+
+async def get_admin_analytics_payload():
+    """The assembled payload, rebuilt at most once per ADMIN_ANALYTICS_TTL; concurrent polls share one rebuild."""
+    global _cached, _cached_until, _build_lock
+    if _cached is not None and time.monotonic() < _cached_until:
+        return _cached
+    if _build_lock is None:
+        _build_lock = asyncio.Lock()
+    async with _build_lock:
+        if _cached is None or time.monotonic() >= _cached_until:
+            _cached = await build_admin_analytics()
+            _cached_until = time.monotonic() + ADMIN_ANALYTICS_TTL
+    return _cached
+
+
+async def get_user_activity_page(sort_by='submissions', order='desc', page=1, page_size=50):
+    """admin.get_user_activity_page on the async driver."""
+    users, submissions, analyses, _ = _collections()
+    pipeline = user_activity_page_pipeline(
+        submissions.name,
+        analyses.name,
+        sort_by=sort_by,
+        descending=order == 'desc',
+        skip=(page - 1) * page_size,
+        limit=page_size
+    )
+    return summarize_user_activity_page(await _first(users, pipeline), sort_by, order, page, page_size)
@@ -0,0 +1,151 @@
+# Aggregation pipelines behind the admin analytics; MongoDB does the counting and only the totals cross the network
+
+SKILL_CATEGORIES = ['languages', 'frameworks', 'tools', 'databases']
+
+
+def _ranked(field, limit=None):
+    # Ties are broken by key so the order is stable between calls
+    stages = [
+        {'$unwind': f'${field}'},
+        {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1, '_id': 1}}
+    ]
+    if limit:
+        stages.append({'$limit': limit})
+    return stages
+
+
+def top_missing_skills_pipeline(limit=20):
+    return [
+        {'$project': {'comparison.missing_skills': 1}},
+        {'$facet': {
+            'total': [{'$count': 'count'}],
+            'skills': _ranked('comparison.missing_skills', limit)
+        }}
+    ]
+
+
+def job_roles_pipeline():
+    # Grouped case-insensitively here; surrounding whitespace is merged by the caller with str.strip
+    return [
+        {'$match': {'parsed_jd_fields.job_role': {'$type': 'string', '$nin': ['', 'Not specified']}}},
+        {'$group': {'_id': {'$toLower': '$parsed_jd_fields.job_role'}, 'count': {'$sum': 1}}}
+    ]
+
+
+def skill_category_pipeline():
+    totals = {}
+    for category in SKILL_CATEGORIES:
+        for side in ('matched', 'missing'):
+            totals[f'{side}_{category}'] = {'$sum': {'$size': {'$ifNull': [f'$comparison.{side}_{category}', []]}}}
+    return [{'$group': {'_id': None, **totals}}]
+
+
+def recommendation_pipeline():
+    return [{'$group': {'_id': {'$ifNull': ['$comparison.recommendation', 'Unknown']}, 'count': {'$sum': 1}}}]
+
+
+def distributions_pipeline():
+    """Category and recommendation distributions in one pass over analysis_results."""
+    return [{'$facet': {
+        'categories': skill_category_pipeline(),
+        'recommendations': recommendation_pipeline()
+    }}]
+
+
+def recent_average_pipeline(limit=100, field='match_percentage'):
+    return [
+        {'$sort': {'created_at': -1}},
+        {'$limit': limit},
+        {'$group': {'_id': None, 'average': {'$avg': {'$ifNull': [f'${field}', 0]}}}}
+    ]
+
+
+def trending_skills_pipeline(cutoff_date, limit=10):
+    return [
+        {'$match': {'created_at': {'$gte': cutoff_date}}},
+        {'$project': {'comparison.matched_skills': 1, 'comparison.missing_skills': 1}},
+        {'$facet': {
+            'most_matched': _ranked('comparison.matched_skills', limit),
+            'most_missing': _ranked('comparison.missing_skills', limit)
+        }}
+    ]
+
+
+USER_ACTIVITY_SORT_FIELDS = {
+    'submissions': 'submissions',
+    'analyses': 'analyses',
+    'last_active': 'last_submission_at',
+    'user_id': 'user_id',
+    'email': 'email',
+    'joined': 'created_at'
+}
+# Sorts on these are answered from the users collection, so only the requested page is joined
+USER_SORT_FIELDS = {'user_id', 'email', 'created_at'}
+
+
+def _count_lookup(collection_name, local_field, as_field, extra=None):
+    # Each joined collection is counted on the server per user via its user_id index; no documents are joined
+    group = {'_id': None, 'count': {'$sum': 1}}
+    group.update(extra or {})
+    return {'$lookup': {
+        'from': collection_name,
+        'localField': local_field,
+        'foreignField': 'user_id',
+        'pipeline': [{'$group': group}],
+        'as': as_field
+    }}
+
+
+def _first(field, key, default):
+    return {'$ifNull': [{'$arrayElemAt': [f'${field}.{key}', 0]}, default]}
+
+
+def user_activity_top_pipeline(analyses_collection_name, limit=20):
+    """Users with the most submissions, each with its analysis count, in one aggregation over submissions."""
+    return [
+        {'$group': {'_id': '$user_id', 'submission_count': {'$sum': 1}}},
+        {'$sort': {'submission_count': -1, '_id': 1}},
+        {'$limit': limit},
+        _count_lookup(analyses_collection_name, '_id', 'analysis_totals'),
+        {'$project': {'submission_count': 1, 'analysis_count': _first('analysis_totals', 'count', 0)}}
+    ]
+
+
+def user_activity_page_pipeline(submissions_collection_name, analyses_collection_name,
+                                 sort_by='submissions', descending=True, skip=0, limit=50):
+    """One page of every user's activity counts plus the total number of users, in one aggregation over users."""
+    sort_field = USER_ACTIVITY_SORT_FIELDS[sort_by]
+    direction = -1 if descending else 1
+    page = [
+        {'$sort': {sort_field: direction, 'user_id': 1} if sort_field != 'user_id' else {'user_id': direction}},
+        {'$skip': skip},
+        {'$limit': limit}
+    ]
+    joins = [
+        _count_lookup(submissions_collection_name, 'user_id', 'submission_totals', {'last': {'$max': '$created_at'}}),
+        _count_lookup(analyses_collection_name, 'user_id', 'analysis_totals'),
+        {'$project': {
+            '_id': 0,
+            'user_id': 1,
+            'email': 1,
+            'role': {'$ifNull': ['$role', 'user']},
+            'created_at': 1,
+            'submissions': _first('submission_totals', 'count', 0),
+            'analyses': _first('analysis_totals', 'count', 0),
+            'last_submission_at': _first('submission_totals', 'last', None)
+        }}
+    ]
+    base = [{'$project': {'user_id': 1, 'email': 1, 'role': 1, 'created_at': 1}}]
+    if sort_field in USER_SORT_FIELDS:
+        return base + [{'$facet': {'total': [{'$count': 'count'}], 'users': page + joins}}]
+    return base + joins + [{'$facet': {'total': [{'$count': 'count'}], 'users': page}}]
+
+
+def ensure_indexes(analysis_results_collection, submissions_collection):
+    # Recent/trending/summary read newest-first ranges; the role group can be answered from the index alone
+    analysis_results_collection.create_index([('created_at', -1)])
+    submissions_collection.create_index([('parsed_jd_fields.job_role', 1)])
+    # Per-user counts in the activity lookups
+    analysis_results_collection.create_index([('user_id', 1)])
+    submissions_collection.create_index([('user_id', 1), ('created_at', -1)])
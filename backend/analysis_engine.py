@@ -0,0 +1,361 @@
+import copy
+import gc
+import os
+import threading
+import time
+
+from . import nlp_engine, nlp_preprocessing, comparison_engine, suggestion_engine
+from .text_cache import extract_text_cached
+from .jd_cache import get_jd_cache, normalize_jd_text, jd_cache_key
+from .skill_registry import get_skill_registry
+
+# Full collection every N analyses, run after the response is sent; 0 disables it
+GC_COLLECT_EVERY = int(os.getenv("GC_COLLECT_EVERY", "50"))
+# Move the warmed model and ontology objects out of the collector's reach
+GC_FREEZE_AFTER_WARMUP = os.getenv("GC_FREEZE_AFTER_WARMUP", "1") == "1"
+
+WARMUP_TEXT = (
+    "Software Engineer with 3 years of experience. Skills: Python, React, Docker, PostgreSQL, AWS. "
+    "Built REST APIs with FastAPI and deployed them on Kubernetes."
+)
+
+
+JUNK_TERMS = {'general', 'dev', 'development', 'programming', 'coding', 'scripting', 'software', 'web', 'application'}
+
+
+def build_tfidf_data(raw, jd_text):
+    idf = nlp_preprocessing.compute_idf([raw, jd_text])
+    resume_tfidf = nlp_preprocessing.compute_tfidf(raw, idf)
+    jd_tfidf = nlp_preprocessing.compute_tfidf(jd_text, idf)
+    feature_names = list(idf.keys())
+    return {
+        'resume_tfidf_vector': [resume_tfidf.get(f, 0.0) for f in feature_names],
+        'jd_tfidf_vector': [jd_tfidf.get(f, 0.0) for f in feature_names],
+        'feature_names': feature_names
+    }
+
+
+class AnalysisEngine:
+    """Resident per-worker analysis state.
+
+    Holds the spaCy model, the compiled ontology matchers and the skill
+    taxonomies for the life of the worker and runs the analysis stages with
+    per-stage timing. Memory is managed by a periodic collection policy
+    instead of forced collections between stages.
+    """
+
+    def __init__(self):
+        self.nlp = nlp_engine.nlp
+        self.ontology_matcher = nlp_engine.ontology_matcher
+        self.ontology_index = nlp_engine.ontology_index
+        self.skill_taxonomy = comparison_engine.SKILL_TAXONOMY
+        self.canonical_skill_map = comparison_engine.CANONICAL_SKILL_MAP
+
+        # Identical uploads are served from the content-hash text cache and skip extraction/OCR
+        self.extract_text = extract_text_cached
+        self.clean_text = nlp_engine.clean_text
+        self.build_document_context = nlp_engine.build_document_context
+        self.parse_resume_structured = nlp_engine.parse_resume_structured
+        self.parse_jd_structured = nlp_engine.parse_jd_structured
+        self.preprocess_text = nlp_preprocessing.preprocess_text
+        self.extract_skills_hybrid = nlp_preprocessing.extract_skills_hybrid
+        self.extract_keywords_hybrid = nlp_preprocessing.extract_keywords_hybrid
+        self.compare_profiles = comparison_engine.compare_profiles
+        self.generate_skill_suggestions = suggestion_engine.generate_skill_suggestions
+
+        self.warmed = False
+        self.requests_served = 0
+        self.gc_runs = 0
+        self.gc_seconds = 0.0
+        self.stage_stats = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        if self.warmed:
+            return
+        if os.getenv("PHRASE_CACHE_PREWARM", "1") == "1":
+            nlp_engine.warm_phrase_cache()
+        ctx = self.build_document_context(WARMUP_TEXT)
+        self.parse_resume_structured(WARMUP_TEXT, ctx=ctx)
+        self.parse_jd_structured(WARMUP_TEXT, ctx=ctx)
+        self.preprocess_text(WARMUP_TEXT, ctx=ctx)
+        get_skill_registry()
+        gc.collect()
+        if GC_FREEZE_AFTER_WARMUP and hasattr(gc, "freeze"):
+            gc.freeze()
+        self.warmed = True
+
+    def build_resume_profile(self, resume_structured, resume_skills_extracted):
+        """Stages 11-12 for the resume side. Falls back to the hybrid skill list in place when the structured ones are empty."""
+        # Stage 11: Skill/Keyword Cleaning
+        all_resume_skills = (
+            resume_structured['technical_skills'] + 
+            resume_structured['tools'] + 
+            resume_structured['frameworks'] + 
+            resume_structured['programming_languages'] +
+            resume_structured['databases']
+        )
+        clean_resume_skills = [s for s in resume_skills_extracted if s.lower() not in JUNK_TERMS]
+        clean_all_resume_skills = [s for s in all_resume_skills if s.lower() not in JUNK_TERMS]
+        if len(clean_all_resume_skills) == 0 and len(clean_resume_skills) > 0:
+            resume_structured['technical_skills'] = clean_resume_skills[:15]
+            resume_structured['tools'] = []
+            resume_structured['frameworks'] = []
+            resume_structured['programming_languages'] = []
+            resume_structured['databases'] = []
+
+        # Stage 12: Profile Construction
+        resume_profile_obj = {
+            'candidate_name': resume_structured['candidate_name'],
+            'email': resume_structured['email'],
+            'phone': resume_structured['phone'],
+            'location': resume_structured['location'],
+            'technical_skills': resume_structured['technical_skills'],
+            'programming_languages': resume_structured['programming_languages'],
+            'frameworks': resume_structured['frameworks'],
+            'tools': resume_structured['tools'],
+            'databases': resume_structured['databases'],
+            'education_degrees': resume_structured['education_degrees'],
+            'education_fields': resume_structured['education_fields'],
+            'education_institutions': resume_structured['education_institutions'],
+            'experience_roles': resume_structured['experience_roles'],
+            'experience_companies': resume_structured['experience_companies'],
+            'experience_years_estimated': resume_structured['experience_years_estimated'],
+            'project_titles': resume_structured['project_titles'],
+            'project_technologies': resume_structured['project_technologies'],
+            'certifications': resume_structured['certifications']
+        }
+        return all_resume_skills, resume_profile_obj
+
+    def build_job_profile(self, jd_structured, jd_skills_extracted):
+        """Stages 11-12 for the JD side, same fallback as build_resume_profile."""
+        all_jd_keywords = (
+            jd_structured['required_skills'] + 
+            jd_structured['required_frameworks'] + 
+            jd_structured['required_tools'] + 
+            jd_structured['required_languages'] +
+            jd_structured['required_databases']
+        )
+        clean_jd_skills = [s for s in jd_skills_extracted if s.lower() not in JUNK_TERMS]
+        clean_all_jd_keywords = [s for s in all_jd_keywords if s.lower() not in JUNK_TERMS]
+        if len(clean_all_jd_keywords) == 0 and len(clean_jd_skills) > 0:
+            jd_structured['required_skills'] = clean_jd_skills[:15]
+            jd_structured['required_frameworks'] = []
+            jd_structured['required_tools'] = []
+            jd_structured['required_languages'] = []
+            jd_structured['required_databases'] = []
+
+        job_profile_obj = {
+            'job_role': jd_structured['job_role'],
+            'required_skills': jd_structured['required_skills'],
+            'required_languages': jd_structured['required_languages'],
+            'required_frameworks': jd_structured['required_frameworks'],
+            'required_tools': jd_structured['required_tools'],
+            'required_databases': jd_structured['required_databases'],
+            'required_experience_years': jd_structured['required_experience_years'],
+            'required_education': jd_structured['required_education']
+        }
+        return all_jd_keywords, job_profile_obj
+
+    def build_profiles(self, resume_structured, jd_structured, resume_skills_extracted, jd_skills_extracted):
+        """Stages 11-12 of /analyze."""
+        all_resume_skills, resume_profile_obj = self.build_resume_profile(resume_structured, resume_skills_extracted)
+        all_jd_keywords, job_profile_obj = self.build_job_profile(jd_structured, jd_skills_extracted)
+        return all_resume_skills, all_jd_keywords, resume_profile_obj, job_profile_obj
+
+    def record_stage(self, name, elapsed_ms):
+        with self._lock:
+            stats = self.stage_stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def run_stage(self, name, func, *args, timings=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.record_stage(name, elapsed_ms)
+            if timings is not None:
+                timings[name] = round(elapsed_ms, 2)
+
+    def analyze_jd(self, jd_text, timings=None):
+        """Cleaning, parsing, preprocessing and keyword extraction for a JD, served from the JD cache when possible."""
+        cache = get_jd_cache()
+        normalized = normalize_jd_text(jd_text)
+        jd_hash = jd_cache_key(normalized)
+        profile, source = cache.get(jd_hash)
+        if profile is not None:
+            return profile, source, jd_hash
+
+        jd_ctx = self.build_document_context(normalized)
+        profile = {
+            "cleaned_jd": self.run_stage("jd_cleaning", self.clean_text, normalized, timings=timings),
+            "jd_structured": self.run_stage("jd_parsing", self.parse_jd_structured, normalized, ctx=jd_ctx, timings=timings),
+            "jd_preprocessed": self.run_stage("jd_preprocessing", self.preprocess_text, normalized, ctx=jd_ctx, timings=timings),
+            "jd_skills_extracted": self.run_stage("jd_keyword_extraction", self.extract_keywords_hybrid, normalized, ctx=jd_ctx, timings=timings)
+        }
+        cache.put(jd_hash, profile, normalized)
+        return profile, "miss", jd_hash
+
+    def analyze_resume_text(self, raw, timings=None):
+        """Resume side of stages 2-8 on already extracted text: cleaning, structured parsing, preprocessing and skills."""
+        # Every extractor below shares this single parse of the resume
+        resume_ctx = self.build_document_context(raw)
+
+        # Stage 2: Preprocessing
+        cleaned_resume = self.run_stage("resume_cleaning", self.clean_text, raw, timings=timings)
+
+        # Stage 3: Structured Parsing
+        resume_structured = self.run_stage("resume_parsing", self.parse_resume_structured, raw, ctx=resume_ctx, timings=timings)
+
+        # Stage 7: Preprocessing tokens
+        resume_preprocessed = self.run_stage("resume_preprocessing", self.preprocess_text, raw, ctx=resume_ctx, timings=timings)
+
+        # Stage 8: Skill Extraction
+        resume_skills_extracted = self.run_stage("resume_skill_extraction", self.extract_skills_hybrid, raw, ctx=resume_ctx, timings=timings)
+
+        return {
+            "raw": raw,
+            "cleaned_resume": cleaned_resume,
+            "resume_structured": resume_structured,
+            "resume_preprocessed": resume_preprocessed,
+            "resume_skills_extracted": resume_skills_extracted
+        }
+
+    def analyze_resume(self, resume_bytes, resume_ext, timings=None):
+        """Resume side of stages 1-8: extraction, cleaning, structured parsing, preprocessing and skills."""
+        # Stage 1: Text Extraction
+        raw, extraction_meta = self.run_stage("resume_extraction", self.extract_text, resume_bytes, resume_ext, timings=timings)
+        resume = self.analyze_resume_text(raw, timings=timings)
+        resume["extraction_metadata"] = extraction_meta
+        return resume
+
+    def extract_documents(self, resume_bytes, resume_ext, jd_text=None, jd_bytes=None, jd_ext=None):
+        """Stages 1 and 4 of /analyze: text extraction only, so callers can start on the raw texts early."""
+        timings = {}
+        # Stage 1: Text Extraction
+        raw, resume_meta = self.run_stage("resume_extraction", self.extract_text, resume_bytes, resume_ext, timings=timings)
+        extraction_metadata = {"resume": resume_meta}
+
+        # Stage 4: JD Extraction
+        if jd_bytes is not None:
+            jd_text, extraction_metadata['job_description'] = self.run_stage("jd_extraction", self.extract_text, jd_bytes, jd_ext, timings=timings)
+
+        return {
+            "raw": raw,
+            "jd_text": jd_text,
+            "extraction_metadata": extraction_metadata,
+            "stage_timings": timings
+        }
+
+    def analyze_texts(self, raw, jd_text, extraction_metadata=None):
+        """Stages 2-9 of /analyze on extracted texts; takes and returns only picklable values."""
+        timings = {}
+        resume = self.analyze_resume_text(raw, timings=timings)
+        extraction_metadata = dict(extraction_metadata or {})
+
+        # Stages 5-8 for the JD: cached by JD text, so many resumes against one JD parse it once
+        jd_profile, jd_cache_source, jd_hash = self.analyze_jd(jd_text, timings=timings)
+        extraction_metadata['jd_profile_cache'] = jd_cache_source
+
+        # Stage 9: Manual TF-IDF Vectorization (memory safe)
+        tfidf_data = self.run_stage("tfidf", build_tfidf_data, raw, jd_text, timings=timings)
+
+        return {
+            "raw": raw,
+            "jd_text": jd_text,
+            "cleaned_resume": resume["cleaned_resume"],
+            "jd_hash": jd_hash,
+            "cleaned_jd": jd_profile["cleaned_jd"],
+            "resume_structured": resume["resume_structured"],
+            "jd_structured": jd_profile["jd_structured"],
+            "resume_preprocessed": resume["resume_preprocessed"],
+            "jd_preprocessed": jd_profile["jd_preprocessed"],
+            "resume_skills_extracted": resume["resume_skills_extracted"],
+            "jd_skills_extracted": jd_profile["jd_skills_extracted"],
+            "tfidf_data": tfidf_data,
+            "extraction_metadata": extraction_metadata,
+            "stage_timings": timings
+        }
+
+    def analyze_documents(self, resume_bytes, resume_ext, jd_text=None, jd_bytes=None, jd_ext=None):
+        """Stages 1-9 of /analyze in one call."""
+        extracted = self.extract_documents(resume_bytes, resume_ext, jd_text=jd_text, jd_bytes=jd_bytes, jd_ext=jd_ext)
+        documents = self.analyze_texts(extracted["raw"], extracted["jd_text"], extracted["extraction_metadata"])
+        documents["stage_timings"] = {**extracted["stage_timings"], **documents["stage_timings"]}
+        return documents
+
+    def screen_resume(self, resume_bytes, resume_ext, jd_profile):
+        """One candidate of a batch: resume stages plus comparison against an already parsed JD profile."""
+        timings = {}
+        resume = self.analyze_resume(resume_bytes, resume_ext, timings=timings)
+        jd_structured = copy.deepcopy(jd_profile["jd_structured"])
+        all_resume_skills, _, resume_profile_obj, job_profile_obj = self.build_profiles(
+            resume["resume_structured"], jd_structured,
+            resume["resume_skills_extracted"], jd_profile["jd_skills_extracted"]
+        )
+        comparison = self.run_stage("comparison", self.compare_profiles, resume_profile_obj, job_profile_obj, timings=timings)
+        return {
+            "resume_profile": resume_profile_obj,
+            "resume_skills": all_resume_skills,
+            "comparison": comparison,
+            "extraction_metadata": resume["extraction_metadata"],
+            "stage_timings": timings
+        }
+
+    def profile_resume(self, resume_bytes, resume_ext):
+        """Resume stages 1-12 without a JD, for matching one resume against many stored JDs."""
+        timings = {}
+        resume = self.analyze_resume(resume_bytes, resume_ext, timings=timings)
+        all_resume_skills, resume_profile_obj = self.build_resume_profile(
+            resume["resume_structured"], resume["resume_skills_extracted"]
+        )
+        return {
+            "resume_profile": resume_profile_obj,
+            "resume_skills": all_resume_skills,
+            "extraction_metadata": resume["extraction_metadata"],
+            "stage_timings": timings
+        }
+
+    def finish_request(self):
+        with self._lock:
+            self.requests_served += 1
+            due = GC_COLLECT_EVERY > 0 and self.requests_served % GC_COLLECT_EVERY == 0
+        if due:
+            start = time.perf_counter()
+            gc.collect()
+            with self._lock:
+                self.gc_runs += 1
+                self.gc_seconds += time.perf_counter() - start
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "warmed": self.warmed,
+                "requests_served": self.requests_served,
+                "gc_runs": self.gc_runs,
+                "gc_ms_total": round(self.gc_seconds * 1000, 2),
+                "gc_frozen_objects": gc.get_freeze_count() if hasattr(gc, "get_freeze_count") else 0,
+                "stages": {
+                    name: {
+                        "count": s["count"],
+                        "avg_ms": round(s["total_ms"] / s["count"], 2) if s["count"] else 0.0,
+                        "max_ms": round(s["max_ms"], 2)
+                    }
+                    for name, s in self.stage_stats.items()
+                }
+            }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_analysis_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = AnalysisEngine()
+    return _engine
@@ -0,0 +1,345 @@
+import asyncio
+import os
+import socket
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pymongo
+import pymongo.errors
+from pymongo import UpdateOne
+
+# Bucket size is one UTC day; admin queries read days x keys bucket documents, never the raw analyses
+ROLLUPS_ENABLED = os.getenv("ROLLUPS_ENABLED", "1") == "1"
+
+SKILL_CATEGORIES = ['languages', 'frameworks', 'tools', 'databases']
+RECOMMENDATIONS = {
+    'strong_fit': 'Strong Fit',
+    'moderate_fit': 'Moderate Fit',
+    'low_fit': 'Low Fit',
+    'not_suitable': 'Not Suitable'
+}
+BACKFILL_ID = "meta|backfill"
+# A backfill whose heartbeat is older than this is taken over by the next process to start
+BACKFILL_LEASE_SECONDS = 300
+BACKFILL_BATCH_SIZE = 1000
+BACKFILL_GRACE_SECONDS = 300
+# How often the backfill runs again to pick up failed and grace-window documents
+ROLLUPS_CATCHUP_SECONDS = float(os.getenv("ROLLUPS_CATCHUP_SECONDS", "600"))
+
+_indexed = False
+_async_indexed = False
+# None until the server says whether it supports transactions; standalone servers do not
+_transactions = None
+_sources_indexed = set()
+_catch_up_task = None
+
+
+def _collection():
+    global _indexed
+    from .mongodb import analytics_rollups_collection
+    collection = analytics_rollups_collection()
+    if not _indexed:
+        collection.create_index([("metric", 1), ("day", 1)])
+        _indexed = True
+    return collection
+
+
+async def _async_collection():
+    global _async_indexed
+    from .mongodb import async_analytics_rollups_collection
+    collection = async_analytics_rollups_collection()
+    if not _async_indexed:
+        await collection.create_index([("metric", 1), ("day", 1)])
+        _async_indexed = True
+    return collection
+
+
+def _day(created_at):
+    return (created_at or datetime.utcnow()).strftime("%Y-%m-%d")
+
+
+def analysis_counts(analysis_doc):
+    """(metric, key) -> increment for one analysis_results document."""
+    comparison = analysis_doc.get('comparison', {}) or {}
+    counts = Counter()
+    counts[('analyses', 'total')] += 1
+    for skill in comparison.get('missing_skills', []):
+        counts[('missing_skill', skill)] += 1
+    for category in SKILL_CATEGORIES:
+        counts[('category_matched', category)] += len(comparison.get(f'matched_{category}', []))
+        counts[('category_missing', category)] += len(comparison.get(f'missing_{category}', []))
+    counts[('recommendation', comparison.get('recommendation', 'Unknown'))] += 1
+    return counts
+
+
+def submission_counts(submission_doc):
+    """(metric, key) -> increment for one submissions document."""
+    counts = Counter()
+    parsed_jd = submission_doc.get('parsed_jd_fields', {})
+    if isinstance(parsed_jd, dict):
+        role = parsed_jd.get('job_role', '')
+        if role and role != 'Not specified':
+            counts[('job_role', role.lower().strip())] += 1
+    return counts
+
+
+def _operations(counts_by_day):
+    operations = []
+    for day, counts in counts_by_day.items():
+        for (metric, key), value in counts.items():
+            if not value:
+                continue
+            operations.append(UpdateOne(
+                {"_id": f"{day}|{metric}|{key}"},
+                {"$inc": {"count": value}, "$setOnInsert": {"day": day, "metric": metric, "key": key}},
+                upsert=True
+            ))
+    return operations
+
+
+def _apply(counts_by_day, session=None):
+    operations = _operations(counts_by_day)
+    if operations:
+        _collection().bulk_write(operations, ordered=False, session=session)
+
+
+async def _apply_async(counts_by_day, session=None):
+    operations = _operations(counts_by_day)
+    if operations:
+        await (await _async_collection()).bulk_write(operations, ordered=False, session=session)
+
+
+def _use_transactions():
+    return _transactions is not False
+
+
+def _transactions_unsupported(e):
+    """True (and remembered) if e says the server cannot run transactions."""
+    global _transactions
+    if isinstance(e, pymongo.errors.OperationFailure) and e.code == 20 and "Transaction" in str(e):
+        if _transactions is None:
+            print("Analytics rollups warning: no transaction support (standalone server); "
+                  "a failure between counting and flagging can count a document twice")
+        _transactions = False
+        return True
+    return False
+
+
+async def _record(source_collection, doc, counts):
+    if not ROLLUPS_ENABLED:
+        return
+    counts_by_day = {_day(doc.get('created_at')): counts}
+    flag = ({"_id": doc["_id"], "rolled_up": {"$ne": True}}, {"$set": {"rolled_up": True}})
+
+    async def count_once(session):
+        # The flag and the increment commit together; a document the backfill already counted is left alone
+        flagged = await source_collection.update_one(*flag, session=session)
+        if flagged.modified_count:
+            await _apply_async(counts_by_day, session=session)
+
+    if _use_transactions():
+        try:
+            async with await source_collection.database.client.start_session() as session:
+                await session.with_transaction(count_once)
+            return
+        except pymongo.errors.OperationFailure as e:
+            if not _transactions_unsupported(e):
+                raise
+    # Without transactions: flagged only once counted, so a failed increment is picked up by the
+    # next backfill, but a failed flag update after a successful increment is counted twice
+    await _apply_async(counts_by_day)
+    await source_collection.update_one(*flag)
+
+
+async def record_analysis(analysis_doc, analysis_results_collection):
+    """Adds one stored analysis to its day's buckets, then marks it rolled up."""
+    await _record(analysis_results_collection, analysis_doc, analysis_counts(analysis_doc))
+
+
+async def record_submission(submission_doc, submissions_collection):
+    await _record(submissions_collection, submission_doc, submission_counts(submission_doc))
+
+
+def _renew_lease(collection, owner):
+    result = collection.update_one({"_id": BACKFILL_ID, "lease_owner": owner}, {"$set": {"heartbeat_at": datetime.utcnow()}})
+    return result.matched_count == 1
+
+
+def _index_unflagged(source):
+    # New documents are stored with rolled_up False; the partial index holds only those not yet counted
+    if source.name not in _sources_indexed:
+        source.create_index([("rolled_up", 1)], partialFilterExpression={"rolled_up": False})
+        _sources_indexed.add(source.name)
+
+
+def _backfill_collection(collection, owner, source, projection, counts_for, cutoff, first_sweep):
+    """Rolls up the source documents not yet counted, one batch at a time; False if the lease was lost."""
+    _index_unflagged(source)
+    # Only the first sweep looks for documents stored before the flag existed, which needs a full scan
+    unflagged = {'$ne': True} if first_sweep else False
+    query = {'rolled_up': unflagged, 'created_at': {'$not': {'$gte': cutoff}}}
+    batch = []
+    for doc in source.find(query, {'_id': 1}):
+        batch.append(doc["_id"])
+        if len(batch) < BACKFILL_BATCH_SIZE:
+            continue
+        if not _renew_lease(collection, owner):
+            return False
+        _roll_up_batch(source, batch, projection, counts_for)
+        batch = []
+    if batch:
+        if not _renew_lease(collection, owner):
+            return False
+        _roll_up_batch(source, batch, projection, counts_for)
+    return True
+
+
+def _roll_up_batch(source, ids, projection, counts_for):
+    def count_once(session):
+        # Re-read under the transaction: a live record may have counted some of these since the scan
+        unflagged = {"_id": {"$in": ids}, "rolled_up": {"$ne": True}}
+        counts_by_day = {}
+        counted = []
+        for doc in source.find(unflagged, projection, session=session):
+            counts_by_day.setdefault(_day(doc.get('created_at')), Counter()).update(counts_for(doc))
+            counted.append(doc["_id"])
+        if counted:
+            _apply(counts_by_day, session=session)
+            source.update_many({"_id": {"$in": counted}}, {"$set": {"rolled_up": True}}, session=session)
+
+    if _use_transactions():
+        try:
+            with source.database.client.start_session() as session:
+                session.with_transaction(count_once)
+            return
+        except pymongo.errors.OperationFailure as e:
+            if not _transactions_unsupported(e):
+                raise
+    # Without transactions a crash between the increment and the flag recounts this batch next time
+    count_once(None)
+
+
+def backfill(analysis_results_collection, submissions_collection):
+    """Rolls up stored documents that were never counted, by one process at a time.
+
+    Covers documents from before rollups existed and any whose live increment failed.
+    Each batch is counted and flagged in one transaction where the server supports them.
+    The process holding the lease renews its heartbeat every batch; another process
+    takes over only once the heartbeat is BACKFILL_LEASE_SECONDS old. Until one sweep
+    has finished, documents without the flag are included; after that only those
+    stored with rolled_up False, which the partial index covers.
+    """
+    if not ROLLUPS_ENABLED:
+        return False
+    collection = _collection()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    now = datetime.utcnow()
+    try:
+        meta = collection.find_one_and_update(
+            {"_id": BACKFILL_ID, "$or": [
+                {"lease_owner": {"$exists": False}},
+                {"heartbeat_at": {"$lt": now - timedelta(seconds=BACKFILL_LEASE_SECONDS)}}
+            ]},
+            {"$set": {"lease_owner": owner, "heartbeat_at": now}, "$setOnInsert": {"status": "running"}},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.BEFORE
+        )
+    except pymongo.errors.DuplicateKeyError:
+        # Another process holds a live lease
+        return False
+
+    # Documents this recent may still be getting their live increment
+    cutoff = now - timedelta(seconds=BACKFILL_GRACE_SECONDS)
+    first_sweep = (meta or {}).get("status") != "done"
+    completed = (
+        _backfill_collection(collection, owner, analysis_results_collection,
+                             {'comparison': 1, 'created_at': 1}, analysis_counts, cutoff, first_sweep)
+        and _backfill_collection(collection, owner, submissions_collection,
+                                 {'parsed_jd_fields.job_role': 1, 'created_at': 1}, submission_counts, cutoff, first_sweep)
+    )
+    if not completed:
+        print("Analytics rollups backfill warning: lease lost to another process")
+        return False
+    collection.update_one(
+        {"_id": BACKFILL_ID, "lease_owner": owner},
+        {"$set": {"status": "done", "finished_at": datetime.utcnow()}, "$unset": {"lease_owner": "", "heartbeat_at": ""}}
+    )
+    return True
+
+
+async def _catch_up(analysis_results_collection, submissions_collection):
+    loop = asyncio.get_event_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, backfill, analysis_results_collection, submissions_collection)
+        except Exception as e:
+            print(f"Analytics rollups backfill warning: {str(e)}")
+        await asyncio.sleep(ROLLUPS_CATCHUP_SECONDS)
+
+
+def start_catch_up(analysis_results_collection, submissions_collection):
+    """Runs the backfill now and every ROLLUPS_CATCHUP_SECONDS, so missed documents are not left until a restart."""
+    global _catch_up_task
+    if ROLLUPS_ENABLED and _catch_up_task is None:
+        _catch_up_task = asyncio.create_task(_catch_up(analysis_results_collection, submissions_collection))
+
+
+async def stop_catch_up():
+    global _catch_up_task
+    if _catch_up_task is not None:
+        _catch_up_task.cancel()
+        await asyncio.gather(_catch_up_task, return_exceptions=True)
+        _catch_up_task = None
+
+
+def totals_pipeline(metric, days=None, limit=None):
+    match = {"metric": metric}
+    if days:
+        match["day"] = {"$gte": (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")}
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": "$key", "count": {"$sum": "$count"}}},
+        {"$sort": {"count": -1, "_id": 1}}
+    ]
+    if limit:
+        pipeline.append({"$limit": limit})
+    return pipeline
+
+
+def totals_from_rows(rows):
+    return [(row["_id"], row["count"]) for row in rows]
+
+
+def total_from_totals(totals):
+    return totals[0][1] if totals else 0
+
+
+# Same shapes as the scanning functions in admin.py; the *_view helpers are shared with the async admin path
+
+def missing_skills_view(skill_totals, total):
+    return [
+        {'skill': skill, 'count': count, 'percentage': round((count / total * 100), 2) if total else 0}
+        for skill, count in skill_totals
+    ]
+
+
+def job_roles_view(role_totals):
+    return [{'role': role.title(), 'count': count} for role, count in role_totals]
+
+
+def category_view(matched_totals, missing_totals):
+    matched = dict(matched_totals)
+    missing = dict(missing_totals)
+    return {
+        category: {'matched': matched.get(category, 0), 'missing': missing.get(category, 0)}
+        for category in SKILL_CATEGORIES
+    }
+
+
+def recommendation_view(recommendation_totals, total):
+    counts = dict(recommendation_totals)
+    distribution = {name: counts.get(label, 0) for name, label in RECOMMENDATIONS.items()}
+    distribution['total'] = total
+    return distribution
+
@@ -0,0 +1,224 @@
+import asyncio
+import io
+import json
+import os
+import time
+import zipfile
+import zlib
+
+from .worker_pool import PoolSaturated
+
+BATCH_MAX_RESUMES = int(os.getenv("BATCH_MAX_RESUMES", "500"))
+BATCH_MAX_FILE_MB = int(os.getenv("BATCH_MAX_FILE_MB", "10"))
+# Cap on the uploaded bytes and, separately, on the resume bytes after unpacking zip archives
+BATCH_MAX_TOTAL_MB = int(os.getenv("BATCH_MAX_TOTAL_MB", "200"))
+READ_CHUNK_BYTES = 1024 * 1024
+# How long a candidate may wait for a free analysis worker before it is reported as failed
+BATCH_QUEUE_WAIT = float(os.getenv("BATCH_QUEUE_WAIT", "120"))
+
+RESUME_EXTENSIONS = {"pdf", "docx", "png", "jpg", "jpeg", "tif", "tiff", "bmp", "webp"}
+
+
+class BatchError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def file_ext(filename):
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def _too_large(filename):
+    return BatchError(413, f"{filename} exceeds {BATCH_MAX_FILE_MB} MB")
+
+
+def _batch_too_large():
+    return BatchError(413, f"A batch may not exceed {BATCH_MAX_TOTAL_MB} MB")
+
+
+async def read_batch_uploads(uploads):
+    """(filename, bytes) for each UploadFile, rejected with 413 as soon as a size limit is crossed.
+
+    Declared sizes are checked before anything is read; the chunked read enforces the same limits
+    on the bytes that actually arrive. Zip archives are bounded by the batch total only.
+    """
+    max_bytes = BATCH_MAX_FILE_MB * 1024 * 1024
+    max_total = BATCH_MAX_TOTAL_MB * 1024 * 1024
+    declared = 0
+    for upload in uploads:
+        if upload.size is None:
+            continue
+        if file_ext(upload.filename) != "zip" and upload.size > max_bytes:
+            raise _too_large(upload.filename)
+        declared += upload.size
+    if declared > max_total:
+        raise _batch_too_large()
+
+    files = []
+    total = 0
+    for upload in uploads:
+        limit = None if file_ext(upload.filename) == "zip" else max_bytes
+        data = bytearray()
+        while True:
+            chunk = await upload.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            data += chunk
+            total += len(chunk)
+            if limit is not None and len(data) > limit:
+                raise _too_large(upload.filename)
+            if total > max_total:
+                raise _batch_too_large()
+        files.append((upload.filename, bytes(data)))
+    return files
+
+
+def _read_member(archive, info, limit):
+    # At most limit + 1 decompressed bytes; file_size in the archive is only what the zip claims
+    with archive.open(info) as member:
+        return member.read(limit + 1)
+
+
+def expand_uploads(files):
+    """Flattens (filename, bytes) uploads, unpacking zip archives into their resume files."""
+    max_bytes = BATCH_MAX_FILE_MB * 1024 * 1024
+    max_total = BATCH_MAX_TOTAL_MB * 1024 * 1024
+    resumes = []
+    total = 0
+    for filename, data in files:
+        if file_ext(filename) != "zip":
+            if len(data) > max_bytes:
+                raise _too_large(filename)
+            total += len(data)
+            if total > max_total:
+                raise _batch_too_large()
+            resumes.append((filename, data))
+        else:
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile:
+                raise BatchError(400, f"{filename} is not a valid zip archive")
+            with archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                        continue
+                    if file_ext(name) not in RESUME_EXTENSIONS:
+                        continue
+                    if info.file_size > max_bytes:
+                        raise BatchError(413, f"{name} in {filename} exceeds {BATCH_MAX_FILE_MB} MB")
+                    if total + info.file_size > max_total:
+                        raise _batch_too_large()
+                    try:
+                        member = _read_member(archive, info, min(max_bytes, max_total - total))
+                    except (zipfile.BadZipFile, zlib.error, EOFError):
+                        raise BatchError(400, f"{name} in {filename} is corrupt")
+                    if len(member) > max_bytes:
+                        raise BatchError(413, f"{name} in {filename} exceeds {BATCH_MAX_FILE_MB} MB")
+                    total += len(member)
+                    if total > max_total:
+                        raise _batch_too_large()
+                    resumes.append((name, member))
+                    if len(resumes) > BATCH_MAX_RESUMES:
+                        break
+        if len(resumes) > BATCH_MAX_RESUMES:
+            raise BatchError(413, f"A batch may contain at most {BATCH_MAX_RESUMES} resumes")
+    if not resumes:
+        raise BatchError(400, "No resumes found in the upload")
+    return resumes
+
+
+def encode_event(event, stream_format):
+    payload = json.dumps(event, default=str)
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+async def screen_candidate(pool, index, filename, data, jd_profile):
+    deadline = time.monotonic() + BATCH_QUEUE_WAIT
+    try:
+        while True:
+            try:
+                result = await pool.screen_resume(data, file_ext(filename), jd_profile)
+                break
+            except PoolSaturated as e:
+                # Batches wait for capacity instead of failing like interactive requests do
+                if time.monotonic() >= deadline:
+                    raise
+                await asyncio.sleep(min(1.0, e.retry_after))
+    except Exception as e:
+        return {"type": "error", "index": index, "filename": filename, "detail": str(e)}
+
+    comparison = result["comparison"]
+    profile = result["resume_profile"]
+    return {
+        "type": "result",
+        "index": index,
+        "filename": filename,
+        "candidate_name": profile.get("candidate_name"),
+        "email": profile.get("email"),
+        "match_percentage": comparison["match_percentage"],
+        "comparison": comparison,
+        "resume_skills": result["resume_skills"],
+        "extraction_metadata": result["extraction_metadata"]
+    }
+
+
+async def stream_batch(pool, jd, resumes):
+    """Yields one event per candidate as it finishes, then a summary with the ranked list."""
+    start = time.perf_counter()
+    jd_profile = {
+        "jd_structured": jd["jd_profile"]["jd_structured"],
+        "jd_skills_extracted": jd["jd_profile"]["jd_skills_extracted"]
+    }
+    yield {
+        "type": "job",
+        "jd_hash": jd["jd_hash"],
+        "job_role": jd_profile["jd_structured"].get("job_role"),
+        "total": len(resumes),
+        "extraction_metadata": jd["extraction_metadata"]
+    }
+
+    # Keep at most one job per analysis worker queued so interactive requests still get through
+    slots = asyncio.Semaphore(max(pool.workers, 1))
+
+    async def run(index, filename, data):
+        async with slots:
+            return await screen_candidate(pool, index, filename, data, jd_profile)
+
+    tasks = [asyncio.create_task(run(i, name, data)) for i, (name, data) in enumerate(resumes)]
+    results = []
+    failed = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            event = await next_done
+            (results if event["type"] == "result" else failed).append(event)
+            yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    ranked = sorted(results, key=lambda r: (-r["match_percentage"], r["index"]))
+    yield {
+        "type": "summary",
+        "jd_hash": jd["jd_hash"],
+        "completed": len(results),
+        "failed": len(failed),
+        "wall_time_ms": round((time.perf_counter() - start) * 1000, 2),
+        "ranking": [
+            {
+                "rank": rank,
+                "index": r["index"],
+                "filename": r["filename"],
+                "candidate_name": r["candidate_name"],
+                "email": r["email"],
+                "match_percentage": r["match_percentage"],
+                "matched_skills": len(r["comparison"].get("matched_skills", [])),
+                "missing_skills": len(r["comparison"].get("missing_skills", []))
+            }
+            for rank, r in enumerate(ranked, start=1)
+        ]
+    }
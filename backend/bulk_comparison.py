@@ -0,0 +1,138 @@
+import numpy as np
+from scipy import sparse
+
+from .comparison_engine import (
+    resume_skill_list, job_skill_list, normalize_list,
+    parse_resume_experience, parse_required_experience, education_requirement,
+    meets_education_requirement
+)
+from .skill_registry import get_skill_registry, SkillBitset, CORE_SKILL_CATEGORIES
+
+EDUCATION_REQUIREMENTS = [None, "bachelor", "master"]
+
+
+class ProfileMatrix:
+    """Core skills of many profiles as a sparse 0/1 matrix over skill registry IDs (one row per profile).
+
+    Skills are resolved to registry IDs once here, not on every comparison.
+    """
+
+    def __init__(self, skill_lists):
+        registry = get_skill_registry()
+        self.size = len(registry)
+        self.skill_rows = [list(registry.core_skills(skills)) for skills in skill_lists]
+
+    def __len__(self):
+        return len(self.skill_rows)
+
+    def to_csr(self):
+        indptr = np.zeros(len(self.skill_rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in self.skill_rows])
+        indices = np.fromiter((i for row in self.skill_rows for i in row), dtype=np.int32, count=int(indptr[-1]))
+        data = np.ones(len(indices), dtype=np.int32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(self.skill_rows), self.size))
+
+
+class ResumeMatrix(ProfileMatrix):
+    def __init__(self, resume_profiles):
+        super().__init__([resume_skill_list(p) for p in resume_profiles])
+        self.experience = np.array(
+            [parse_resume_experience(p.get('experience_years_estimated', 0)) for p in resume_profiles],
+            dtype=np.float64
+        )
+        # Whether each resume meets each possible JD education requirement
+        self.education_ok = np.zeros((len(resume_profiles), len(EDUCATION_REQUIREMENTS)), dtype=bool)
+        for row, p in enumerate(resume_profiles):
+            degrees = set(normalize_list(p.get('education_degrees', [])))
+            for column, requirement in enumerate(EDUCATION_REQUIREMENTS):
+                self.education_ok[row, column] = meets_education_requirement(requirement, degrees)
+
+
+class JobMatrix(ProfileMatrix):
+    def __init__(self, job_profiles):
+        super().__init__([job_skill_list(p) for p in job_profiles])
+        self.required_experience = np.array(
+            [parse_required_experience(p.get('required_experience_years', '')) for p in job_profiles],
+            dtype=np.float64
+        )
+        self.education = np.array(
+            [EDUCATION_REQUIREMENTS.index(education_requirement(p.get('required_education', []))) for p in job_profiles],
+            dtype=np.intp
+        )
+
+
+def round2(values):
+    """Python's round(x, 2) over an array.
+
+    np.round scales by 100 before rounding, which can land on the other side of a
+    .xx5 tie than the correctly rounded builtin; those few elements use round().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, 2) for v in values[near_tie].tolist()]
+    return rounded
+
+
+def _ratio(matched, required):
+    # matched / required, or 1.0 where nothing is required, as in compare_profiles
+    required = np.broadcast_to(required, matched.shape)
+    return np.divide(matched, required, out=np.ones(matched.shape, dtype=np.float64), where=required > 0)
+
+
+def compare_profiles_bulk(resumes, jobs):
+    """Scores every resume of a ResumeMatrix against every JD of a JobMatrix.
+
+    Returns (n_resumes, n_jobs) arrays with the counts, ratios and match_percentage
+    that compare_profiles would report for each pair.
+    """
+    registry = get_skill_registry()
+    resume_csr = resumes.to_csr()
+    job_csr = jobs.to_csr()
+
+    matched_by_category = []
+    required_by_category = []
+    for category in CORE_SKILL_CATEGORIES:
+        columns = list(SkillBitset(registry.category_sets[category]))
+        resume_part = resume_csr[:, columns]
+        job_part = job_csr[:, columns]
+        matched_by_category.append((resume_part @ job_part.T).toarray())
+        required_by_category.append(np.asarray(job_part.sum(axis=1)).ravel())
+
+    matched = sum(matched_by_category)
+    required = sum(required_by_category)
+    required_matrix = np.broadcast_to(required, matched.shape)
+    resume_counts = np.diff(resume_csr.indptr)
+
+    skill_match_ratio = _ratio(matched, required)
+    category_ratios = [_ratio(m, r) for m, r in zip(matched_by_category, required_by_category)]
+
+    required_experience = jobs.required_experience[np.newaxis, :]
+    experience_gap_years = np.where(required_experience > 0, required_experience - resumes.experience[:, np.newaxis], 0.0)
+    education_match = resumes.education_ok[:, jobs.education]
+
+    # Same operation order as weighted_match_score so the floats come out bit-identical
+    skill_score = skill_match_ratio * 100
+    education_score = np.where(education_match, 100.0, 0.0)
+    experience_score = np.where(experience_gap_years > 0, np.maximum(0, 100 - (experience_gap_years * 10)), 100.0)
+    with_skills = (skill_score * 0.6) + (education_score * 0.2) + (experience_score * 0.2)
+    without_skills = (education_score * 0.5) + (experience_score * 0.5)
+    match_percentage = round2(np.where(required_matrix > 0, with_skills, without_skills))
+
+    return {
+        'matched_count': matched,
+        'missing_count': required_matrix - matched,
+        'additional_count': resume_counts[:, np.newaxis] - matched,
+        'required_count': required_matrix,
+        'skill_match_ratio': round2(skill_match_ratio * 100),
+        'language_ratio': round2(category_ratios[0] * 100),
+        'framework_ratio': round2(category_ratios[1] * 100),
+        'tool_ratio': round2(category_ratios[2] * 100),
+        'database_ratio': round2(category_ratios[3] * 100),
+        'education_match': education_match,
+        'experience_gap': experience_gap_years > 0,
+        'experience_gap_years': experience_gap_years,
+        'match_percentage': match_percentage
+    }
@@ -1,4 +1,5 @@
 import re
+from .skill_registry import get_skill_registry, CORE_SKILL_CATEGORIES, JUNK_SKILL_TERMS
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
@@ -224,16 +225,13 @@ def classify_skills_by_taxonomy(skills):
         'other': []
     }
     
-    junk_terms = {'general', 'dev', 'development', 'programming', 'coding', 'scripting', 
-                  'software', 'web', 'application', 'system', 'technology'}
-    
     for skill in skills:
-        if skill.lower() in junk_terms:
+        if skill.lower() in JUNK_SKILL_TERMS:
             continue
             
         canonical = canonicalize_skill(skill)
         if canonical:
-            if canonical.lower() in junk_terms:
+            if canonical.lower() in JUNK_SKILL_TERMS:
                 continue
                 
             category = classify_skill(skill)
@@ -276,41 +274,82 @@ def calculate_weighted_score(matched, required, category_weight):
     match_ratio = len(matched) / len(required)
     return match_ratio * category_weight
 
+def resume_skill_list(resume_profile):
+    skills = []
+    skills.extend(resume_profile.get('technical_skills', []))
+    skills.extend(resume_profile.get('programming_languages', []))
+    skills.extend(resume_profile.get('frameworks', []))
+    skills.extend(resume_profile.get('tools', []))
+    skills.extend(resume_profile.get('databases', []))
+    return skills
+
+def job_skill_list(job_profile):
+    skills = []
+    skills.extend(job_profile.get('required_skills', []))
+    skills.extend(job_profile.get('required_languages', []))
+    skills.extend(job_profile.get('required_frameworks', []))
+    skills.extend(job_profile.get('required_tools', []))
+    skills.extend(job_profile.get('required_databases', []))
+    return skills
+
+def core_skills(skills):
+    # Registry bitset of the skills classify_skills_by_taxonomy would put in a core category
+    return get_skill_registry().core_skills(skills)
+
+def parse_resume_experience(resume_experience):
+    if isinstance(resume_experience, str):
+        try:
+            resume_experience = int(resume_experience)
+        except:
+            resume_experience = 0
+    return resume_experience
+
+def parse_required_experience(jd_experience_str):
+    if isinstance(jd_experience_str, str) and jd_experience_str:
+        try:
+            return int(re.search(r'\d+', str(jd_experience_str)).group())
+        except:
+            return 0
+    return 0
+
+def education_requirement(required_education):
+    jd_education = set(normalize_list(required_education))
+    if jd_education:
+        joined = ' '.join(jd_education).lower()
+        if 'bachelor' in joined or 'bsc' in joined or 'btech' in joined:
+            return 'bachelor'
+        elif 'master' in joined:
+            return 'master'
+    return None
+
+def meets_education_requirement(requirement, resume_degrees):
+    if requirement == 'bachelor':
+        return any('bachelor' in deg.lower() or 'bsc' in deg.lower() or 'btech' in deg.lower() or 'master' in deg.lower() or 'phd' in deg.lower() for deg in resume_degrees)
+    if requirement == 'master':
+        return any('master' in deg.lower() or 'phd' in deg.lower() for deg in resume_degrees)
+    return True
+
+def weighted_match_score(matched_count, required_count, education_match, experience_gap_years):
+    skill_match_ratio = matched_count / required_count if required_count > 0 else 1.0
+    
+    # Calculate component scores for weighted scoring
+    skill_score = skill_match_ratio * 100
+    education_score = 100 if education_match else 0
+    experience_score = max(0, 100 - (experience_gap_years * 10)) if experience_gap_years > 0 else 100
+    
+    # Apply weighted scoring based on whether skills are required
+    if required_count > 0:
+        # Skills are required: Skills 60%, Education 20%, Experience 20%
+        return round((skill_score * 0.6) + (education_score * 0.2) + (experience_score * 0.2), 2)
+    # No skills required: Education 50%, Experience 50%
+    return round((education_score * 0.5) + (experience_score * 0.5), 2)
+
 def compare_profiles(resume_profile, job_profile):
     
-    resume_skills_raw = []
-    resume_skills_raw.extend(resume_profile.get('technical_skills', []))
-    resume_skills_raw.extend(resume_profile.get('programming_languages', []))
-    resume_skills_raw.extend(resume_profile.get('frameworks', []))
-    resume_skills_raw.extend(resume_profile.get('tools', []))
-    resume_skills_raw.extend(resume_profile.get('databases', []))
-    
-    resume_skills_canonical = normalize_and_canonicalize_skills(resume_skills_raw)
-    resume_classified = classify_skills_by_taxonomy(resume_skills_canonical)
-    
-    resume_core_skills = set()
-    resume_core_skills.update(resume_classified['languages'])
-    resume_core_skills.update(resume_classified['frameworks'])
-    resume_core_skills.update(resume_classified['tools'])
-    resume_core_skills.update(resume_classified['databases'])
-    
-    jd_skills_raw = []
-    jd_skills_raw.extend(job_profile.get('required_skills', []))
-    jd_skills_raw.extend(job_profile.get('required_languages', []))
-    jd_skills_raw.extend(job_profile.get('required_frameworks', []))
-    jd_skills_raw.extend(job_profile.get('required_tools', []))
-    jd_skills_raw.extend(job_profile.get('required_databases', []))
-    
-    jd_skills_canonical = normalize_and_canonicalize_skills(jd_skills_raw)
-    jd_classified = classify_skills_by_taxonomy(jd_skills_canonical)
-    
-    jd_core_required = set()
-    jd_core_required.update(jd_classified['languages'])
-    jd_core_required.update(jd_classified['frameworks'])
-    jd_core_required.update(jd_classified['tools'])
-    jd_core_required.update(jd_classified['databases'])
-    
-    matched = resume_core_skills.intersection(jd_core_required)
+    resume_core_skills = core_skills(resume_skill_list(resume_profile))
+    jd_core_required = core_skills(job_skill_list(job_profile))
+    
+    matched = resume_core_skills & jd_core_required
     missing = jd_core_required - resume_core_skills
     additional = resume_core_skills - jd_core_required
     
@@ -318,33 +357,21 @@ def compare_profiles(resume_profile, job_profile):
     
     matched_by_category = {}
     missing_by_category = {}
-    for category in ['languages', 'frameworks', 'tools', 'databases']:
-        resume_cat = set(resume_classified[category])
-        jd_cat = set(jd_classified[category])
-        matched_by_category[category] = list(resume_cat.intersection(jd_cat))
-        missing_by_category[category] = list(jd_cat - resume_cat)
+    jd_classified = {}
+    for category in CORE_SKILL_CATEGORIES:
+        resume_cat = resume_core_skills.in_category(category)
+        jd_cat = jd_core_required.in_category(category)
+        jd_classified[category] = jd_cat
+        matched_by_category[category] = (resume_cat & jd_cat).names()
+        missing_by_category[category] = (jd_cat - resume_cat).names()
     
     language_ratio = len(matched_by_category['languages']) / len(jd_classified['languages']) if jd_classified['languages'] else 1.0
     framework_ratio = len(matched_by_category['frameworks']) / len(jd_classified['frameworks']) if jd_classified['frameworks'] else 1.0
     tool_ratio = len(matched_by_category['tools']) / len(jd_classified['tools']) if jd_classified['tools'] else 1.0
     database_ratio = len(matched_by_category['databases']) / len(jd_classified['databases']) if jd_classified['databases'] else 1.0
     
-    resume_experience = resume_profile.get('experience_years_estimated', 0)
-    jd_experience_str = job_profile.get('required_experience_years', '')
-    
-    if isinstance(resume_experience, str):
-        try:
-            resume_experience = int(resume_experience)
-        except:
-            resume_experience = 0
-    
-    if isinstance(jd_experience_str, str) and jd_experience_str:
-        try:
-            jd_experience = int(re.search(r'\d+', str(jd_experience_str)).group())
-        except:
-            jd_experience = 0
-    else:
-        jd_experience = 0
+    resume_experience = parse_resume_experience(resume_profile.get('experience_years_estimated', 0))
+    jd_experience = parse_required_experience(job_profile.get('required_experience_years', ''))
     
     experience_gap_years = jd_experience - resume_experience if jd_experience > 0 else 0
     experience_gap = experience_gap_years > 0
@@ -354,27 +381,9 @@ def compare_profiles(resume_profile, job_profile):
         experience_gap_warning = f"Candidate has {resume_experience} years but role requires {jd_experience}+ years (gap: {experience_gap_years} years)"
     
     resume_degrees = set(normalize_list(resume_profile.get('education_degrees', [])))
-    jd_education = set(normalize_list(job_profile.get('required_education', [])))
-    
-    education_match = True
-    if jd_education:
-        if 'bachelor' in ' '.join(jd_education).lower() or 'bsc' in ' '.join(jd_education).lower() or 'btech' in ' '.join(jd_education).lower():
-            education_match = any('bachelor' in deg.lower() or 'bsc' in deg.lower() or 'btech' in deg.lower() or 'master' in deg.lower() or 'phd' in deg.lower() for deg in resume_degrees)
-        elif 'master' in ' '.join(jd_education).lower():
-            education_match = any('master' in deg.lower() or 'phd' in deg.lower() for deg in resume_degrees)
-    
-    # Calculate component scores for weighted scoring
-    skill_score = skill_match_ratio * 100
-    education_score = 100 if education_match else 0
-    experience_score = max(0, 100 - (experience_gap_years * 10)) if experience_gap_years > 0 else 100
+    education_match = meets_education_requirement(education_requirement(job_profile.get('required_education', [])), resume_degrees)
     
-    # Apply weighted scoring based on whether skills are required
-    if len(jd_core_required) > 0:
-        # Skills are required: Skills 60%, Education 20%, Experience 20%
-        final_score = round((skill_score * 0.6) + (education_score * 0.2) + (experience_score * 0.2), 2)
-    else:
-        # No skills required: Education 50%, Experience 50%
-        final_score = round((education_score * 0.5) + (experience_score * 0.5), 2)
+    final_score = weighted_match_score(len(matched), len(jd_core_required), education_match, experience_gap_years)
     
     if final_score >= 80:
         if experience_gap:
@@ -405,7 +414,7 @@ def compare_profiles(resume_profile, job_profile):
     
     top_strengths = []
     if len(matched) > 0:
-        matched_list = sorted(list(matched))
+        matched_list = matched.names()
         if len(matched_list) <= 5:
             top_strengths.append(f"Matched core skills: {', '.join(matched_list)}")
         else:
@@ -421,7 +430,7 @@ def compare_profiles(resume_profile, job_profile):
     
     major_gaps = []
     if len(missing) > 0:
-        missing_list = sorted(list(missing))
+        missing_list = missing.names()
         if len(missing_list) <= 5:
             major_gaps.append(f"Missing core skills: {', '.join(missing_list)}")
         else:
@@ -442,13 +451,13 @@ def compare_profiles(resume_profile, job_profile):
         'major_gaps': major_gaps[:3],
         'experience_relevance': experience_analysis,
         'experience_gap_warning': experience_gap_warning,
-        'additional_skills': sorted(list(additional))[:10]
+        'additional_skills': additional.names()[:10]
     }
     
     return {
-        'matched_skills': sorted(list(matched)),
-        'missing_skills': sorted(list(missing)),
-        'additional_skills': sorted(list(additional)),
+        'matched_skills': matched.names(),
+        'missing_skills': missing.names(),
+        'additional_skills': additional.names(),
         
         'matched_languages': matched_by_category['languages'],
         'missing_languages': missing_by_category['languages'],
@@ -0,0 +1,119 @@
+import copy
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+
+JD_CACHE_SIZE = int(os.getenv("JD_CACHE_SIZE", "256"))
+# Persist parsed JD profiles in the job_descriptions collection so every worker can reuse them
+JD_CACHE_MONGO = os.getenv("JD_CACHE_MONGO", "0") == "1"
+# Bump whenever parse_jd_structured / JD preprocessing output can change
+JD_PARSER_VERSION = "1"
+JD_CACHE_KIND = "jd_profile_cache"
+
+
+def normalize_jd_text(text):
+    # Only differences that cannot matter to the parser: unicode form, line endings, trailing blanks
+    text = unicodedata.normalize("NFC", text or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def jd_cache_key(normalized_text):
+    return hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+
+
+class JDProfileCache:
+    """LRU of parsed JD profiles, optionally backed by the job_descriptions collection.
+
+    Callers mutate the profiles they get back, so every read returns a deep copy.
+    """
+
+    def __init__(self, max_entries=JD_CACHE_SIZE, use_mongo=JD_CACHE_MONGO):
+        self.max_entries = max_entries
+        self.use_mongo = use_mongo
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "evictions": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._mongo_indexed = False
+
+    def _mongo_collection(self):
+        from .mongodb import job_descriptions_collection
+        collection = job_descriptions_collection()
+        if not self._mongo_indexed:
+            # Every in-memory miss looks the JD up by this key in a collection that grows with each analysis
+            collection.create_index([("kind", 1), ("jd_hash", 1), ("parser_version", 1)])
+            self._mongo_indexed = True
+        return collection
+
+    def _remember(self, key, profile):
+        with self._lock:
+            self._entries[key] = profile
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get(self, key):
+        with self._lock:
+            profile = self._entries.get(key)
+            if profile is not None:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+        if profile is not None:
+            return copy.deepcopy(profile), "memory"
+
+        if self.use_mongo:
+            try:
+                doc = self._mongo_collection().find_one_and_update(
+                    {"kind": JD_CACHE_KIND, "jd_hash": key, "parser_version": JD_PARSER_VERSION},
+                    {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"use_count": 1}},
+                    projection={"parsed": 1}
+                )
+                if doc and doc.get("parsed"):
+                    self._remember(key, doc["parsed"])
+                    with self._lock:
+                        self.stats["mongo_hits"] += 1
+                    return copy.deepcopy(doc["parsed"]), "mongo"
+            except Exception as e:
+                print(f"JD cache MongoDB read warning: {str(e)}")
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None, None
+
+    def put(self, key, profile, normalized_text):
+        profile = copy.deepcopy(profile)
+        self._remember(key, profile)
+        if self.use_mongo:
+            try:
+                now = datetime.utcnow()
+                self._mongo_collection().update_one(
+                    {"kind": JD_CACHE_KIND, "jd_hash": key, "parser_version": JD_PARSER_VERSION},
+                    {
+                        "$set": {"parsed": profile, "raw_text": normalized_text, "last_used_at": now},
+                        "$setOnInsert": {"created_at": now, "use_count": 1}
+                    },
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"JD cache MongoDB write warning: {str(e)}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        stats["mongo_tier"] = self.use_mongo
+        return stats
+
+
+_jd_cache = None
+
+def get_jd_cache():
+    global _jd_cache
+    if _jd_cache is None:
+        _jd_cache = JDProfileCache()
+    return _jd_cache
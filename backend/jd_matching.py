@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .bulk_comparison import ResumeMatrix, JobMatrix, compare_profiles_bulk
+from .comparison_engine import compare_profiles
+from .jd_cache import normalize_jd_text, jd_cache_key
+
+# New job_descriptions documents are picked up incrementally at most this often
+JD_INDEX_REFRESH_SECONDS = float(os.getenv("JD_INDEX_REFRESH_SECONDS", "30"))
+# Full rebuilds drop deleted JDs and compact superseded entries
+JD_INDEX_REBUILD_SECONDS = float(os.getenv("JD_INDEX_REBUILD_SECONDS", "3600"))
+MATCH_MAX_TOP_K = int(os.getenv("MATCH_MAX_TOP_K", "50"))
+
+INDEX_PROJECTION = {"_id": 1, "jd_id": 1, "jd_hash": 1, "user_id": 1, "profile": 1, "raw_text": 1, "created_at": 1}
+
+
+class JDSkillIndex:
+    """Every stored JD reduced to what compare_profiles needs for its score.
+
+    Each distinct JD (by jd_hash) is indexed once as a row of a JobMatrix, so a
+    resume is scored against the whole library with one compare_profiles_bulk
+    call. Superseded entries are tombstoned until the next full rebuild.
+    """
+
+    def __init__(self, refresh_seconds=JD_INDEX_REFRESH_SECONDS, rebuild_seconds=JD_INDEX_REBUILD_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.stats = {"rebuilds": 0, "refreshes": 0, "queries": 0}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._entries = []
+        self._positions = {}
+        self._matrix = JobMatrix([])
+        self._last_id = None
+        self._refreshed_at = None
+        self._rebuilt_at = None
+        self._task = None
+
+    def _add(self, doc, entries, positions):
+        profile = doc.get("profile")
+        if not profile:
+            return
+        key = doc.get("jd_hash") or jd_cache_key(normalize_jd_text(doc.get("raw_text") or ""))
+        entry = {
+            "jd_id": doc.get("jd_id"),
+            "jd_hash": key,
+            "job_role": profile.get("job_role"),
+            "created_at": doc.get("created_at"),
+            "user_ids": {doc.get("user_id")},
+            "profile": profile
+        }
+        previous = positions.get(key)
+        if previous is not None:
+            # Same JD stored again: the newest document wins, but every poster can still filter to it
+            entry["user_ids"] |= entries[previous]["user_ids"]
+            entries[previous] = None
+        positions[key] = len(entries)
+        entries.append(entry)
+
+    def _refresh_due(self):
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    def refresh(self, force=False):
+        """Loads JDs stored since the last refresh; call from a worker thread, it blocks on MongoDB.
+
+        New entries and their JobMatrix are assembled off to the side and swapped in, so rank keeps serving the previous snapshot.
+        """
+        if not force and not self._refresh_due():
+            return
+        with self._refresh_lock:
+            if not force and not self._refresh_due():
+                return
+            from .mongodb import job_descriptions_collection
+            rebuild = force or self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= self.rebuild_seconds
+            query = {"profile": {"$exists": True}}
+            if not rebuild and self._last_id is not None:
+                query["_id"] = {"$gt": self._last_id}
+            docs = list(job_descriptions_collection().find(query, INDEX_PROJECTION).sort("_id", 1))
+
+            if rebuild or docs:
+                entries, positions = ([], {}) if rebuild else (list(self._entries), dict(self._positions))
+                for doc in docs:
+                    self._add(doc, entries, positions)
+                # Tombstones keep an empty row so matrix rows line up with entry positions
+                matrix = JobMatrix([entry["profile"] if entry else {} for entry in entries])
+                with self._lock:
+                    self._entries, self._positions, self._matrix = entries, positions, matrix
+                    self._last_id = docs[-1]["_id"] if docs else None
+            self.stats["rebuilds" if rebuild else "refreshes"] += 1
+            self._refreshed_at = time.monotonic()
+            if rebuild:
+                self._rebuilt_at = self._refreshed_at
+
+    async def _keep_fresh(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.refresh)
+            except Exception as e:
+                print(f"JD index refresh warning: {str(e)}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        """Builds the index and keeps it fresh in the background; queries never wait on MongoDB."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._keep_fresh())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def rank(self, resume_profile, top_k=10, role=None, since_days=None, user_id=None):
+        """Scores the resume against every indexed JD passing the filters; full comparisons only for the top_k."""
+        start = time.perf_counter()
+        role = role.lower().strip() if role else None
+        since = datetime.utcnow() - timedelta(days=since_days) if since_days else None
+
+        with self._lock:
+            self.stats["queries"] += 1
+            total = len(self._positions)
+            entries, matrix = self._entries, self._matrix
+        # Snapshots are replaced, never mutated, so scoring runs outside the lock
+        scores = compare_profiles_bulk(ResumeMatrix([resume_profile]), matrix)["match_percentage"][0].tolist()
+
+        scored = []
+        for position, entry in enumerate(entries):
+            if entry is None:
+                continue
+            if role and role not in (entry["job_role"] or "").lower():
+                continue
+            if since and (not entry["created_at"] or entry["created_at"] < since):
+                continue
+            if user_id is not None and user_id not in entry["user_ids"]:
+                continue
+            # Ties go to the more recently indexed JD
+            scored.append((scores[position], position, entry))
+        top = heapq.nlargest(top_k, scored, key=lambda s: (s[0], s[1]))
+        index_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        results = []
+        for score, _, entry in top:
+            results.append({
+                "jd_id": entry["jd_id"],
+                "jd_hash": entry["jd_hash"],
+                "job_role": entry["job_role"],
+                "created_at": entry["created_at"],
+                "match_percentage": score,
+                "comparison": compare_profiles(resume_profile, entry["profile"])
+            })
+        return {
+            # False until the first background build has finished
+            "index_ready": self._refreshed_at is not None,
+            "total_jds": total,
+            "jds_scored": len(scored),
+            "index_ms": index_ms,
+            "results": results
+        }
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["jds"] = len(self._positions)
+        stats["ready"] = self._refreshed_at is not None
+        return stats
+
+
+_jd_index = None
+
+def get_jd_index():
+    global _jd_index
+    if _jd_index is None:
+        _jd_index = JDSkillIndex()
+    return _jd_index
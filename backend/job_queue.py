@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+import pymongo
+import pymongo.errors
+
+# Jobs each web process runs at once; they share the analysis pool with interactive requests
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# A running job whose worker stops renewing its lease for this long is picked up again
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Re-submitting identical inputs within this window returns the finished job instead of a new one
+JOB_DEDUP_SECONDS = float(os.getenv("JOB_DEDUP_SECONDS", "3600"))
+JOB_MAX_INPUT_MB = int(os.getenv("JOB_MAX_INPUT_MB", "12"))
+JOB_TTL_DAYS = float(os.getenv("JOB_TTL_DAYS", "7"))
+
+CLAIM_ORDER = [("priority", pymongo.DESCENDING), ("user_seq", pymongo.ASCENDING), ("created_at", pymongo.ASCENDING)]
+ACTIVE_STATUSES = ["queued", "running"]
+
+
+class JobQueueError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class JobDeferred(Exception):
+    """Raised by a job runner when the work cannot start yet; the job is requeued, not failed."""
+
+    def __init__(self, retry_after):
+        super().__init__("Job deferred")
+        self.retry_after = retry_after
+
+
+class JobInterrupted(Exception):
+    """Raised by a job runner when the run was cut short (e.g. the worker crashed); it counts as an attempt."""
+
+    def __init__(self, detail, retry_after):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+
+def job_input_hash(resume_bytes, resume_ext, job_description=None, jd_bytes=None, jd_ext=None):
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(resume_bytes).digest())
+    digest.update(f"\0{resume_ext}\0".encode("utf-8"))
+    if jd_bytes is not None:
+        digest.update(hashlib.sha256(jd_bytes).digest())
+        digest.update(f"\0{jd_ext}".encode("utf-8"))
+    else:
+        digest.update((job_description or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+class JobQueue:
+    """Analysis jobs persisted in MongoDB and worked off by every web process.
+
+    Workers claim the best queued job atomically: higher user priority first,
+    then the user's earliest outstanding job, so one user's burst cannot starve
+    everyone else. A claimed job holds a lease its worker keeps renewing; a job
+    whose lease runs out (its process died) goes to the next worker, up to
+    JOB_MAX_ATTEMPTS claims.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stats = {"enqueued": 0, "deduplicated": 0, "completed": 0, "failed": 0,
+                      "deferred": 0, "interrupted": 0, "recovered": 0, "running": 0}
+        self._runner = None
+        self._tasks = []
+        self._wakeup = None
+        self._indexed = False
+
+    async def _collection(self):
+        from .mongodb import async_analysis_jobs_collection
+        collection = async_analysis_jobs_collection()
+        if not self._indexed:
+            await collection.create_index([("status", 1), ("priority", -1), ("user_seq", 1), ("created_at", 1)])
+            await collection.create_index([("user_id", 1), ("input_hash", 1)])
+            await collection.create_index("active_key", unique=True, sparse=True)
+            await collection.create_index("finished_at", expireAfterSeconds=int(JOB_TTL_DAYS * 86400))
+            self._indexed = True
+        return collection
+
+    async def _user_priority(self, user_id):
+        from .mongodb import async_users_collection
+        user = await async_users_collection().find_one({"user_id": user_id}, {"job_priority": 1})
+        return int((user or {}).get("job_priority", 0))
+
+    async def enqueue(self, user_id, resume_bytes, resume_ext, job_description=None, jd_bytes=None, jd_ext=None):
+        """Stores a job, or returns the live or recently finished job with identical inputs."""
+        size = len(resume_bytes) + len(jd_bytes or b"") + len((job_description or "").encode("utf-8"))
+        if size > JOB_MAX_INPUT_MB * 1024 * 1024:
+            raise JobQueueError(413, f"Job inputs may not exceed {JOB_MAX_INPUT_MB} MB")
+        input_hash = job_input_hash(resume_bytes, resume_ext, job_description, jd_bytes, jd_ext)
+        collection = await self._collection()
+
+        existing = await self._find_duplicate(user_id, input_hash)
+        if existing is not None:
+            self.stats["deduplicated"] += 1
+            return existing, True
+
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "status": "queued",
+            "input_hash": input_hash,
+            # Only set while queued or running; its unique index stops concurrent duplicates
+            "active_key": f"{user_id}:{input_hash}",
+            "priority": await self._user_priority(user_id),
+            "user_seq": await collection.count_documents({"user_id": user_id, "status": {"$in": ACTIVE_STATUSES}}),
+            "inputs": {
+                "resume_bytes": resume_bytes,
+                "resume_ext": resume_ext,
+                "job_description": job_description,
+                "jd_bytes": jd_bytes,
+                "jd_ext": jd_ext
+            },
+            "attempts": 0,
+            "not_before": now,
+            "created_at": now
+        }
+        try:
+            await collection.insert_one(job)
+        except pymongo.errors.DuplicateKeyError:
+            existing = await self._find_duplicate(user_id, input_hash)
+            if existing is not None:
+                self.stats["deduplicated"] += 1
+                return existing, True
+            raise
+        self.stats["enqueued"] += 1
+        return job, False
+
+    async def _find_duplicate(self, user_id, input_hash):
+        collection = await self._collection()
+        return await collection.find_one(
+            {"user_id": user_id, "input_hash": input_hash, "$or": [
+                {"status": {"$in": ACTIVE_STATUSES}},
+                {"status": "done", "finished_at": {"$gte": datetime.utcnow() - timedelta(seconds=JOB_DEDUP_SECONDS)}}
+            ]},
+            {"inputs": 0},
+            sort=[("created_at", pymongo.DESCENDING)]
+        )
+
+    async def get(self, job_id, user_id):
+        collection = await self._collection()
+        return await collection.find_one({"_id": job_id, "user_id": user_id}, {"inputs": 0, "active_key": 0})
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        lease = {"$set": {"status": "running", "lease_owner": self.owner,
+                          "lease_expires_at": now + timedelta(seconds=self.lease_seconds), "started_at": now},
+                 "$inc": {"attempts": 1}}
+        collection = await self._collection()
+        job = await collection.find_one_and_update(
+            {"status": "queued", "not_before": {"$lte": now}}, lease,
+            sort=CLAIM_ORDER, return_document=pymongo.ReturnDocument.AFTER
+        )
+        if job is None:
+            # Crash recovery: the worker running this job stopped renewing its lease
+            job = await collection.find_one_and_update(
+                {"status": "running", "lease_expires_at": {"$lt": now}}, lease,
+                sort=CLAIM_ORDER, return_document=pymongo.ReturnDocument.AFTER
+            )
+            if job is not None:
+                self.stats["recovered"] += 1
+                print(f"Job queue recovery warning: job {job['_id']} lost its lease, retrying (attempt {job['attempts']})")
+        return job
+
+    async def _renew(self, job_id):
+        collection = await self._collection()
+        await collection.update_one(
+            {"_id": job_id, "lease_owner": self.owner},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+        )
+
+    async def _finish(self, job_id, status, result=None, error=None):
+        update = {"$set": {"status": status, "finished_at": datetime.utcnow(), "result": result, "error": error},
+                  "$unset": {"inputs": "", "active_key": "", "lease_owner": "", "lease_expires_at": ""}}
+        collection = await self._collection()
+        await collection.update_one({"_id": job_id, "lease_owner": self.owner}, update)
+
+    async def _requeue(self, job_id, delay=0, count_attempt=False):
+        # Deferred or handed back unfinished, the claim does not count as an attempt unless the run itself failed
+        update = {"$set": {"status": "queued", "not_before": datetime.utcnow() + timedelta(seconds=delay)},
+                  "$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        if not count_attempt:
+            update["$inc"] = {"attempts": -1}
+        collection = await self._collection()
+        await collection.update_one({"_id": job_id, "lease_owner": self.owner}, update)
+
+    async def _keep_lease(self, job_id):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._renew(job_id)
+            except Exception as e:
+                print(f"Job lease renewal warning: job {job_id}: {str(e)}")
+
+    async def _run_one(self, job):
+        if job["attempts"] > self.max_attempts:
+            await self._finish(job["_id"], "failed", error="Job was interrupted too many times")
+            self.stats["failed"] += 1
+            return
+
+        self.stats["running"] += 1
+        lease = asyncio.create_task(self._keep_lease(job["_id"]))
+        try:
+            result = await self._runner(job["inputs"], job["user_id"])
+        except JobDeferred as e:
+            self.stats["deferred"] += 1
+            await self._requeue(job["_id"], delay=e.retry_after)
+        except JobInterrupted as e:
+            # The input itself may be what crashed the worker, so it only gets max_attempts tries
+            print(f"Analysis job warning: job {job['_id']} interrupted (attempt {job['attempts']}): {str(e)}")
+            if job["attempts"] >= self.max_attempts:
+                await self._finish(job["_id"], "failed", error=f"Job was interrupted too many times: {str(e)}")
+                self.stats["failed"] += 1
+            else:
+                self.stats["interrupted"] += 1
+                await self._requeue(job["_id"], delay=e.retry_after, count_attempt=True)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job straight back instead of waiting for the lease to run out
+            await asyncio.shield(self._requeue(job["_id"]))
+            raise
+        except Exception as e:
+            print(f"Analysis job warning: job {job['_id']} failed: {str(e)}")
+            await self._finish(job["_id"], "failed", error=str(e))
+            self.stats["failed"] += 1
+        else:
+            await self._finish(job["_id"], "done", result=result)
+            self.stats["completed"] += 1
+        finally:
+            lease.cancel()
+            self.stats["running"] -= 1
+
+    async def _work(self):
+        idle = JOB_POLL_SECONDS
+        while True:
+            try:
+                job = await self._claim()
+                idle = JOB_POLL_SECONDS
+                if job is not None:
+                    await self._run_one(job)
+                    continue
+            except Exception as e:
+                # MongoDB trouble while claiming or recording a job must not end the worker; a job
+                # whose result could not be stored keeps its lapsed lease and is recovered later
+                print(f"Job queue warning: {str(e)}")
+                idle = min(idle * 2, 30)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), idle)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def notify(self):
+        """Wakes an idle worker of this process right away instead of at its next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, runner):
+        """runner(inputs, user_id) is awaited per job and returns the result document."""
+        self._runner = runner
+        self._wakeup = asyncio.Event()
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats.update({"workers": len(self._tasks), "owner": self.owner})
+        return stats
+
+
+_job_queue = None
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
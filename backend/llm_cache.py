@@ -0,0 +1,146 @@
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from .llm_engine import LLM_TEMPERATURE, SYSTEM_PROMPT, build_llm_prompt
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "7"))
+# Shared persistent tier so repeats hit across workers, replicas and restarts
+LLM_CACHE_MONGO = os.getenv("LLM_CACHE_MONGO", "1") == "1"
+# The prompt builder truncates both inputs to this many characters
+LLM_INPUT_CHARS = 4000
+
+
+def _prompt_version():
+    # Fingerprint of the rendered template, so any prompt edit invalidates every cached response
+    template = build_llm_prompt("\0resume\0", "\0job_description\0")
+    return hashlib.sha256(f"{SYSTEM_PROMPT}\0{LLM_TEMPERATURE}\0{template}".encode("utf-8")).hexdigest()[:12]
+
+PROMPT_VERSION = _prompt_version()
+
+
+def llm_cache_key(resume_text, jd_text, model):
+    digest = hashlib.sha256()
+    for part in (resume_text[:LLM_INPUT_CHARS], jd_text[:LLM_INPUT_CHARS]):
+        digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+    return f"{digest.hexdigest()}-{model}-p{PROMPT_VERSION}"
+
+
+class LLMResponseCache:
+    """In-memory LRU in front of a MongoDB collection with a TTL index.
+
+    The handler mutates the LLM response it gets back, so every read returns a deep copy.
+    """
+
+    def __init__(self, max_entries=LLM_CACHE_SIZE, ttl_seconds=LLM_CACHE_TTL_DAYS * 86400, use_mongo=LLM_CACHE_MONGO):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_mongo = use_mongo
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._mongo_indexed = False
+
+    async def _mongo_collection(self):
+        from .mongodb import async_llm_response_cache_collection
+        collection = async_llm_response_cache_collection()
+        if not self._mongo_indexed:
+            await collection.create_index("created_at", expireAfterSeconds=int(self.ttl_seconds))
+            self._mongo_indexed = True
+        return collection
+
+    def _remember(self, key, response, created_at):
+        with self._lock:
+            self._entries[key] = (response, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and datetime.utcnow() - entry[1] > timedelta(seconds=self.ttl_seconds):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+        return entry[0] if entry is not None else None
+
+    async def _get_mongo(self, key):
+        try:
+            collection = await self._mongo_collection()
+            doc = await collection.find_one_and_update(
+                {"_id": key, "created_at": {"$gte": datetime.utcnow() - timedelta(seconds=self.ttl_seconds)}},
+                {"$inc": {"hits": 1}, "$set": {"last_used_at": datetime.utcnow()}},
+                projection={"response": 1, "created_at": 1}
+            )
+        except Exception as e:
+            print(f"LLM cache MongoDB read warning: {str(e)}")
+            return None
+        if not doc:
+            return None
+        self._remember(key, doc["response"], doc["created_at"])
+        with self._lock:
+            self.stats["mongo_hits"] += 1
+        return doc["response"]
+
+    async def _put_mongo(self, key, response, model, created_at):
+        try:
+            collection = await self._mongo_collection()
+            await collection.replace_one(
+                {"_id": key},
+                {"_id": key, "response": response, "model": model, "prompt_version": PROMPT_VERSION,
+                 "created_at": created_at, "hits": 0},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"LLM cache MongoDB write warning: {str(e)}")
+
+    async def get(self, key):
+        response = self._get_memory(key)
+        if response is None and self.use_mongo:
+            response = await self._get_mongo(key)
+        if response is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        return copy.deepcopy(response)
+
+    async def put(self, key, response, model):
+        response = copy.deepcopy(response)
+        created_at = datetime.utcnow()
+        self._remember(key, response, created_at)
+        with self._lock:
+            self.stats["stores"] += 1
+        if self.use_mongo:
+            await self._put_mongo(key, response, model, created_at)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["mongo_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["mongo_hits"]) / lookups, 4) if lookups else 0.0
+        stats.update({
+            "enabled": LLM_CACHE_ENABLED,
+            "max_entries": self.max_entries,
+            "mongo_tier": self.use_mongo,
+            "prompt_version": PROMPT_VERSION
+        })
+        return stats
+
+
+_llm_cache = None
+
+def get_llm_cache():
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,257 @@
+import asyncio
+import copy
+import json
+import os
+import random
+import time
+
+import httpx
+
+from .llm_engine import LLM_MODEL, LLM_TEMPERATURE, build_llm_messages
+from .llm_cache import LLM_CACHE_ENABLED, get_llm_cache, llm_cache_key
+
+# Any OpenAI-compatible chat completions endpoint; point it at a local stub for testing
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# How long a request waits for one of those slots before skipping the LLM
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "2"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+# Budget for one analysis including retries; the static comparison is used once it runs out
+LLM_TOTAL_TIMEOUT = float(os.getenv("LLM_TOTAL_TIMEOUT", "45"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "10"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failed calls, then lets one trial call through per cooldown."""
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, cooldown=LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        # A failed trial reopens the breaker; calls already in flight when it opened change nothing
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.threshold):
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        self.trial_in_flight = False
+
+
+class LLMClient:
+    """Long-lived async client for the chat completions API.
+
+    One pooled keep-alive connection set per process, a semaphore capping
+    concurrent calls, per-attempt and overall timeouts, retries with full
+    jitter and a circuit breaker. `analyze` never raises: any failure returns
+    None and the caller keeps the static comparison.
+    """
+
+    def __init__(self, base_url=LLM_BASE_URL, api_key=None, model=LLM_MODEL,
+                 max_concurrency=LLM_MAX_CONCURRENCY, max_retries=LLM_MAX_RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key if api_key is not None else (os.getenv("LLM_API_KEY") or os.getenv("GROQ_API_KEY"))
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker()
+        self.stats = {"calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "timeouts": 0,
+                      "short_circuited": 0, "queue_full": 0, "invalid_responses": 0, "coalesced": 0}
+        self.in_flight = 0
+        self._client = None
+        self._semaphore = None
+        self._pending = {}
+
+    def _get_client(self):
+        # Created on first use so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _retry_delay(self, attempt, response=None):
+        delay = random.uniform(0, LLM_RETRY_BASE_DELAY * (2 ** attempt))
+        if response is not None and response.headers.get("retry-after"):
+            try:
+                delay = max(delay, float(response.headers["retry-after"]))
+            except ValueError:
+                pass
+        return delay
+
+    async def _post(self, payload, deadline):
+        client = self._get_client()
+        attempt = 0
+        while True:
+            response = None
+            error = None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMUnavailable("LLM time budget exhausted")
+            try:
+                response = await client.post("/chat/completions", json=payload, timeout=min(LLM_READ_TIMEOUT, remaining))
+                if response.status_code == 200:
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise LLMUnavailable(error)
+            except httpx.TimeoutException as e:
+                self.stats["timeouts"] += 1
+                error = f"timeout: {e.__class__.__name__}"
+            except httpx.TransportError as e:
+                error = f"transport: {e.__class__.__name__}"
+
+            delay = self._retry_delay(attempt, response)
+            if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                raise LLMUnavailable(error)
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def chat_json(self, messages, temperature=LLM_TEMPERATURE):
+        """One JSON-mode completion, parsed. Raises LLMUnavailable when the call cannot be made or fails."""
+        if not self.api_key:
+            raise LLMUnavailable("No LLM API key configured")
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            raise LLMUnavailable("LLM circuit breaker is open")
+        self._get_client()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), LLM_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.stats["queue_full"] += 1
+            # Never got to call the API, so this says nothing about its health
+            self.breaker.trial_in_flight = False
+            raise LLMUnavailable("Too many concurrent LLM calls")
+
+        self.stats["calls"] += 1
+        self.in_flight += 1
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": {"type": "json_object"}
+        }
+        try:
+            body = await self._post(payload, time.monotonic() + LLM_TOTAL_TIMEOUT)
+        except asyncio.CancelledError:
+            # Client went away mid-call; free the half-open trial slot without judging the API
+            self.breaker.trial_in_flight = False
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+        self.breaker.record_success()
+
+        try:
+            result = json.loads(body["choices"][0]["message"]["content"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            self.stats["invalid_responses"] += 1
+            raise LLMUnavailable("LLM returned an invalid response")
+        self.stats["succeeded"] += 1
+        return result
+
+    async def _analyze_uncached(self, resume_text, jd_text):
+        try:
+            return await self.chat_json(build_llm_messages(resume_text, jd_text))
+        except LLMUnavailable as e:
+            print(f"LLM skipped: {str(e)}")
+        except Exception as e:
+            print(f"LLM Error: {str(e)}")
+        return None
+
+    async def _analyze_and_store(self, key, resume_text, jd_text):
+        result = await self._analyze_uncached(resume_text, jd_text)
+        if result is not None:
+            await get_llm_cache().put(key, result, self.model)
+        return result
+
+    async def analyze(self, resume_text, jd_text):
+        """LLM analysis of a resume/JD pair, cached and shared between identical concurrent requests."""
+        if not LLM_CACHE_ENABLED:
+            return await self._analyze_uncached(resume_text, jd_text)
+        key = llm_cache_key(resume_text, jd_text, self.model)
+        cached = await get_llm_cache().get(key)
+        if cached is not None:
+            return cached
+
+        # A re-submit while the first completion is still running waits for it instead of paying again
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._analyze_and_store(key, resume_text, jd_text))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        result = await asyncio.shield(pending)
+        return copy.deepcopy(result)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats.update({
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "base_url": self.base_url,
+            "model": self.model
+        })
+        return stats
+
+
+_llm_client = None
+
+def get_llm_client():
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient()
+    return _llm_client
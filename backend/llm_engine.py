@@ -1,20 +1,14 @@
 import os
-import json
-from groq import Groq
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def analyze_with_llm(resume_text, jd_text):
-    api_key = os.environ.get("GROQ_API_KEY")
-    if not api_key:
-        print("WARNING: GROQ_API_KEY not found in environment!")
-        return None
-        
-    try:
-        client = Groq(api_key=api_key)
-        
-        prompt = f"""
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_TEMPERATURE = 0.2
+SYSTEM_PROMPT = "You are a JSON API. You MUST return valid JSON matching the exact schema provided. Do not include any tags or conversational text."
+
+def build_llm_prompt(resume_text, jd_text):
+    return f"""
         You are an advanced Applicant Tracking System. I will provide a Candidate's Resume and a Job Description.
         You must analyze them and extract all relevant technical, soft, and domain-specific skills, regardless of the industry (Healthcare, Tech, Marketing, etc.).
         
@@ -59,19 +53,9 @@ def analyze_with_llm(resume_text, jd_text):
         Job Description:
         {jd_text[:4000]}
         """
-        
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a JSON API. You MUST return valid JSON matching the exact schema provided. Do not include any tags or conversational text."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            response_format={"type": "json_object"}
-        )
-        
-        content = response.choices[0].message.content
-        return json.loads(content)
-    except Exception as e:
-        print(f"LLM Error: {str(e)}")
-        return None
+
+def build_llm_messages(resume_text, jd_text):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_llm_prompt(resume_text, jd_text)}
+    ]
@@ -1,35 +1,19 @@
-from fastapi import FastAPI, UploadFile, Form, File, HTTPException, Depends, BackgroundTasks
-from typing import Optional
+from fastapi import FastAPI, UploadFile, Form, File, HTTPException, Depends, BackgroundTasks, Query
+from typing import Optional, List
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from pydantic import BaseModel, EmailStr
-import pdfplumber
-import docx
-
-def set_pytesseract_path():
-    import pytesseract
-    import platform
-    if platform.system() == 'Windows':
-        pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
 import uuid
 import json
-import io
-import re
 import os
-import gc
-import platform
 import asyncio
+import time
 import warnings
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import secrets
 import socket
 import requests
-from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 
 # Monkey patch socket to force IPv4, as HF spaces block IPv6 SMTP heavily causing Network is unreachable
 _orig_getaddrinfo = socket.getaddrinfo
@@ -37,23 +21,25 @@ def _ipv4_getaddrinfo(*args, **kwargs):
     responses = _orig_getaddrinfo(*args, **kwargs)
     return [res for res in responses if res[0] == socket.AF_INET]
 socket.getaddrinfo = _ipv4_getaddrinfo
-import pytesseract
-try:
-    import fitz # PyMuPDF
-except ImportError:
-    fitz = None
-
-from .nlp_engine import clean_text, extract_skills, extract_keywords, parse_resume_structured, parse_jd_structured
-from .nlp_preprocessing import preprocess_text, extract_skills_hybrid, extract_keywords_hybrid, generate_tfidf_vectors
+
+from .analysis_engine import get_analysis_engine
+from .worker_pool import get_analysis_pool, PoolSaturated, PoolUnavailable
+from .batch_screening import BatchError, read_batch_uploads, expand_uploads, encode_event, stream_batch
+from .jd_matching import get_jd_index, MATCH_MAX_TOP_K
+from .skill_registry import get_skill_registry
+from .llm_client import get_llm_client
+from .llm_cache import get_llm_cache
+from .job_queue import get_job_queue, JobQueueError, JobDeferred, JobInterrupted
+from . import analytics_rollups
 from .auth import hash_password, verify_password, create_access_token, verify_token
-from .comparison_engine import compare_profiles
-from .suggestion_engine import generate_skill_suggestions, get_skill_explanation
-from .admin import (
-    get_analytics_summary, get_top_missing_skills, get_top_job_roles,
-    get_skill_category_distribution, get_recommendation_distribution,
-    get_recent_analyses, validate_admin_role
+from .admin import validate_admin_role_async
+from .admin_analytics import get_admin_analytics_payload, get_user_activity_page
+from .admin_pipelines import ensure_indexes as ensure_admin_indexes, USER_ACTIVITY_SORT_FIELDS
+from .mongodb import submissions_collection, analysis_results_collection, test_connection, async_health_check, get_pool_stats
+from .mongodb import (
+    async_users_collection, async_submissions_collection, async_resumes_collection, async_job_descriptions_collection,
+    async_analysis_results_collection, async_otp_collection, async_batch_screenings_collection
 )
-from .mongodb import users_collection, submissions_collection, resumes_collection, job_descriptions_collection, analysis_results_collection, test_connection, quick_health_check, otp_collection
 
 # Database collection getters are imported from .mongodb
 
@@ -78,6 +64,20 @@ async def startup_event():
     global app_ready
     # Run DB test asynchronously without blocking startup
     asyncio.create_task(async_db_test())
+    pool = get_analysis_pool()
+    pool.start()
+    if not pool.uses_processes:
+        asyncio.create_task(async_warm_engine())
+    get_job_queue().start(run_analysis_job)
+    get_jd_index().start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await get_job_queue().stop()
+    await get_jd_index().stop()
+    await analytics_rollups.stop_catch_up()
+    get_analysis_pool().shutdown()
+    await get_llm_client().aclose()
 
 async def async_db_test():
     global app_ready
@@ -87,10 +87,22 @@ async def async_db_test():
         # Run blocking DB test in thread pool
         result = await loop.run_in_executor(None, test_connection)
         app_ready = result
+        if result:
+            await loop.run_in_executor(None, ensure_admin_indexes, analysis_results_collection(), submissions_collection())
+            # Rolls up analyses stored before the daily buckets existed or whose live increment failed
+            analytics_rollups.start_catch_up(analysis_results_collection(), submissions_collection())
     except Exception as e:
         print(f"Startup DB test failed: {e}")
         app_ready = False
 
+async def async_warm_engine():
+    try:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, get_analysis_engine().warm_up)
+        print("Analysis engine warmed")
+    except Exception as e:
+        print(f"Analysis engine warm-up failed: {e}")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -99,6 +111,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+SUBMISSION_LIST_PROJECTION = {
+    "submission_id": 1, "resume_text": 1, "job_description_text": 1,
+    "parsed_resume_fields": 1, "parsed_jd_fields": 1, "created_at": 1
+}
+
 class RegisterRequest(BaseModel):
     email: EmailStr
     password: str
@@ -225,16 +242,17 @@ def send_welcome_email(to_email: str, user_name: str):
         print(f"Failed to send welcome email: {e}")
 
 @app.post("/auth/register")
-def register(req: RegisterRequest, background_tasks: BackgroundTasks):
+async def register(req: RegisterRequest, background_tasks: BackgroundTasks):
     try:
-        existing = users_collection().find_one({"email": req.email})
+        existing = await async_users_collection().find_one({"email": req.email})
         if existing:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         if len(req.password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
         
-        hashed = hash_password(req.password)
+        # bcrypt is deliberately slow; keep it off the event loop
+        hashed = await asyncio.get_running_loop().run_in_executor(None, hash_password, req.password)
         
         # Generate 6-digit OTP
         otp_code = "".join([str(secrets.randbelow(10)) for _ in range(6)])
@@ -251,7 +269,7 @@ def register(req: RegisterRequest, background_tasks: BackgroundTasks):
         
 
         
-        otp_collection().update_one(
+        await async_otp_collection().update_one(
             {"email": req.email},
             {"$set": otp_doc},
             upsert=True
@@ -271,9 +289,9 @@ def register(req: RegisterRequest, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=503, detail=f"Database connection error: {str(e)}")
 
 @app.post("/auth/verify-otp")
-def verify_otp(req: VerifyOTPRequest, background_tasks: BackgroundTasks):
+async def verify_otp(req: VerifyOTPRequest, background_tasks: BackgroundTasks):
     try:
-        otp_record = otp_collection().find_one({"email": req.email})
+        otp_record = await async_otp_collection().find_one({"email": req.email})
         
         if not otp_record:
             raise HTTPException(status_code=400, detail="No pending registration found for this email")
@@ -288,14 +306,14 @@ def verify_otp(req: VerifyOTPRequest, background_tasks: BackgroundTasks):
             raise HTTPException(status_code=400, detail="Invalid OTP")
             
         # OTP is valid, mark as verified and create user
-        otp_collection().update_one({"email": req.email}, {"$set": {"verified": True}})
+        await async_otp_collection().update_one({"email": req.email}, {"$set": {"verified": True}})
         
         # Check if user somehow was created
-        existing = users_collection().find_one({"email": req.email})
+        existing = await async_users_collection().find_one({"email": req.email})
         if existing:
             raise HTTPException(status_code=400, detail="User already exists")
             
-        user_count = users_collection().count_documents({})
+        user_count = await async_users_collection().count_documents({})
         user_id = user_count + 1
         
         user_doc = {
@@ -304,10 +322,10 @@ def verify_otp(req: VerifyOTPRequest, background_tasks: BackgroundTasks):
             "password_hash": otp_record["password_hash"],
             "created_at": datetime.utcnow()
         }
-        users_collection().insert_one(user_doc)
+        await async_users_collection().insert_one(user_doc)
         
         # Clean up OTP record
-        otp_collection().delete_one({"email": req.email})
+        await async_otp_collection().delete_one({"email": req.email})
         
         # Generate token
         token = create_access_token({"user_id": user_id, "email": req.email})
@@ -325,9 +343,9 @@ def verify_otp(req: VerifyOTPRequest, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=503, detail=f"Database error: {str(e)}")
 
 @app.post("/auth/resend-otp")
-def resend_otp(req: ResendOTPRequest, background_tasks: BackgroundTasks):
+async def resend_otp(req: ResendOTPRequest, background_tasks: BackgroundTasks):
     try:
-        otp_record = otp_collection().find_one({"email": req.email})
+        otp_record = await async_otp_collection().find_one({"email": req.email})
         if not otp_record:
             raise HTTPException(status_code=400, detail="No pending signup found")
             
@@ -337,7 +355,7 @@ def resend_otp(req: ResendOTPRequest, background_tasks: BackgroundTasks):
             
         otp_code = "".join([str(secrets.randbelow(10)) for _ in range(6)])
         
-        otp_collection().update_one(
+        await async_otp_collection().update_one(
             {"email": req.email},
             {"$set": {
                 "otp": otp_code,
@@ -355,13 +373,14 @@ def resend_otp(req: ResendOTPRequest, background_tasks: BackgroundTasks):
 
 
 @app.post("/auth/login")
-def login(req: LoginRequest):
+async def login(req: LoginRequest):
     try:
-        user = users_collection().find_one({"email": req.email})
+        user = await async_users_collection().find_one({"email": req.email})
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        if not verify_password(req.password, user["password_hash"]):
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, verify_password, req.password, user["password_hash"]):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         token = create_access_token({"user_id": user["user_id"], "email": user["email"]})
@@ -383,9 +402,9 @@ def login(req: LoginRequest):
 
 
 @app.get("/auth/me")
-def get_current_user(user_id: int = Depends(verify_token)):
+async def get_current_user(user_id: int = Depends(verify_token)):
     try:
-        user = users_collection().find_one({"user_id": user_id})
+        user = await async_users_collection().find_one({"user_id": user_id})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -400,9 +419,11 @@ def get_current_user(user_id: int = Depends(verify_token)):
         raise HTTPException(status_code=503, detail=f"Database connection error: {str(e)}")
 
 @app.get("/submissions")
-def get_submissions(user_id: int = Depends(verify_token)):
+async def get_submissions(user_id: int = Depends(verify_token)):
     try:
-        submissions = list(submissions_collection().find({"user_id": user_id}).sort("created_at", -1))
+        # Only the fields the listing shows; tokens, clean texts and skill lists stay on the server
+        cursor = async_submissions_collection().find({"user_id": user_id}, SUBMISSION_LIST_PROJECTION).sort("created_at", -1)
+        submissions = await cursor.to_list(length=None)
         
         result = []
         for sub in submissions:
@@ -432,631 +453,633 @@ def get_submissions(user_id: int = Depends(verify_token)):
     except pymongo.errors.PyMongoError as e:
         raise HTTPException(status_code=503, detail=f"Database connection error: {str(e)}")
 
-def preprocess_image_for_ocr(image):
-    if image.mode != 'L':
-        image = image.convert('L')
-    
-    width, height = image.size
-    if width < 1500:
-        scale = 1500 / width
-        new_width = int(width * scale)
-        new_height = int(height * scale)
-        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-    
-    import numpy as np
-    img_array = np.array(image)
-    
+async def run_llm_stage(engine, raw, jd_text):
+    # Pooled async client: bounded concurrency and time budget, None means keep the static comparison
+    start = time.perf_counter()
     try:
-        import cv2
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        img_array = clahe.apply(img_array)
-        
-        img_array = cv2.fastNlMeansDenoising(img_array, None, 10, 7, 21)
-        
-        img_array = cv2.adaptiveThreshold(
-            img_array, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
+        return await get_llm_client().analyze(raw, jd_text)
+    finally:
+        engine.record_stage("llm", (time.perf_counter() - start) * 1000)
+
+def analysis_unavailable(pool, e):
+    if isinstance(e, PoolSaturated):
+        return HTTPException(
+            status_code=503,
+            detail="Analysis service is busy, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
         )
-        
-        image = Image.fromarray(img_array)
-    except ImportError:
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(2.5)
-        
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(2.0)
-        
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(1.2)
-        
-        from PIL import ImageOps
-        image = ImageOps.autocontrast(image, cutoff=2)
-        
-        image = image.filter(ImageFilter.MedianFilter(size=3))
-    
-    return image
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(pool.retry_after)})
 
-def is_text_quality_good(text):
-    if not text or len(text) < 50:
-        return False
-    
-    total_chars = len(text)
-    alpha_chars = sum(c.isalpha() or c.isspace() for c in text)
-    alpha_ratio = alpha_chars / total_chars if total_chars > 0 else 0
-    
-    if alpha_ratio < 0.7:
-        return False
-    
-    words = text.split()
-    if len(words) < 10:
-        return False
-    
-    avg_word_length = sum(len(w) for w in words) / len(words) if words else 0
-    if avg_word_length < 3 or avg_word_length > 15:
-        return False
-    
-    garbled_patterns = [
-        r'[a-z]{15,}',
-        r'\b[bcdfghjklmnpqrstvwxyz]{5,}\b',
-        r'[wxy]{3,}',
-        r'\b[a-z]{2,3}[wxy]{2,}[a-z]{2,3}\b',
-    ]
-    
-    garbled_count = 0
-    for pattern in garbled_patterns:
-        matches = re.findall(pattern, text.lower())
-        garbled_count += len(matches)
-    
-    if len(words) > 0 and garbled_count > len(words) * 0.15:
-        return False
-    
-    common_words = ['the', 'and', 'to', 'of', 'a', 'in', 'for', 'is', 'on', 'with', 'experience', 'skills', 'education', 'work', 'at', 'by', 'from', 'as', 'about', 'have', 'has', 'had', 'was', 'were', 'been', 'be', 'are', 'am']
-    common_word_count = sum(1 for word in words if word.lower() in common_words)
-    if len(words) > 30 and common_word_count < 3:
-        return False
-    
-    vowel_count = sum(1 for c in text.lower() if c in 'aeiou')
-    consonant_count = sum(1 for c in text.lower() if c.isalpha() and c not in 'aeiou')
-    if consonant_count > 0:
-        vowel_ratio = vowel_count / consonant_count
-        if vowel_ratio < 0.25 or vowel_ratio > 2.0:
-            return False
-    
-    return True
+def resume_profile_view(resume_structured):
+    return {
+        "candidate_name": resume_structured['candidate_name'],
+        "contact": {
+            "email": resume_structured['email'],
+            "phone": resume_structured['phone'],
+            "location": resume_structured['location']
+        },
+        "technical_expertise": {
+            "skills": resume_structured['technical_skills'],
+            "languages": resume_structured['programming_languages'],
+            "frameworks": resume_structured['frameworks'],
+            "tools": resume_structured['tools'],
+            "databases": resume_structured['databases']
+        },
+        "soft_skills": resume_structured['soft_skills'],
+        "education": {
+            "degrees": resume_structured['education_degrees'],
+            "fields": resume_structured['education_fields'],
+            "institutions": resume_structured['education_institutions'],
+            "entries": resume_structured.get('education_entries', [])
+        },
+        "experience": {
+            "roles": resume_structured['experience_roles'],
+            "companies": resume_structured['experience_companies'],
+            "date_ranges": resume_structured['experience_date_ranges'],
+            "years_estimated": resume_structured['experience_years_estimated'],
+            "entries": resume_structured.get('experience_entries', [])
+        },
+        "projects": {
+            "titles": resume_structured['project_titles'],
+            "technologies": resume_structured['project_technologies']
+        },
+        "certifications": resume_structured['certifications']
+    }
 
-def read_pdf(file):
-    text = ""
-    file_bytes = file.read()
-    file.seek(0)
-    
-    try:
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t:
-                    text += t + " "
-    except Exception:
-        pass
-    
-    if is_text_quality_good(text):
-        return text
-    
-    print(f"PDF text quality check failed. Extracted text length: {len(text)}")
-    print(f"Sample text: {text[:200] if text else 'No text'}")
-    
+def job_profile_view(jd_structured):
+    return {
+        "role": jd_structured['job_role'],
+        "required_technical": {
+            "skills": jd_structured['required_skills'],
+            "languages": jd_structured['required_languages'],
+            "frameworks": jd_structured['required_frameworks'],
+            "tools": jd_structured['required_tools'],
+            "databases": jd_structured['required_databases']
+        },
+        "requirements": {
+            "experience_years": jd_structured['required_experience_years'],
+            "education": jd_structured['required_education']
+        },
+        "additional": {
+            "nice_to_have": jd_structured['nice_to_have_skills'],
+            "responsibility_terms": jd_structured['responsibility_tech_terms']
+        }
+    }
+
+async def read_uploads(resume, jd_file):
+    resume_ext = resume.filename.split(".")[-1].lower()
+    resume_bytes = await resume.read()
+    jd_ext = jd_bytes = None
+    if jd_file:
+        jd_ext = jd_file.filename.split(".")[-1].lower()
+        jd_bytes = await jd_file.read()
+    return resume_bytes, resume_ext, jd_bytes, jd_ext
+
+async def start_analysis(engine, resume_bytes, resume_ext, job_description=None, jd_bytes=None, jd_ext=None):
+    """Stages 1 and 4 (text extraction) in the analysis pool, then starts the LLM on the raw texts."""
+    pool = get_analysis_pool()
     try:
-        if not fitz:
-            raise ImportError("PyMuPDF (fitz) not installed")
-        
-        pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
-        ocr_text = ""
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document[page_num]
-            
-            mat = fitz.Matrix(2.0, 2.0)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            
-            img_bytes = pix.tobytes("png")
-            img = Image.open(io.BytesIO(img_bytes))
-            
-            processed_img = preprocess_image_for_ocr(img)
-            
-            page_text = pytesseract.image_to_string(
-                processed_img,
-                lang='eng',
-                config='--psm 6 --oem 3 -c preserve_interword_spaces=1'
-            )
-            ocr_text += page_text + " "
-        
-        pdf_document.close()
-        
-        print(f"OCR text length: {len(ocr_text)}")
-        print(f"OCR sample: {ocr_text[:200] if ocr_text else 'No OCR text'}")
-        
-        ocr_quality_ok = is_text_quality_good(ocr_text)
-        original_quality_ok = is_text_quality_good(text)
-        
-        if not ocr_quality_ok and not original_quality_ok:
-            raise Exception(
-                "Unable to extract readable text from PDF. This may be due to:\n"
-                "1. Poor scan quality (try rescanning at higher resolution)\n"
-                "2. Image-based PDF without proper text layer\n"
-                "3. Unusual fonts or encoding\n"
-                "Please provide a text-based PDF or higher quality scan."
-            )
-        
-        if ocr_quality_ok and not original_quality_ok:
-            return ocr_text
-        elif original_quality_ok and not ocr_quality_ok:
-            return text
-        elif ocr_quality_ok and original_quality_ok:
-            return ocr_text if len(ocr_text) > len(text) else text
-        elif len(ocr_text) > len(text) and len(ocr_text) > 100:
-            print("⚠️ WARNING: OCR text quality is poor but using it anyway (better than extracted text)")
-            return ocr_text
-        else:
-            print("⚠️ WARNING: Using extracted text despite poor quality")
-            return text if text else ocr_text
-    except ImportError as e:
-        print(f"PyMuPDF import error: {e}")
-        if text:
-            return text
-        raise Exception("PyMuPDF not installed. Please install: pip install PyMuPDF")
-    except Exception as e:
-        print(f"OCR error: {str(e)}")
-        if text:
-            return text
-        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+        extracted = await pool.extract_documents(
+            resume_bytes, resume_ext,
+            jd_text=job_description, jd_bytes=jd_bytes, jd_ext=jd_ext
+        )
+    except (PoolSaturated, PoolUnavailable) as e:
+        raise analysis_unavailable(pool, e) from e
 
-def read_docx(file):
-    d = docx.Document(file)
-    return " ".join([p.text for p in d.paragraphs])
+    # Stage 14.5 starts here and overlaps with stages 2-14; its result is merged after stage 14
+    llm_task = asyncio.create_task(run_llm_stage(engine, extracted['raw'], extracted['jd_text']))
+    return extracted, llm_task
 
-def read_txt(file):
-    return file.read().decode('utf-8', errors='ignore')
+async def analysis_events(engine, extracted, llm_task, user_id):
+    """Stages 2-16 of /analyze as events, each yielded as soon as its stage finishes.
 
-def read_image(file):
-    img = Image.open(file)
-    img = preprocess_image_for_ocr(img)
-    text = pytesseract.image_to_string(img, config='--psm 6 --oem 3')
-    return text
+    The last event is {"type": "result"} carrying the full /analyze response.
+    """
+    try:
+        yield {
+            "type": "extracted",
+            "resume_text": extracted['raw'],
+            "job_description_text": extracted['jd_text'],
+            "extraction_metadata": extracted['extraction_metadata']
+        }
 
+        # Stages 2-9 (parsing, preprocessing, skill extraction, TF-IDF)
+        pool = get_analysis_pool()
+        try:
+            documents = await pool.analyze_texts(extracted['raw'], extracted['jd_text'], extracted['extraction_metadata'])
+        except (PoolSaturated, PoolUnavailable) as e:
+            raise analysis_unavailable(pool, e) from e
+
+        raw = documents['raw']
+        jd_text = documents['jd_text']
+        cleaned_resume = documents['cleaned_resume']
+        cleaned_jd = documents['cleaned_jd']
+        resume_structured = documents['resume_structured']
+        jd_structured = documents['jd_structured']
+        resume_preprocessed = documents['resume_preprocessed']
+        jd_preprocessed = documents['jd_preprocessed']
+        resume_skills_extracted = documents['resume_skills_extracted']
+        jd_skills_extracted = documents['jd_skills_extracted']
+        tfidf_data = documents['tfidf_data']
+        extraction_metadata = documents['extraction_metadata']
+        jd_hash = documents['jd_hash']
+
+        rid = str(uuid.uuid4())[:8]
+
+        # Stage 10: DB Submission
+        try:
+            submission_count = await async_submissions_collection().count_documents({})
+            submission_id = submission_count + 1
+            submission_doc = {
+                "submission_id": submission_id,
+                "user_id": user_id,
+                "resume_text": raw,
+                "parsed_resume_fields": resume_structured,
+                "job_description_text": jd_text,
+                "parsed_jd_fields": jd_structured,
+                "resume_clean_text": resume_preprocessed['reconstructed_clean_text'],
+                "resume_tokens": resume_preprocessed['clean_tokens'][:100],
+                "resume_skills": resume_skills_extracted,
+                "jd_clean_text": jd_preprocessed['reconstructed_clean_text'],
+                "jd_tokens": jd_preprocessed['clean_tokens'][:100],
+                "jd_skills": jd_skills_extracted,
+                "created_at": datetime.utcnow(),
+                "rolled_up": False
+            }
+            await async_submissions_collection().insert_one(submission_doc)
+            await analytics_rollups.record_submission(submission_doc, async_submissions_collection())
+        except Exception as e:
+            print(f"MongoDB insertion warning: {str(e)}")
+
+        # Stages 11-12: Skill/Keyword Cleaning and Profile Construction
+        all_resume_skills, all_jd_keywords, resume_profile_obj, job_profile_obj = engine.build_profiles(
+            resume_structured, jd_structured, resume_skills_extracted, jd_skills_extracted
+        )
+        yield {
+            "type": "resume_profile",
+            "cleaned_resume_text": cleaned_resume,
+            "resume_skills_extracted": resume_skills_extracted,
+            "resume_skills": all_resume_skills,
+            "resume_profile": resume_profile_view(resume_structured)
+        }
+        yield {
+            "type": "job_profile",
+            "cleaned_job_description_text": cleaned_jd,
+            "jd_skills_extracted": jd_skills_extracted,
+            "job_keywords": all_jd_keywords,
+            "job_profile": job_profile_view(jd_structured)
+        }
 
+        # Stages 13-14 are CPU-bound; run them on the default executor so the event loop keeps serving
+        loop = asyncio.get_running_loop()
 
-# Global runtime cache for NLP/ML objects
-_nlp_cache = {}
+        # Stage 13: Profile Comparison
+        comparison_result = await loop.run_in_executor(
+            None,
+            lambda: engine.run_stage("comparison", engine.compare_profiles, resume_profile_obj, job_profile_obj)
+        )
+        yield {"type": "comparison", "comparison": comparison_result}
+
+        # Stage 14: Skill Suggestions
+        all_jd_skills = (
+            jd_structured['required_skills'] + 
+            jd_structured['required_frameworks'] + 
+            jd_structured['required_tools'] + 
+            jd_structured['required_languages'] +
+            jd_structured['required_databases']
+        )
+        skill_suggestions = await loop.run_in_executor(
+            None,
+            lambda: engine.run_stage(
+                "suggestions",
+                engine.generate_skill_suggestions,
+                jd_skills=all_jd_skills,
+                resume_skills=all_resume_skills,
+                job_role=jd_structured['job_role'],
+                jd_text=jd_text,
+                missing_skills=comparison_result['missing_skills']
+            )
+        )
+        yield {"type": "suggestions", "skill_suggestions": skill_suggestions}
+
+        # Stage 14.5: Universal LLM Override
+        # This completely overrides the static Tech dictionaries with an Advanced Generalistic Output
+        llm_data = None
+        try:
+            # Started right after extraction; only the part not hidden behind the local stages is waited for here
+            wait_start = time.perf_counter()
+            llm_data = await llm_task
+            engine.record_stage("llm_wait", (time.perf_counter() - wait_start) * 1000)
+            if llm_data:
+                # Inject Universal Variables
+                original_comp = comparison_result
+                comparison_result = llm_data['comparison']
+                comparison_result['match_percentage'] = float(comparison_result.get('match_percentage', 0))
+                
+                # Preserve exact criteria match booleans from static parser
+                comparison_result['experience_match'] = original_comp.get('experience_match', False)
+                comparison_result['experience_gap'] = original_comp.get('experience_gap', False)
+                comparison_result['education_match'] = original_comp.get('education_match', False)
+                
+                # Populate Fallback Skills just in case the LLM returned empty arrays
+                if not llm_data.get('skill_suggestions', {}).get('suggested_skills'):
+                     llm_data['skill_suggestions'] = skill_suggestions 
+                else:
+                     skill_suggestions = llm_data['skill_suggestions']
+                     
+                # Overwrite structured job role for UI updates
+                if llm_data.get('job_role'):
+                     jd_structured['job_role'] = llm_data['job_role']
+                job_profile_obj['role'] = jd_structured['job_role']
+                
+                # Pass all universal skills down and overwrite UI structures to prevent old dictionary leaking
+                if llm_data.get('resume_skills'):
+                     all_resume_skills = llm_data['resume_skills']
+                     resume_structured['technical_skills'] = llm_data['resume_skills']
+                     resume_skills_extracted = llm_data['resume_skills']
+                     
+                if llm_data.get('job_skills'):
+                     all_jd_skills = llm_data['job_skills']
+                     jd_structured['required_skills'] = llm_data['job_skills']
+                     jd_skills_extracted = llm_data['job_skills']
+                     # Clear out old dictionary extracts to prevent 'ember' from leaking
+                     jd_structured['required_languages'] = []
+                     jd_structured['required_frameworks'] = []
+                     jd_structured['required_tools'] = []
+                     jd_structured['required_databases'] = []
+                     
+        except Exception as e:
+            print(f"Universal LLM Fallback Failed: {str(e)}")
+            pass
+        # Sent even when the static results stand, so a client knows nothing more will change
+        yield {
+            "type": "llm",
+            "applied": bool(llm_data),
+            "comparison": comparison_result,
+            "skill_suggestions": skill_suggestions,
+            "resume_skills_extracted": resume_skills_extracted,
+            "jd_skills_extracted": jd_skills_extracted,
+            "resume_profile": resume_profile_view(resume_structured),
+            "job_profile": job_profile_view(jd_structured)
+        }
+
+        # Stage 15: DB Insert for Analysis
+        try:
+            resume_doc = {
+                'resume_id': rid,
+                'user_id': user_id,
+                'profile': resume_profile_obj,
+                'raw_text': raw,
+                'created_at': datetime.utcnow()
+            }
+            await async_resumes_collection().insert_one(resume_doc)
+            jd_doc = {
+                'jd_id': rid,
+                'jd_hash': jd_hash,
+                'user_id': user_id,
+                'profile': job_profile_obj,
+                'raw_text': jd_text,
+                'created_at': datetime.utcnow()
+            }
+            await async_job_descriptions_collection().insert_one(jd_doc)
+            analysis_doc = {
+                'analysis_id': rid,
+                'user_id': user_id,
+                'resume_id': rid,
+                'jd_id': rid,
+                'comparison': comparison_result,
+                'match_percentage': comparison_result['match_percentage'],
+                'suggested_skills': skill_suggestions['suggested_skills'],
+                'missing_skills_explained': skill_suggestions['missing_skills_explained'],
+                'created_at': datetime.utcnow(),
+                'rolled_up': False
+            }
+            await async_analysis_results_collection().insert_one(analysis_doc)
+            await analytics_rollups.record_analysis(analysis_doc, async_analysis_results_collection())
+        except Exception as e:
+            print(f"MongoDB insertion warning: {str(e)}")
+
+        # Stage 16: Response Construction
+        dataset_size = 0
+        if 'submission_count' in locals():
+            dataset_size = await async_submissions_collection().count_documents({})
+        yield {"type": "result", "result": {
+            "resume_id": rid,
+            "cleaned_resume_text": cleaned_resume,
+            "cleaned_job_description_text": cleaned_jd,
+            "resume_preprocessed": {
+                "clean_text": resume_preprocessed['reconstructed_clean_text'],
+                "tokens": resume_preprocessed['clean_tokens'][:100],
+                "lemmatized_tokens": resume_preprocessed['lemmatized_tokens'][:100]
+            },
+            "jd_preprocessed": {
+                "clean_text": jd_preprocessed['reconstructed_clean_text'],
+                "tokens": jd_preprocessed['clean_tokens'][:100],
+                "lemmatized_tokens": jd_preprocessed['lemmatized_tokens'][:100]
+            },
+            "resume_skills_extracted": resume_skills_extracted,
+            "jd_skills_extracted": jd_skills_extracted,
+            "tfidf_vectors": {
+                "resume_vector_length": len(tfidf_data['resume_tfidf_vector']),
+                "jd_vector_length": len(tfidf_data['jd_tfidf_vector']),
+                "feature_count": len(tfidf_data['feature_names'])
+            },
+            "resume_profile": resume_profile_view(resume_structured),
+            "job_profile": job_profile_view(jd_structured),
+            "resume_skills": all_resume_skills,
+            "job_keywords": all_jd_keywords,
+            "comparison": comparison_result,
+            "skill_suggestions": skill_suggestions,
+            "dataset_size": dataset_size,
+            "extraction_metadata": extraction_metadata
+        }}
+    finally:
+        # Failed or abandoned (client disconnected) before stage 14.5; a shared LLM call still completes and is cached
+        if not llm_task.done():
+            llm_task.cancel()
+
+async def run_analysis_job(inputs, user_id):
+    """Job queue runner: the /analyze pipeline on stored inputs, returning the /analyze response."""
+    engine = get_analysis_engine()
+    try:
+        extracted, llm_task = await start_analysis(
+            engine, inputs["resume_bytes"], inputs["resume_ext"],
+            job_description=inputs.get("job_description"), jd_bytes=inputs.get("jd_bytes"), jd_ext=inputs.get("jd_ext")
+        )
+        async for event in analysis_events(engine, extracted, llm_task, user_id):
+            if event["type"] == "result":
+                return event["result"]
+    except HTTPException as e:
+        retry_after = int((e.headers or {}).get("Retry-After", 5))
+        # A worker crashed on this job: requeued, but as a counted attempt
+        if isinstance(e.__cause__, PoolUnavailable):
+            raise JobInterrupted(e.detail, retry_after)
+        # Pool busy: the job goes back in the queue rather than failing
+        if e.status_code == 503:
+            raise JobDeferred(retry_after)
+        raise Exception(e.detail)
+    finally:
+        engine.finish_request()
+
+def job_status(job):
+    status = {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "priority": job.get("priority", 0),
+        "attempts": job.get("attempts", 0),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at")
+    }
+    if job["status"] == "done":
+        status["result"] = job.get("result")
+    elif job["status"] == "failed":
+        status["error"] = job.get("error")
+    return status
 
 @app.post("/analyze")
 async def analyze(
+    background_tasks: BackgroundTasks,
     resume: UploadFile = File(...), 
     job_description: Optional[str] = Form(None), 
     jd_file: Optional[UploadFile] = File(None),
+    run_async: bool = Query(False, alias="async"),
     user_id: int = Depends(verify_token)
 ):
-    # Stage 1: Text Extraction
-    def extract_text(file, ext):
-        if ext == "pdf":
-            return read_pdf(file)
-        elif ext == "docx":
-            return read_docx(file)
-        else:
-            set_pytesseract_path()
-            return read_image(file)
-
-    ext = resume.filename.split(".")[-1].lower()
-    raw = extract_text(resume.file, ext)
-    del ext
-    gc.collect()
-
-    # Stage 2: Preprocessing
-    if "clean_text" not in _nlp_cache:
-        from backend.nlp_engine import clean_text
-        _nlp_cache["clean_text"] = clean_text
-    cleaned_resume = _nlp_cache["clean_text"](raw)
-    del _nlp_cache["clean_text"]
-    gc.collect()
-
-    # Stage 3: Structured Parsing
-    if "parse_resume_structured" not in _nlp_cache:
-        from backend.nlp_engine import parse_resume_structured
-        _nlp_cache["parse_resume_structured"] = parse_resume_structured
-    resume_structured = _nlp_cache["parse_resume_structured"](raw)
-    del _nlp_cache["parse_resume_structured"]
-    gc.collect()
-
-    # Stage 4: JD Extraction
-    if jd_file:
-        jd_ext = jd_file.filename.split(".")[-1].lower()
-        jd_text = extract_text(jd_file.file, jd_ext)
-        del jd_ext
-    elif job_description:
-        jd_text = job_description
-    else:
+    engine = get_analysis_engine()
+    # Periodic collection runs after the response is sent, never between stages
+    background_tasks.add_task(engine.finish_request)
+
+    if not jd_file and not job_description:
         raise HTTPException(status_code=400, detail="Either job_description text or jd_file must be provided")
-    gc.collect()
-
-    # Stage 5: JD Preprocessing
-    if "clean_text" not in _nlp_cache:
-        from backend.nlp_engine import clean_text
-        _nlp_cache["clean_text"] = clean_text
-    cleaned_jd = _nlp_cache["clean_text"](jd_text)
-    del _nlp_cache["clean_text"]
-    gc.collect()
-
-    # Stage 6: JD Structured Parsing
-    if "parse_jd_structured" not in _nlp_cache:
-        from backend.nlp_engine import parse_jd_structured
-        _nlp_cache["parse_jd_structured"] = parse_jd_structured
-    jd_structured = _nlp_cache["parse_jd_structured"](jd_text)
-    del _nlp_cache["parse_jd_structured"]
-    gc.collect()
-
-    # Stage 7: Preprocessing tokens
-    if "preprocess_text" not in _nlp_cache:
-        from backend.nlp_preprocessing import preprocess_text
-        _nlp_cache["preprocess_text"] = preprocess_text
-    resume_preprocessed = _nlp_cache["preprocess_text"](raw)
-    jd_preprocessed = _nlp_cache["preprocess_text"](jd_text)
-    del _nlp_cache["preprocess_text"]
-    gc.collect()
-
-    # Stage 8: Skill Extraction
-    if "extract_skills_hybrid" not in _nlp_cache:
-        from backend.nlp_preprocessing import extract_skills_hybrid
-        _nlp_cache["extract_skills_hybrid"] = extract_skills_hybrid
-    resume_skills_extracted = _nlp_cache["extract_skills_hybrid"](raw)
-    del _nlp_cache["extract_skills_hybrid"]
-    gc.collect()
-
-    if "extract_keywords_hybrid" not in _nlp_cache:
-        from backend.nlp_preprocessing import extract_keywords_hybrid
-        _nlp_cache["extract_keywords_hybrid"] = extract_keywords_hybrid
-    jd_skills_extracted = _nlp_cache["extract_keywords_hybrid"](jd_text)
-    del _nlp_cache["extract_keywords_hybrid"]
-    gc.collect()
-
-    # Stage 9: Manual TF-IDF Vectorization (memory safe)
-    from backend.nlp_preprocessing import compute_idf, compute_tfidf, cosine_similarity_sparse, tokenize
-    idf = compute_idf([raw, jd_text])
-    resume_tfidf = compute_tfidf(raw, idf)
-    jd_tfidf = compute_tfidf(jd_text, idf)
-    feature_names = list(idf.keys())
-    tfidf_data = {
-        'resume_tfidf_vector': [resume_tfidf.get(f, 0.0) for f in feature_names],
-        'jd_tfidf_vector': [jd_tfidf.get(f, 0.0) for f in feature_names],
-        'feature_names': feature_names
-    }
-    del idf, resume_tfidf, jd_tfidf, feature_names
-    gc.collect()
 
-    rid = str(uuid.uuid4())[:8]
+    resume_bytes, resume_ext, jd_bytes, jd_ext = await read_uploads(resume, jd_file)
+    if run_async:
+        # Job mode: returns at once; the analysis runs on a queue worker and is polled at GET /jobs/{job_id}
+        queue = get_job_queue()
+        try:
+            job, deduplicated = await queue.enqueue(user_id, resume_bytes, resume_ext, job_description, jd_bytes, jd_ext)
+        except JobQueueError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except pymongo.errors.PyMongoError as e:
+            raise HTTPException(status_code=503, detail=f"Job queue unavailable: {str(e)}")
+        queue.notify()
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job["_id"], "status": job["status"], "deduplicated": deduplicated},
+            headers={"Location": f"/jobs/{job['_id']}"}
+        )
+
+    extracted, llm_task = await start_analysis(engine, resume_bytes, resume_ext, job_description, jd_bytes, jd_ext)
+    del resume_bytes, jd_bytes
+    async for event in analysis_events(engine, extracted, llm_task, user_id):
+        if event["type"] == "result":
+            return event["result"]
 
-    # Stage 10: DB Submission
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, user_id: int = Depends(verify_token)):
     try:
-        submission_count = submissions_collection().count_documents({})
-        submission_id = submission_count + 1
-        submission_doc = {
-            "submission_id": submission_id,
-            "user_id": user_id,
-            "resume_text": raw,
-            "parsed_resume_fields": resume_structured,
-            "job_description_text": jd_text,
-            "parsed_jd_fields": jd_structured,
-            "resume_clean_text": resume_preprocessed['reconstructed_clean_text'],
-            "resume_tokens": resume_preprocessed['clean_tokens'][:100],
-            "resume_skills": resume_skills_extracted,
-            "jd_clean_text": jd_preprocessed['reconstructed_clean_text'],
-            "jd_tokens": jd_preprocessed['clean_tokens'][:100],
-            "jd_skills": jd_skills_extracted,
-            "created_at": datetime.utcnow()
-        }
-        submissions_collection().insert_one(submission_doc)
-    except Exception as e:
-        print(f"MongoDB insertion warning: {str(e)}")
-    gc.collect()
-
-    # Stage 11: Skill/Keyword Cleaning
-    all_resume_skills = (
-        resume_structured['technical_skills'] + 
-        resume_structured['tools'] + 
-        resume_structured['frameworks'] + 
-        resume_structured['programming_languages'] +
-        resume_structured['databases']
-    )
-    all_jd_keywords = (
-        jd_structured['required_skills'] + 
-        jd_structured['required_frameworks'] + 
-        jd_structured['required_tools'] + 
-        jd_structured['required_languages'] +
-        jd_structured['required_databases']
-    )
-    junk_terms = {'general', 'dev', 'development', 'programming', 'coding', 'scripting', 'software', 'web', 'application'}
-    clean_resume_skills = [s for s in resume_skills_extracted if s.lower() not in junk_terms]
-    clean_jd_skills = [s for s in jd_skills_extracted if s.lower() not in junk_terms]
-    clean_all_resume_skills = [s for s in all_resume_skills if s.lower() not in junk_terms]
-    clean_all_jd_keywords = [s for s in all_jd_keywords if s.lower() not in junk_terms]
-    if len(clean_all_resume_skills) == 0 and len(clean_resume_skills) > 0:
-        resume_structured['technical_skills'] = clean_resume_skills[:15]
-        resume_structured['tools'] = []
-        resume_structured['frameworks'] = []
-        resume_structured['programming_languages'] = []
-        resume_structured['databases'] = []
-    if len(clean_all_jd_keywords) == 0 and len(clean_jd_skills) > 0:
-        jd_structured['required_skills'] = clean_jd_skills[:15]
-        jd_structured['required_frameworks'] = []
-        jd_structured['required_tools'] = []
-        jd_structured['required_languages'] = []
-        jd_structured['required_databases'] = []
-    gc.collect()
-
-    # Stage 12: Profile Construction
-    resume_profile_obj = {
-        'candidate_name': resume_structured['candidate_name'],
-        'email': resume_structured['email'],
-        'phone': resume_structured['phone'],
-        'location': resume_structured['location'],
-        'technical_skills': resume_structured['technical_skills'],
-        'programming_languages': resume_structured['programming_languages'],
-        'frameworks': resume_structured['frameworks'],
-        'tools': resume_structured['tools'],
-        'databases': resume_structured['databases'],
-        'education_degrees': resume_structured['education_degrees'],
-        'education_fields': resume_structured['education_fields'],
-        'education_institutions': resume_structured['education_institutions'],
-        'experience_roles': resume_structured['experience_roles'],
-        'experience_companies': resume_structured['experience_companies'],
-        'experience_years_estimated': resume_structured['experience_years_estimated'],
-        'project_titles': resume_structured['project_titles'],
-        'project_technologies': resume_structured['project_technologies'],
-        'certifications': resume_structured['certifications']
-    }
-    job_profile_obj = {
-        'job_role': jd_structured['job_role'],
-        'required_skills': jd_structured['required_skills'],
-        'required_languages': jd_structured['required_languages'],
-        'required_frameworks': jd_structured['required_frameworks'],
-        'required_tools': jd_structured['required_tools'],
-        'required_databases': jd_structured['required_databases'],
-        'required_experience_years': jd_structured['required_experience_years'],
-        'required_education': jd_structured['required_education']
-    }
-    gc.collect()
-
-    # Stage 13: Profile Comparison
-    if "compare_profiles" not in _nlp_cache:
-        from backend.comparison_engine import compare_profiles
-        _nlp_cache["compare_profiles"] = compare_profiles
-    comparison_result = _nlp_cache["compare_profiles"](resume_profile_obj, job_profile_obj)
-    del _nlp_cache["compare_profiles"]
-    gc.collect()
-
-    # Stage 14: Skill Suggestions
-    all_jd_skills = (
-        jd_structured['required_skills'] + 
-        jd_structured['required_frameworks'] + 
-        jd_structured['required_tools'] + 
-        jd_structured['required_languages'] +
-        jd_structured['required_databases']
-    )
-    if "generate_skill_suggestions" not in _nlp_cache:
-        from backend.suggestion_engine import generate_skill_suggestions
-        _nlp_cache["generate_skill_suggestions"] = generate_skill_suggestions
-    skill_suggestions = _nlp_cache["generate_skill_suggestions"](
-        jd_skills=all_jd_skills,
-        resume_skills=all_resume_skills,
-        job_role=jd_structured['job_role'],
-        jd_text=jd_text,
-        missing_skills=comparison_result['missing_skills']
-    )
-    del _nlp_cache["generate_skill_suggestions"]
-    gc.collect()
+        job = await get_job_queue().get(job_id, user_id)
+    except pymongo.errors.PyMongoError as e:
+        raise HTTPException(status_code=503, detail=f"Job queue unavailable: {str(e)}")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    background_tasks: BackgroundTasks,
+    resume: UploadFile = File(...),
+    job_description: Optional[str] = Form(None),
+    jd_file: Optional[UploadFile] = File(None),
+    stream_format: str = Form("ndjson"),
+    user_id: int = Depends(verify_token)
+):
+    """/analyze with every stage's output streamed as soon as it is ready, ending with the full response."""
+    engine = get_analysis_engine()
+    background_tasks.add_task(engine.finish_request)
+
+    if not jd_file and not job_description:
+        raise HTTPException(status_code=400, detail="Either job_description text or jd_file must be provided")
+    if stream_format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="stream_format must be 'ndjson' or 'sse'")
+
+    # Extraction runs before the stream opens, so a busy pool is still a plain 503
+    resume_bytes, resume_ext, jd_bytes, jd_ext = await read_uploads(resume, jd_file)
+    extracted, llm_task = await start_analysis(engine, resume_bytes, resume_ext, job_description, jd_bytes, jd_ext)
+    del resume_bytes, jd_bytes
+
+    async def events():
+        try:
+            async for event in analysis_events(engine, extracted, llm_task, user_id):
+                yield encode_event(event, stream_format)
+        except HTTPException as e:
+            yield encode_event({"type": "error", "status_code": e.status_code, "detail": e.detail}, stream_format)
+        except Exception as e:
+            print(f"Streaming analysis failed: {str(e)}")
+            yield encode_event({"type": "error", "status_code": 500, "detail": "Analysis failed"}, stream_format)
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    resumes: List[UploadFile] = File(...),
+    job_description: Optional[str] = Form(None),
+    jd_file: Optional[UploadFile] = File(None),
+    stream_format: str = Form("ndjson"),
+    user_id: int = Depends(verify_token)
+):
+    if not jd_file and not job_description:
+        raise HTTPException(status_code=400, detail="Either job_description text or jd_file must be provided")
+    if stream_format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="stream_format must be 'ndjson' or 'sse'")
 
-    # Stage 14.5: Universal LLM Override
-    # This completely overrides the static Tech dictionaries with an Advanced Generalistic Output
     try:
-        from backend.llm_engine import analyze_with_llm
-        llm_data = analyze_with_llm(raw, jd_text)
-        if llm_data:
-            # Inject Universal Variables
-            original_comp = comparison_result
-            comparison_result = llm_data['comparison']
-            comparison_result['match_percentage'] = float(comparison_result.get('match_percentage', 0))
-            
-            # Preserve exact criteria match booleans from static parser
-            comparison_result['experience_match'] = original_comp.get('experience_match', False)
-            comparison_result['experience_gap'] = original_comp.get('experience_gap', False)
-            comparison_result['education_match'] = original_comp.get('education_match', False)
-            
-            # Populate Fallback Skills just in case the LLM returned empty arrays
-            if not llm_data.get('skill_suggestions', {}).get('suggested_skills'):
-                 llm_data['skill_suggestions'] = skill_suggestions 
-            else:
-                 skill_suggestions = llm_data['skill_suggestions']
-                 
-            # Overwrite structured job role for UI updates
-            if llm_data.get('job_role'):
-                 jd_structured['job_role'] = llm_data['job_role']
-            job_profile_obj['role'] = jd_structured['job_role']
-            
-            # Pass all universal skills down and overwrite UI structures to prevent old dictionary leaking
-            if llm_data.get('resume_skills'):
-                 all_resume_skills = llm_data['resume_skills']
-                 resume_structured['technical_skills'] = llm_data['resume_skills']
-                 resume_skills_extracted = llm_data['resume_skills']
-                 
-            if llm_data.get('job_skills'):
-                 all_jd_skills = llm_data['job_skills']
-                 jd_structured['required_skills'] = llm_data['job_skills']
-                 jd_skills_extracted = llm_data['job_skills']
-                 # Clear out old dictionary extracts to prevent 'ember' from leaking
-                 jd_structured['required_languages'] = []
-                 jd_structured['required_frameworks'] = []
-                 jd_structured['required_tools'] = []
-                 jd_structured['required_databases'] = []
-                 
-    except Exception as e:
-        print(f"Universal LLM Fallback Failed: {str(e)}")
-        pass
+        uploads = expand_uploads(await read_batch_uploads(resumes))
+    except BatchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-    # Stage 15: DB Insert for Analysis
+    # The JD is parsed exactly once; every candidate job only carries the parsed profile
+    pool = get_analysis_pool()
     try:
-        resume_doc = {
-            'resume_id': rid,
-            'user_id': user_id,
-            'profile': resume_profile_obj,
-            'raw_text': raw,
-            'created_at': datetime.utcnow()
-        }
-        resumes_collection().insert_one(resume_doc)
-        jd_doc = {
-            'jd_id': rid,
-            'user_id': user_id,
-            'profile': job_profile_obj,
-            'raw_text': jd_text,
-            'created_at': datetime.utcnow()
-        }
-        job_descriptions_collection().insert_one(jd_doc)
-        analysis_doc = {
-            'analysis_id': rid,
-            'user_id': user_id,
-            'resume_id': rid,
-            'jd_id': rid,
-            'comparison': comparison_result,
-            'match_percentage': comparison_result['match_percentage'],
-            'suggested_skills': skill_suggestions['suggested_skills'],
-            'missing_skills_explained': skill_suggestions['missing_skills_explained'],
-            'created_at': datetime.utcnow()
-        }
-        analysis_results_collection().insert_one(analysis_doc)
-    except Exception as e:
-        print(f"MongoDB insertion warning: {str(e)}")
-    gc.collect()
+        if jd_file:
+            jd = await pool.prepare_jd(jd_bytes=await jd_file.read(), jd_ext=jd_file.filename.split(".")[-1].lower())
+        else:
+            jd = await pool.prepare_jd(jd_text=job_description)
+    except (PoolSaturated, PoolUnavailable):
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis service is busy, please retry shortly",
+            headers={"Retry-After": str(pool.retry_after)}
+        )
+
+    async def events():
+        async for event in stream_batch(pool, jd, uploads):
+            if event["type"] == "summary":
+                batch_doc = {
+                    "batch_id": str(uuid.uuid4())[:8],
+                    "user_id": user_id,
+                    "jd_hash": jd["jd_hash"],
+                    "job_role": jd["jd_profile"]["jd_structured"].get("job_role"),
+                    "completed": event["completed"],
+                    "failed": event["failed"],
+                    "ranking": event["ranking"],
+                    "created_at": datetime.utcnow()
+                }
+                try:
+                    await async_batch_screenings_collection().insert_one(batch_doc)
+                    event["batch_id"] = batch_doc["batch_id"]
+                except Exception as e:
+                    print(f"MongoDB insertion warning: {str(e)}")
+            yield encode_event(event, stream_format)
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/match/jobs")
+async def match_jobs(
+    resume: UploadFile = File(...),
+    top_k: int = Form(10),
+    role: Optional[str] = Form(None),
+    since_days: Optional[int] = Form(None),
+    mine_only: bool = Form(False),
+    user_id: int = Depends(verify_token)
+):
+    if top_k < 1 or top_k > MATCH_MAX_TOP_K:
+        raise HTTPException(status_code=400, detail=f"top_k must be between 1 and {MATCH_MAX_TOP_K}")
+
+    # The resume is parsed once; every stored JD is scored against it through the skill index
+    pool = get_analysis_pool()
+    try:
+        parsed = await pool.profile_resume(await resume.read(), resume.filename.split(".")[-1].lower())
+    except (PoolSaturated, PoolUnavailable):
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis service is busy, please retry shortly",
+            headers={"Retry-After": str(pool.retry_after)}
+        )
+
+    # Served from the last snapshot; the index refreshes itself in the background
+    index = get_jd_index()
+    loop = asyncio.get_running_loop()
+    ranking = await loop.run_in_executor(
+        None,
+        lambda: index.rank(
+            parsed["resume_profile"], top_k=top_k, role=role, since_days=since_days,
+            user_id=user_id if mine_only else None
+        )
+    )
 
-    # Stage 16: Response Construction
     return {
-        "resume_id": rid,
-        "cleaned_resume_text": cleaned_resume,
-        "cleaned_job_description_text": cleaned_jd,
-        "resume_preprocessed": {
-            "clean_text": resume_preprocessed['reconstructed_clean_text'],
-            "tokens": resume_preprocessed['clean_tokens'][:100],
-            "lemmatized_tokens": resume_preprocessed['lemmatized_tokens'][:100]
-        },
-        "jd_preprocessed": {
-            "clean_text": jd_preprocessed['reconstructed_clean_text'],
-            "tokens": jd_preprocessed['clean_tokens'][:100],
-            "lemmatized_tokens": jd_preprocessed['lemmatized_tokens'][:100]
-        },
-        "resume_skills_extracted": resume_skills_extracted,
-        "jd_skills_extracted": jd_skills_extracted,
-        "tfidf_vectors": {
-            "resume_vector_length": len(tfidf_data['resume_tfidf_vector']),
-            "jd_vector_length": len(tfidf_data['jd_tfidf_vector']),
-            "feature_count": len(tfidf_data['feature_names'])
-        },
-        "resume_profile": {
-            "candidate_name": resume_structured['candidate_name'],
-            "contact": {
-                "email": resume_structured['email'],
-                "phone": resume_structured['phone'],
-                "location": resume_structured['location']
-            },
-            "technical_expertise": {
-                "skills": resume_structured['technical_skills'],
-                "languages": resume_structured['programming_languages'],
-                "frameworks": resume_structured['frameworks'],
-                "tools": resume_structured['tools'],
-                "databases": resume_structured['databases']
-            },
-            "soft_skills": resume_structured['soft_skills'],
-            "education": {
-                "degrees": resume_structured['education_degrees'],
-                "fields": resume_structured['education_fields'],
-                "institutions": resume_structured['education_institutions'],
-                "entries": resume_structured.get('education_entries', [])
-            },
-            "experience": {
-                "roles": resume_structured['experience_roles'],
-                "companies": resume_structured['experience_companies'],
-                "date_ranges": resume_structured['experience_date_ranges'],
-                "years_estimated": resume_structured['experience_years_estimated'],
-                "entries": resume_structured.get('experience_entries', [])
-            },
-            "projects": {
-                "titles": resume_structured['project_titles'],
-                "technologies": resume_structured['project_technologies']
-            },
-            "certifications": resume_structured['certifications']
-        },
-        "job_profile": {
-            "role": jd_structured['job_role'],
-            "required_technical": {
-                "skills": jd_structured['required_skills'],
-                "languages": jd_structured['required_languages'],
-                "frameworks": jd_structured['required_frameworks'],
-                "tools": jd_structured['required_tools'],
-                "databases": jd_structured['required_databases']
-            },
-            "requirements": {
-                "experience_years": jd_structured['required_experience_years'],
-                "education": jd_structured['required_education']
-            },
-            "additional": {
-                "nice_to_have": jd_structured['nice_to_have_skills'],
-                "responsibility_terms": jd_structured['responsibility_tech_terms']
-            }
-        },
-        "resume_skills": all_resume_skills,
-        "job_keywords": all_jd_keywords,
-        "comparison": comparison_result,
-        "skill_suggestions": skill_suggestions,
-        "dataset_size": 0 if 'submission_count' not in locals() else submissions_collection().count_documents({})
+        "resume_profile": parsed["resume_profile"],
+        "resume_skills": parsed["resume_skills"],
+        "extraction_metadata": parsed["extraction_metadata"],
+        **ranking
     }
 
 @app.get("/admin/analytics")
-def get_admin_analytics(user_id: int = Depends(verify_token)):
-    if not validate_admin_role(users_collection(), user_id):
+async def get_admin_analytics(user_id: int = Depends(verify_token)):
+    if not await validate_admin_role_async(async_users_collection(), user_id):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    try:
+        return await get_admin_analytics_payload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analytics error: {str(e)}")
+
+@app.get("/admin/users/activity")
+async def get_admin_user_activity(
+    sort_by: str = "submissions",
+    order: str = "desc",
+    page: int = 1,
+    page_size: int = 50,
+    user_id: int = Depends(verify_token)
+):
+    if not await validate_admin_role_async(async_users_collection(), user_id):
         raise HTTPException(status_code=403, detail="Admin access required")
+    if sort_by not in USER_ACTIVITY_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(sorted(USER_ACTIVITY_SORT_FIELDS))}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if page < 1 or page_size < 1 or page_size > 200:
+        raise HTTPException(status_code=400, detail="page must be at least 1 and page_size between 1 and 200")
     
     try:
-        analytics = get_analytics_summary(
-            users_collection(),
-            submissions_collection(),
-            analysis_results_collection()
+        return await get_user_activity_page(
+            sort_by=sort_by,
+            order=order,
+            page=page,
+            page_size=page_size
         )
-        
-        top_missing = get_top_missing_skills(analysis_results_collection(), limit=20)
-        top_roles = get_top_job_roles(submissions_collection(), limit=15)
-        category_dist = get_skill_category_distribution(analysis_results_collection())
-        rec_dist = get_recommendation_distribution(analysis_results_collection())
-        recent = get_recent_analyses(analysis_results_collection(), limit=10)
-        
-        return {
-            "summary": analytics,
-            "top_missing_skills": top_missing,
-            "top_job_roles": top_roles,
-            "skill_category_distribution": category_dist,
-            "recommendation_distribution": rec_dist,
-            "recent_analyses": recent
-        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analytics error: {str(e)}")
 
 @app.get("/admin/validate")
-def validate_admin(user_id: int = Depends(verify_token)):
-    is_admin = validate_admin_role(users_collection(), user_id)
+async def validate_admin(user_id: int = Depends(verify_token)):
+    is_admin = await validate_admin_role_async(async_users_collection(), user_id)
     return {"is_admin": is_admin}
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Fast health check endpoint for Render"""
-    db_healthy = quick_health_check()
+    db_healthy = await async_health_check()
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "database": "connected" if db_healthy else "disconnected",
-        "app_ready": app_ready
+        "mongo_pool": get_pool_stats(),
+        "app_ready": app_ready,
+        "engine": get_analysis_engine().get_stats(),
+        "analysis_pool": get_analysis_pool().get_stats(),
+        # Phrase, text and JD caches live where the analysis runs: per worker process in process mode
+        "analysis_caches": get_analysis_pool().get_cache_stats(),
+        "jd_index": get_jd_index().get_stats(),
+        # This process's registry, used by the JD index
+        "skill_registry": get_skill_registry().get_stats(),
+        "llm": get_llm_client().get_stats(),
+        "llm_cache": get_llm_cache().get_stats(),
+        "job_queue": get_job_queue().get_stats()
     }
 
 app.mount("/assets", StaticFiles(directory="frontend/dist/assets"), name="assets")
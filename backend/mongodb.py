@@ -1,6 +1,9 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
+from pymongo.write_concern import WriteConcern
+from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
 import os
+import threading
 from urllib.parse import quote_plus
 
 
@@ -16,15 +19,118 @@ if not MONGO_URI:
         MONGO_URI = f"mongodb+srv://{quote_plus(username)}:{quote_plus(password)}@{cluster}/?retryWrites=true&w=majority"
     else:
         MONGO_URI = "mongodb://localhost:27017"
+# Connection pool and write concern, shared by the sync and async clients
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+# Connections the async client keeps open so request bursts skip the TLS handshake
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "120000"))
+# How long an operation waits for a free pooled connection before failing instead of queueing forever
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_WRITE_W = os.getenv("MONGO_WRITE_W", "majority")
+MONGO_WRITE_J = os.getenv("MONGO_WRITE_J", "1") == "1"
+
+# Cache entries can be rebuilt, so their writes are acknowledged by the primary alone
+CACHE_WRITE_CONCERN = WriteConcern(w=1)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters for one client, fed by the driver's CMAP events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {"connections_created": 0, "connections_closed": 0, "checkouts": 0, "checkout_failures": 0,
+                      "checkout_timeouts": 0, "checked_out": 0, "pool_cleared": 0}
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def _count(self, key, delta=1):
+        with self._lock:
+            self.stats[key] += delta
+
+    def _waited(self, duration):
+        # Time a successful checkout spent waiting for a free connection (or opening one)
+        wait_ms = (duration or 0) * 1000
+        with self._lock:
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count("checkout_failures")
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            self._count("checkout_timeouts")
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["checked_out"] += 1
+        self._waited(getattr(event, "duration", None))
+
+    def connection_checked_in(self, event):
+        self._count("checked_out", -1)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            wait_ms_total = self.wait_ms_total
+            stats["wait_ms_max"] = round(self.wait_ms_max, 2)
+        stats["open_connections"] = stats["connections_created"] - stats["connections_closed"]
+        stats["wait_ms_avg"] = round(wait_ms_total / stats["checkouts"], 2) if stats["checkouts"] else 0.0
+        return stats
+
+
+_pool_metrics = {"sync": PoolMetrics(), "async": PoolMetrics()}
+
+
+def _client_options(kind, min_pool_size=0):
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": min_pool_size,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "w": int(MONGO_WRITE_W) if MONGO_WRITE_W.isdigit() else MONGO_WRITE_W,
+        "journal": MONGO_WRITE_J,
+        "event_listeners": [_pool_metrics[kind]]
+    }
+
+
 # Lazy MongoDB connection and collections
 _mongo_client = None
 _mongo_db = None
 _collections = {}
 
 def get_mongo_client():
+    # Startup maintenance, the JD index and the caches inside the analysis workers; request handlers use the async client
     global _mongo_client
     if _mongo_client is None:
-        _mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000, connectTimeoutMS=5000)
+        _mongo_client = MongoClient(MONGO_URI, **_client_options("sync"))
     return _mongo_client
 
 def get_mongo_db():
@@ -38,6 +144,33 @@ def get_collection(name):
         _collections[name] = get_mongo_db()[name]
     return _collections[name]
 
+# Async (Motor) client for handlers that await MongoDB instead of blocking the event loop or a threadpool thread
+_async_mongo_client = None
+
+def get_async_mongo_client():
+    global _async_mongo_client
+    if _async_mongo_client is None:
+        # Created on first use from a handler so it binds to the running event loop
+        _async_mongo_client = AsyncIOMotorClient(MONGO_URI, **_client_options("async", MONGO_MIN_POOL_SIZE))
+    return _async_mongo_client
+
+def get_async_collection(name, write_concern=None):
+    collection = get_async_mongo_client()[MONGO_DATABASE][name]
+    if write_concern is not None:
+        collection = collection.with_options(write_concern=write_concern)
+    return collection
+
+def get_pool_stats():
+    return {
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        "max_idle_time_ms": MONGO_MAX_IDLE_TIME_MS,
+        "wait_queue_timeout_ms": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "write_concern": {"w": MONGO_WRITE_W, "j": MONGO_WRITE_J},
+        "sync": _pool_metrics["sync"].get_stats(),
+        "async": _pool_metrics["async"].get_stats()
+    }
+
 def test_connection():
     try:
         get_mongo_client().admin.command('ping')
@@ -60,6 +193,14 @@ def quick_health_check():
     except:
         return False
 
+async def async_health_check():
+    """quick_health_check on the async client, for async handlers"""
+    try:
+        await get_async_mongo_client().admin.command('ping', maxTimeMS=2000)
+        return True
+    except Exception:
+        return False
+
 # Collection getters
 def users_collection():
     return get_collection("users")
@@ -74,6 +215,38 @@ def analysis_results_collection():
 
 def otp_collection():
     return get_collection("otps")
+def batch_screenings_collection():
+    return get_collection("batch_screenings")
+def extracted_text_cache_collection():
+    return get_collection("extracted_text_cache")
+def llm_response_cache_collection():
+    return get_collection("llm_response_cache")
+def analysis_jobs_collection():
+    return get_collection("analysis_jobs")
+def analytics_rollups_collection():
+    return get_collection("analytics_rollups")
+
+# Async collection getters for request handlers
+def async_users_collection():
+    return get_async_collection("users")
+def async_submissions_collection():
+    return get_async_collection("submissions")
+def async_resumes_collection():
+    return get_async_collection("resumes")
+def async_job_descriptions_collection():
+    return get_async_collection("job_descriptions")
+def async_analysis_results_collection():
+    return get_async_collection("analysis_results")
+def async_otp_collection():
+    return get_async_collection("otps")
+def async_batch_screenings_collection():
+    return get_async_collection("batch_screenings")
+def async_llm_response_cache_collection():
+    return get_async_collection("llm_response_cache", CACHE_WRITE_CONCERN)
+def async_analysis_jobs_collection():
+    return get_async_collection("analysis_jobs")
+def async_analytics_rollups_collection():
+    return get_async_collection("analytics_rollups")
 
 def init_indexes():
     users_collection().create_index("email", unique=True)
@@ -1,7 +1,12 @@
 import re
+import os
 import math
-from collections import Counter
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, namedtuple
 from sklearn.feature_extraction.text import TfidfVectorizer
+from .ontology_matcher import OntologyMatcher, OntologyIndex
+from .comparison_engine import CANONICAL_SKILL_MAP
 try:
     import spacy
     # Load spaCy model globally for NER, POS tagging, and Noun Chunks
@@ -23,6 +28,162 @@ def get_spacy_tokenizer():
 def get_spacy_ner():
     return nlp
 
+MAX_DOC_CHARS = 100000
+
+class DocumentContext:
+    """Parses a document once and shares the Doc (or a Span of it) across extractors."""
+
+    def __init__(self, text, doc=None, root=None, offset=0):
+        self.text = text or ""
+        self.offset = offset
+        self._doc = doc
+        self._root = root
+        self.cache = {}
+
+    @property
+    def doc(self):
+        if self._doc is None and nlp:
+            self._doc = nlp(self.text[:MAX_DOC_CHARS])
+        return self._doc
+
+    @property
+    def root(self):
+        return self._root if self._root is not None else self.doc
+
+    @property
+    def tokens(self):
+        return list(self.doc) if self.doc is not None else []
+
+    @property
+    def ents(self):
+        return list(self.doc.ents) if self.doc is not None else []
+
+    @property
+    def noun_chunks(self):
+        if 'noun_chunks' not in self.cache:
+            chunks = []
+            if self.doc is not None and self.root.has_annotation("DEP"):
+                chunks = list(self.doc.noun_chunks)
+            self.cache['noun_chunks'] = chunks
+        return self.cache['noun_chunks']
+
+    @property
+    def sents(self):
+        if self.doc is None or not self.root.has_annotation("SENT_START"):
+            return []
+        return list(self.doc.sents)
+
+    def sub(self, start, end):
+        # Span of the shared parse covering text[start:end]; re-parses only if it cannot be aligned
+        end = min(end, len(self.text))
+        sub_text = self.text[start:end]
+        root = self.root
+        abs_start = self.offset + start
+        abs_end = self.offset + end
+        if root is not None and abs_end <= len(root.text):
+            span = root.char_span(abs_start, abs_end, alignment_mode="expand")
+            if span is not None:
+                return DocumentContext(sub_text, doc=span, root=root, offset=abs_start)
+        return DocumentContext(sub_text)
+
+    def sub_for(self, substring):
+        start = self.text.find(substring)
+        if start == -1:
+            return DocumentContext(substring)
+        return self.sub(start, start + len(substring))
+
+def build_document_context(text):
+    return DocumentContext(text)
+
+def _char_ranges(text, patterns, flags=0):
+    ranges = []
+    for pattern in patterns:
+        for m in re.finditer(pattern, text, flags):
+            if m.end() > m.start():
+                ranges.append((m.start(), m.end()))
+    return sorted(ranges)
+
+def _in_ranges(pos, ranges):
+    for start, end in ranges:
+        if start > pos:
+            break
+        if start <= pos < end:
+            return True
+    return False
+
+# Process-wide LRU of short-phrase spaCy results; the same candidate skills recur in every document
+PHRASE_CACHE_SIZE = int(os.getenv("PHRASE_CACHE_SIZE", "20000"))
+
+PhraseInfo = namedtuple('PhraseInfo', ['has_verb', 'ents', 'pos'])
+
+_phrase_cache = OrderedDict()
+_phrase_cache_lock = threading.Lock()
+_phrase_cache_stats = {'hits': 0, 'misses': 0}
+
+def analyze_phrases(phrases):
+    results = {}
+    misses = []
+    pending = set()
+    with _phrase_cache_lock:
+        for phrase in phrases:
+            if phrase in results or phrase in pending:
+                continue
+            info = _phrase_cache.get(phrase)
+            if info is None:
+                misses.append(phrase)
+                pending.add(phrase)
+                continue
+            _phrase_cache.move_to_end(phrase)
+            _phrase_cache_stats['hits'] += 1
+            results[phrase] = info
+    
+    if misses and not nlp:
+        # Without a model nothing can be parsed or cached, so every lookup stays a miss
+        with _phrase_cache_lock:
+            _phrase_cache_stats['misses'] += len(misses)
+    elif misses:
+        parsed = {}
+        for phrase, doc in zip(misses, nlp.pipe(misses)):
+            parsed[phrase] = PhraseInfo(
+                has_verb=any(token.pos_ == 'VERB' for token in doc),
+                ents=tuple((ent.label_, ent.text) for ent in doc.ents),
+                pos=tuple(token.pos_ for token in doc)
+            )
+        results.update(parsed)
+        with _phrase_cache_lock:
+            _phrase_cache_stats['misses'] += len(parsed)
+            _phrase_cache.update(parsed)
+            while len(_phrase_cache) > PHRASE_CACHE_SIZE:
+                _phrase_cache.popitem(last=False)
+    
+    return results
+
+def get_phrase_info(phrase):
+    # Callers prefetch with analyze_phrases, which already counted the lookup; re-reads leave the stats alone
+    with _phrase_cache_lock:
+        info = _phrase_cache.get(phrase)
+        if info is not None:
+            _phrase_cache.move_to_end(phrase)
+            return info
+    return analyze_phrases([phrase]).get(phrase)
+
+def warm_phrase_cache(phrases=None):
+    if phrases is None:
+        phrases = technical_ontology | set(normalization_map) | set(normalization_map.values())
+    return len(analyze_phrases(sorted(phrases)))
+
+def get_phrase_cache_stats():
+    with _phrase_cache_lock:
+        lookups = _phrase_cache_stats['hits'] + _phrase_cache_stats['misses']
+        return {
+            'size': len(_phrase_cache),
+            'max_size': PHRASE_CACHE_SIZE,
+            'hits': _phrase_cache_stats['hits'],
+            'misses': _phrase_cache_stats['misses'],
+            'hit_rate': round(_phrase_cache_stats['hits'] / lookups, 4) if lookups else 0.0,
+            'model_loaded': nlp is not None
+        }
+
 
 
 def tokenize(text):
@@ -145,6 +306,8 @@ technical_ontology = set()
 for skill_type, skills in typed_technical_ontology.items():
     technical_ontology.update(skills)
 
+ontology_index = OntologyIndex(typed_technical_ontology)
+
 protected_technical_tokens = set()
 for skill_type, skills in typed_technical_ontology.items():
     protected_technical_tokens.update(skills)
@@ -218,6 +381,17 @@ normalization_map = {
     "dataviz": "data visualization"
 }
 
+# Built once; finds every ontology hit (with word boundaries and positions) in a single pass
+ontology_matcher = OntologyMatcher(
+    technical_ontology |
+    set(normalization_map) | set(normalization_map.values()) |
+    set(CANONICAL_SKILL_MAP) | set(CANONICAL_SKILL_MAP.values())
+)
+
+# Plain-word ontology terms that extract_noun_phrases looks up as 1-4 word n-grams
+MAX_NGRAM_WORDS = 4
+ngram_vocabulary = {term for term in technical_ontology | set(normalization_map) if re.fullmatch(r'[a-z]+(?: [a-z]+)*', term)}
+
 tech_org_whitelist = {
     'github', 'gitlab', 'aws', 'azure', 'google cloud', 'gcp',
     'microsoft', 'oracle', 'ibm', 'docker', 'kubernetes',
@@ -309,34 +483,54 @@ def get_section_priority(text_fragment, section_map):
     
     return 1.0
 
-def sanitize_resume_text(text):
-    text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', ' ', text)
-    text = re.sub(r'\b(?:\+?1[-.]?)?\(?\d{3}\)?[-.]?\d{3}[-.]?\d{4}\b', ' ', text)
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', ' ', text)
-    text = re.sub(r'\b(?:github|linkedin|twitter)\.com/[^\s]+', ' ', text)
-    text = re.sub(r'\b\d{5}(?:-\d{4})?\b', ' ', text)
-    text = re.sub(r'\b[A-Z]{2}\s+\d{5}\b', ' ', text)
-    text = re.sub(r'\b\d+\s+[A-Z][a-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct)\b', ' ', text, flags=re.IGNORECASE)
-    
-    for pattern in junk_patterns:
-        text = re.sub(r'\b' + pattern + r'\b', ' ', text, flags=re.IGNORECASE)
-    
-    if nlp:
-        doc = nlp(text[:100000])
+contact_patterns = [
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    r'\b(?:\+?1[-.]?)?\(?\d{3}\)?[-.]?\d{3}[-.]?\d{4}\b',
+    r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
+    r'\b(?:github|linkedin|twitter)\.com/[^\s]+',
+    r'\b\d{5}(?:-\d{4})?\b',
+    r'\b[A-Z]{2}\s+\d{5}\b',
+]
+
+address_pattern = r'\b\d+\s+[A-Z][a-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct)\b'
+
+def keep_sanitized_token(token):
+    if token.ent_type_ == 'PERSON':
+        return False
+    if token.ent_type_ in ['GPE', 'LOC'] and token.text.lower() not in technical_ontology:
+        return False
+    if token.ent_type_ == 'ORG':
+        org_lower = token.text.lower()
+        is_tech_company = any(tech in org_lower for tech in ['google', 'microsoft', 'amazon', 'meta', 'facebook', 'apple', 'netflix', 'uber', 'airbnb', 'oracle', 'ibm', 'salesforce', 'adobe'])
+        is_in_ontology = org_lower in technical_ontology
+        if not is_tech_company and not is_in_ontology:
+            return False
+    return True
+
+def sanitize_resume_text(text, ctx=None):
+    if ctx is not None and ctx.doc is not None:
+        removed = sorted(
+            _char_ranges(text, contact_patterns) +
+            _char_ranges(text, [address_pattern] + [r'\b' + p + r'\b' for p in junk_patterns], re.IGNORECASE)
+        )
         sanitized_tokens = []
-        for token in doc:
-            if token.ent_type_ == 'PERSON':
-                continue
-            if token.ent_type_ in ['GPE', 'LOC'] and token.text.lower() not in technical_ontology:
+        for token in ctx.tokens:
+            if _in_ranges(token.idx - ctx.offset, removed):
                 continue
-            if token.ent_type_ == 'ORG':
-                org_lower = token.text.lower()
-                is_tech_company = any(tech in org_lower for tech in ['google', 'microsoft', 'amazon', 'meta', 'facebook', 'apple', 'netflix', 'uber', 'airbnb', 'oracle', 'ibm', 'salesforce', 'adobe'])
-                is_in_ontology = org_lower in technical_ontology
-                if not is_tech_company and not is_in_ontology:
-                    continue
-            sanitized_tokens.append(token.text)
+            if keep_sanitized_token(token):
+                sanitized_tokens.append(token.text)
         text = ' '.join(sanitized_tokens)
+    else:
+        for pattern in contact_patterns:
+            text = re.sub(pattern, ' ', text)
+        text = re.sub(address_pattern, ' ', text, flags=re.IGNORECASE)
+        
+        for pattern in junk_patterns:
+            text = re.sub(r'\b' + pattern + r'\b', ' ', text, flags=re.IGNORECASE)
+        
+        if nlp:
+            doc = nlp(text[:MAX_DOC_CHARS])
+            text = ' '.join(token.text for token in doc if keep_sanitized_token(token))
     
     text = re.sub(r'\b\d+\b', ' ', text)
     text = re.sub(r'\b[a-zA-Z]\b', ' ', text)
@@ -364,10 +558,7 @@ def normalize_phrase(phrase):
 
 def is_technical_phrase(phrase):
     phrase_lower = phrase.lower()
-    for tech_term in technical_ontology:
-        if tech_term in phrase_lower or phrase_lower in tech_term:
-            return True
-    return False
+    return ontology_index.within_term(phrase_lower) or ontology_index.contains_term(phrase_lower)
 
 def is_junk_phrase(phrase):
     phrase_lower = phrase.lower()
@@ -422,12 +613,33 @@ def is_junk_phrase(phrase):
     
     return False
 
-def extract_noun_phrases(text):
+def find_ontology_ngrams(text):
+    # One pass over the alphabetic words; returns (phrase, start, end) offsets into text.lower()
+    text_lower = text.lower()
+    words = [(m.start(), m.end()) for m in re.finditer(r'\b[a-z]+\b', text_lower)]
+    occurrences = []
+    for i, (start, end) in enumerate(words):
+        parts = [text_lower[start:end]]
+        last_end = end
+        for j in range(i, min(len(words), i + MAX_NGRAM_WORDS)):
+            if j > i:
+                next_start, next_end = words[j]
+                if not text_lower[last_end:next_start].isspace():
+                    break
+                parts.append(text_lower[next_start:next_end])
+                last_end = next_end
+            phrase = ' '.join(parts)
+            if phrase in ngram_vocabulary:
+                occurrences.append((phrase, start, last_end))
+    return occurrences
+
+def extract_noun_phrases(text, ctx=None, ngrams=None):
     phrases = set()
     
-    if nlp:
-        doc = nlp(text[:100000])
-        for chunk in doc.noun_chunks:
+    if ctx is None and nlp:
+        ctx = DocumentContext(text)
+    if ctx is not None:
+        for chunk in ctx.noun_chunks:
             chunk_text = chunk.text.strip()
             word_count = len(chunk_text.split())
             if 1 <= word_count <= 4:
@@ -440,35 +652,63 @@ def extract_noun_phrases(text):
                 if has_technical:
                     phrases.add(chunk_text.lower())
     
-    pattern = r'\b([a-z]+(?:\s+[a-z]+){0,3})\b'
-    matches = re.findall(pattern, text.lower())
-    for match in matches:
-        if 1 <= len(match.split()) <= 4:
-            if is_technical_phrase(match):
-                phrases.add(match)
+    if ngrams is None:
+        ngrams = find_ontology_ngrams(text)
+    phrases.update(phrase for phrase, _, _ in ngrams)
     
     return list(phrases)
 
-def appears_near_action_verb(phrase, text, window=10):
-    text_lower = text.lower()
+ActionVerbIndex = namedtuple('ActionVerbIndex', ['joined', 'word_starts', 'word_ends', 'verb_positions', 'occurrences'])
+
+def build_action_verb_index(text):
+    # Positions over the whitespace-split words of text.lower(), built once per document
+    words = text.lower().split()
+    joined = ' '.join(words)
+    word_starts = []
+    word_ends = []
+    offset = 0
+    for word in words:
+        word_starts.append(offset)
+        offset += len(word)
+        word_ends.append(offset)
+        offset += 1
+    verb_positions = [i for i, word in enumerate(words) if word in tech_action_verbs]
+    occurrences = {}
+    if verb_positions:
+        for start, end, term in ontology_matcher.iter_matches(joined, whole_words=False):
+            occurrences.setdefault(term, []).append((start, end))
+    return ActionVerbIndex(joined, word_starts, word_ends, verb_positions, occurrences)
+
+def appears_near_action_verb(phrase, text, window=10, index=None):
+    if index is None:
+        index = build_action_verb_index(text)
+    if not index.verb_positions or not index.joined:
+        return False
     phrase_lower = phrase.lower()
     
-    words = text_lower.split()
-    for i, word in enumerate(words):
-        if word in tech_action_verbs:
-            start = max(0, i - window)
-            end = min(len(words), i + window)
-            context = ' '.join(words[start:end])
-            if phrase_lower in context:
-                return True
+    spans = index.occurrences.get(phrase_lower)
+    if spans is None:
+        spans = []
+        pos = index.joined.find(phrase_lower)
+        while pos != -1:
+            spans.append((pos, pos + len(phrase_lower)))
+            pos = index.joined.find(phrase_lower, pos + 1)
+    
+    # An occurrence over words [first, last] sits inside the window of verb i
+    # (words i - window .. i + window - 1) iff last - window < i <= first + window
+    verbs = index.verb_positions
+    for start, end in spans:
+        first = bisect_right(index.word_starts, start) - 1
+        last = bisect_left(index.word_ends, end)
+        k = bisect_left(verbs, last - window + 1)
+        if k < len(verbs) and verbs[k] <= first + window:
+            return True
     return False
 
 def contains_verb(phrase):
-    if nlp:
-        doc = nlp(phrase)
-        for token in doc:
-            if token.pos_ == 'VERB':
-                return True
+    info = get_phrase_info(phrase)
+    if info is not None and info.has_verb:
+        return True
     
     verb_indicators = ['ing', 'ed', 'en']
     words = phrase.lower().split()
@@ -513,18 +753,15 @@ def get_skill_type(phrase):
     phrase_lower = phrase.lower()
     normalized = normalize_phrase(phrase_lower)
     
-    for skill_type, skills in typed_technical_ontology.items():
-        if normalized in skills:
-            return skill_type
-        for skill in skills:
-            if skill in normalized or normalized in skill:
-                return skill_type
+    skill_type = ontology_index.related_type(normalized)
+    if skill_type is not None:
+        return skill_type
     
     words = phrase_lower.split()
     for word in words:
-        for skill_type, skills in typed_technical_ontology.items():
-            if word in skills:
-                return skill_type
+        skill_type = ontology_index.term_type(word)
+        if skill_type is not None:
+            return skill_type
     
     return None
 
@@ -556,23 +793,23 @@ def is_valid_technical_skill(phrase):
     if not validate_phrase_structure(phrase):
         return False
     
-    if nlp:
-        doc = nlp(phrase)
-        for ent in doc.ents:
-            if ent.label_ == 'PERSON':
+    info = get_phrase_info(phrase)
+    if info is not None:
+        for ent_label, ent_text in info.ents:
+            if ent_label == 'PERSON':
                 return False
-            if ent.label_ in ['GPE', 'LOC', 'FAC']:
+            if ent_label in ['GPE', 'LOC', 'FAC']:
                 person_lower = phrase.lower()
                 if person_lower not in technical_ontology:
                     return False
-            if ent.label_ == 'ORG':
-                org_lower = ent.text.lower()
+            if ent_label == 'ORG':
+                org_lower = ent_text.lower()
                 if org_lower not in tech_org_whitelist and org_lower not in technical_ontology:
                     return False
-            if ent.label_ == 'DATE':
+            if ent_label == 'DATE':
                 return False
-            if ent.label_ == 'CARDINAL':
-                cardinal_text = ent.text.lower()
+            if ent_label == 'CARDINAL':
+                cardinal_text = ent_text.lower()
                 if not any(tech in cardinal_text for tech in ['3d', '2d', 'c++', 'c#']):
                     return False
     
@@ -584,14 +821,14 @@ def is_valid_technical_skill(phrase):
         return True
     
     if is_technical_phrase(phrase):
-        tech_word_count = sum(1 for word in words if word in technical_ontology or any(word in tech for tech in technical_ontology))
+        tech_word_count = sum(1 for word in words if ontology_index.within_term(word))
         if tech_word_count == 0:
             return False
         return True
     
     return False
 
-def extract_skills(text):
+def extract_skills(text, ctx=None):
     skills_section_match = re.search(r'(?i)(?:skills?|technical\s+skills?|programming\s+languages?|core\s+competencies|technologies).*?(?=\n(?:[A-Z][a-z]+:|\Z))', text, re.DOTALL)
     
     if skills_section_match:
@@ -606,19 +843,21 @@ def extract_skills(text):
     skill_scores = {}
     skill_metadata = {}
     
-    for tech_term in technical_ontology:
-        pattern = r'\b' + re.escape(tech_term) + r'\b'
-        matches = re.findall(pattern, text_lower)
-        if matches:
-            normalized = normalize_phrase(tech_term)
-            count = len(matches)
-            section_priority = get_section_priority(text_lower, section_map)
-            if skills_section_match:
-                section_priority = 5.0
-            skill_scores[normalized] = skill_scores.get(normalized, 0) + (count * section_priority)
-            skill_metadata[normalized] = {'frequency': count, 'tfidf': 0, 'context': False, 'section_priority': section_priority}
-    
-    noun_phrases = extract_noun_phrases(sanitized)
+    term_counts = ontology_matcher.count_terms(text_lower)
+    if term_counts:
+        section_priority = get_section_priority(text_lower, section_map)
+        if skills_section_match:
+            section_priority = 5.0
+    for tech_term, count in term_counts.items():
+        if tech_term not in technical_ontology:
+            continue
+        normalized = normalize_phrase(tech_term)
+        skill_scores[normalized] = skill_scores.get(normalized, 0) + (count * section_priority)
+        skill_metadata[normalized] = {'frequency': count, 'tfidf': 0, 'context': False, 'section_priority': section_priority}
+    
+    ngrams = find_ontology_ngrams(sanitized)
+    noun_phrases = extract_noun_phrases(sanitized, ctx=ctx, ngrams=ngrams)
+    analyze_phrases(noun_phrases)
     for phrase in noun_phrases:
         if is_junk_phrase(phrase):
             continue
@@ -637,8 +876,9 @@ def extract_skills(text):
                 skill_scores[normalized] += section_priority
                 skill_metadata[normalized]['frequency'] += 1
     
+    verb_index = build_action_verb_index(sanitized)
     for skill in list(skill_scores.keys()):
-        if appears_near_action_verb(skill, sanitized, window=10):
+        if appears_near_action_verb(skill, sanitized, window=10, index=verb_index):
             skill_scores[skill] += 3
             skill_metadata[skill]['context'] = True
     
@@ -668,6 +908,7 @@ def extract_skills(text):
         except:
             pass
     
+    analyze_phrases(list(skill_scores))
     filtered_skills = {}
     for skill, score in skill_scores.items():
         if score <= 0:
@@ -706,11 +947,11 @@ def extract_skills(text):
         if contains_verb(skill):
             continue
         
-        if nlp:
-            doc = nlp(skill)
+        info = get_phrase_info(skill)
+        if info is not None:
             has_bad_entity = False
-            for ent in doc.ents:
-                if ent.label_ in ['PERSON', 'GPE', 'LOC', 'DATE']:
+            for ent_label, _ in info.ents:
+                if ent_label in ['PERSON', 'GPE', 'LOC', 'DATE']:
                     if skill_lower not in protected_technical_tokens:
                         has_bad_entity = True
                         break
@@ -745,11 +986,12 @@ def extract_skills(text):
     
     return final_validated_skills if final_validated_skills else ["general"]
 
-def extract_keywords(docs):
+def extract_keywords(docs, ctx=None):
     if not docs or not docs[0]:
         return []
     
     text = docs[0]
+    original_text = text
     
     jd_boilerplate_patterns = [
         r'(?i)arc\.dev.*?(?:\n\n|\Z)',
@@ -786,9 +1028,15 @@ def extract_keywords(docs):
     text_lower = text.lower()
     keyword_scores = {}
     
-    if nlp:
-        doc = nlp(text[:100000])
-        for token in doc:
+    if ctx is None and nlp:
+        ctx = DocumentContext(text)
+        boilerplate = []
+    elif ctx is not None:
+        boilerplate = _char_ranges(original_text, jd_boilerplate_patterns + [re.escape(site) for site in source_sites])
+    if ctx is not None:
+        for token in ctx.tokens:
+            if boilerplate and _in_ranges(token.idx - ctx.offset, boilerplate):
+                continue
             if token.pos_ not in ['NOUN', 'PROPN']:
                 continue
             if len(token.text) <= 2:
@@ -799,7 +1047,9 @@ def extract_keywords(docs):
                 normalized = normalize_phrase(token.text)
                 keyword_scores[normalized] = keyword_scores.get(normalized, 0) + 1
         
-        for chunk in doc.noun_chunks:
+        for chunk in ctx.noun_chunks:
+            if boilerplate and _in_ranges(chunk.start_char - ctx.offset, boilerplate):
+                continue
             chunk_text = chunk.text.strip()
             word_count = len(chunk_text.split())
             if 1 <= word_count <= 5:
@@ -817,8 +1067,8 @@ def extract_keywords(docs):
                 normalized = normalize_phrase(phrase)
                 keyword_scores[normalized] = keyword_scores.get(normalized, 0) + 1
     
-    for tech_term in technical_ontology:
-        if tech_term in text_lower:
+    for tech_term in ontology_matcher.terms_in(text_lower, whole_words=False):
+        if tech_term in technical_ontology:
             normalized = normalize_phrase(tech_term)
             keyword_scores[normalized] = keyword_scores.get(normalized, 0) + 5
     
@@ -865,6 +1115,7 @@ def extract_keywords(docs):
         'full', 'time', 'part', 'contract', 'brief', 'description'
     }
     
+    analyze_phrases(list(keyword_scores))
     filtered_keywords = {}
     for keyword, score in keyword_scores.items():
         if score <= 0:
@@ -934,7 +1185,7 @@ def extract_phone(text):
         return digits[-10:] if len(digits) >= 10 else phones[0]
     return ""
 
-def extract_location(text):
+def extract_location(text, ctx=None):
     contact_section = text[:800]
     
     location_pattern = re.search(r'(?i)(?:location|address|city|place)\s*[:|\-|–]\s*([^\n]+)', contact_section)
@@ -943,8 +1194,11 @@ def extract_location(text):
         location_text = re.sub(r'[\(\)\[\]\{\}]', '', location_text)
         location_text = re.sub(r'\s+', ' ', location_text).strip()
         
-        if nlp:
-            doc = nlp(location_text)
+        if ctx is not None:
+            doc = ctx.sub(location_pattern.start(1), location_pattern.end(1)).doc
+        else:
+            doc = nlp(location_text) if nlp else None
+        if doc is not None:
             person_names = [ent.text.lower() for ent in doc.ents if ent.label_ == 'PERSON']
             if person_names:
                 for name in person_names:
@@ -982,8 +1236,8 @@ def extract_location(text):
         if location_text and 5 <= len(location_text) <= 80:
             return location_text
     
-    if nlp:
-        doc = nlp(contact_section)
+    doc = ctx.sub(0, 800).doc if ctx is not None else (nlp(contact_section) if nlp else None)
+    if doc is not None:
         gpe_entities = []
         
         for ent in doc.ents:
@@ -997,7 +1251,7 @@ def extract_location(text):
                                 has_contact_nearby = True
                                 break
                     
-                    if has_contact_nearby or ent.start_char < 300:
+                    if has_contact_nearby or ent.start_char - getattr(doc, 'start_char', 0) < 300:
                         gpe_entities.append(ent.text)
         
         if gpe_entities:
@@ -1009,7 +1263,7 @@ def extract_location(text):
     
     return ""
 
-def extract_name(text):
+def extract_name(text, ctx=None):
     header_text = text[:500]
     
     # Try first line first - often the name is on the very first line
@@ -1030,10 +1284,10 @@ def extract_name(text):
                         return line_clean
     
     # Fallback to NLP entity recognition
-    if nlp:
-        doc = nlp(header_text)
+    doc = ctx.sub(0, 500).doc if ctx is not None else (nlp(header_text) if nlp else None)
+    if doc is not None:
         for ent in doc.ents:
-            if ent.label_ == 'PERSON' and ent.start_char < 300:
+            if ent.label_ == 'PERSON' and ent.start_char - getattr(doc, 'start_char', 0) < 300:
                 words = ent.text.split()
                 if 2 <= len(words) <= 5:
                     is_job_title = any(indicator in ent.text.lower() for indicator in job_title_indicators)
@@ -1230,7 +1484,7 @@ def extract_experience_roles(text):
     
     return roles[:5]
 
-def extract_experience_companies(text):
+def extract_experience_companies(text, ctx=None):
     if not nlp:
         return []
     
@@ -1238,7 +1492,11 @@ def extract_experience_companies(text):
     search_text = experience_section.group() if experience_section else text[:3000]
     
     companies = []
-    doc = nlp(search_text[:10000])
+    if ctx is not None:
+        section_start = experience_section.start() if experience_section else 0
+        doc = ctx.sub(section_start, section_start + len(search_text[:10000])).doc
+    else:
+        doc = nlp(search_text[:10000])
     
     education_keywords = ['university', 'college', 'institute', 'school', 'academy']
     tech_keywords = ['python', 'java', 'react', 'sql', 'aws', 'azure', 'excel', 'tableau']
@@ -1534,10 +1792,9 @@ def extract_experience_entries(text):
             responsibility = line_clean.lstrip('•-* ').strip()
             current_entry['responsibilities'].append(responsibility)
             
-            for tech_term in technical_ontology:
-                if tech_term in responsibility.lower():
-                    if tech_term not in current_entry['skills']:
-                        current_entry['skills'].append(tech_term)
+            for tech_term in sorted(ontology_matcher.terms_in(responsibility.lower(), whole_words=False) & technical_ontology):
+                if tech_term not in current_entry['skills']:
+                    current_entry['skills'].append(tech_term)
         elif nlp and not current_entry['company'] and current_entry['role']:
             doc = nlp(line_clean)
             for ent in doc.ents:
@@ -1569,11 +1826,11 @@ def split_compound_phrases(phrases):
         else:
             words = phrase.lower().split()
             if len(words) >= 2:
-                tech_count = sum(1 for word in words if word in technical_ontology or any(word in tech for tech in technical_ontology))
+                tech_count = sum(1 for word in words if ontology_index.within_term(word))
                 if tech_count >= 2:
                     for word in words:
                         word_clean = word.strip()
-                        if word_clean and len(word_clean) > 1 and (word_clean in technical_ontology or any(word_clean in tech for tech in technical_ontology)):
+                        if word_clean and len(word_clean) > 1 and ontology_index.within_term(word_clean):
                             expanded.add(word_clean)
                     continue
             
@@ -1595,6 +1852,7 @@ def classify_by_ontology_type(phrases):
         if phrase and phrase.lower() != 'general':
             expanded_phrases.append(phrase)
     phrases = split_compound_phrases(expanded_phrases)
+    analyze_phrases([phrase.strip() for phrase in phrases])
     
     for phrase in phrases:
         phrase = phrase.strip()
@@ -1622,14 +1880,8 @@ def classify_by_ontology_type(phrases):
             continue
         
         exact_match = phrase_normalized in technical_ontology
-        if not exact_match:
-            has_match = False
-            for tech in technical_ontology:
-                if tech == phrase_normalized:
-                    has_match = True
-                    break
-            if not has_match and len(phrase_words) > 1:
-                continue
+        if not exact_match and len(phrase_words) > 1:
+            continue
         
         if skill_type == 'programming_language':
             if phrase_normalized not in classified['frameworks'] and phrase_normalized not in classified['databases']:
@@ -1713,7 +1965,9 @@ def classify_jd_keywords(phrases, jd_text):
     }
     
     jd_lower = jd_text.lower()
+    jd_terms = ontology_matcher.terms_in(jd_lower)
     phrases = split_compound_phrases(phrases)
+    analyze_phrases([phrase.strip() for phrase in phrases])
     
     for phrase in phrases:
         phrase = phrase.strip()
@@ -1721,8 +1975,10 @@ def classify_jd_keywords(phrases, jd_text):
             continue
         
         phrase_lower = phrase.lower()
-        phrase_pattern = r'\b' + re.escape(phrase_lower) + r'\b'
-        if not re.search(phrase_pattern, jd_lower):
+        if phrase_lower in ontology_matcher.vocabulary:
+            if phrase_lower not in jd_terms:
+                continue
+        elif not re.search(r'\b' + re.escape(phrase_lower) + r'\b', jd_lower):
             continue
         
         if not is_valid_technical_skill(phrase):
@@ -1746,14 +2002,8 @@ def classify_jd_keywords(phrases, jd_text):
             continue
         
         exact_match = phrase_normalized in technical_ontology
-        if not exact_match:
-            has_match = False
-            for tech in technical_ontology:
-                if tech == phrase_normalized:
-                    has_match = True
-                    break
-            if not has_match and len(phrase_words) > 1:
-                continue
+        if not exact_match and len(phrase_words) > 1:
+            continue
         
         if skill_type == 'programming_language':
             if phrase_normalized not in classified['frameworks'] and phrase_normalized not in classified['databases']:
@@ -1868,10 +2118,11 @@ def clean_extracted_list(items, max_items=10):
     
     return cleaned[:max_items]
 
-def parse_resume_structured(text):
-    sanitized = sanitize_resume_text(text)
+def parse_resume_structured(text, ctx=None):
+    if ctx is None:
+        ctx = DocumentContext(text)
     
-    all_skills = extract_skills(text)
+    all_skills = extract_skills(text, ctx=ctx)
     
     classified = classify_by_ontology_type(all_skills)
     
@@ -1907,7 +2158,7 @@ def parse_resume_structured(text):
     raw_fields = extract_education_fields(text)
     raw_institutions = extract_institutions(text)
     raw_roles = extract_experience_roles(text)
-    raw_companies = extract_experience_companies(text)
+    raw_companies = extract_experience_companies(text, ctx=ctx)
     raw_projects = extract_projects(text)
     raw_certs = extract_certifications(text)
     
@@ -1915,10 +2166,10 @@ def parse_resume_structured(text):
     experience_entries = extract_experience_entries(text)
     
     resume_data = {
-        'candidate_name': extract_name(text),
+        'candidate_name': extract_name(text, ctx=ctx),
         'email': extract_email(text),
         'phone': extract_phone(text),
-        'location': extract_location(text),
+        'location': extract_location(text, ctx=ctx),
         'technical_skills': classified['technical_skills'][:15],
         'programming_languages': classified['languages'][:10],
         'frameworks': classified['frameworks'][:10],
@@ -1942,7 +2193,7 @@ def parse_resume_structured(text):
     project_section_match = re.search(r'(?i)projects?.*?(?=\n[A-Z]|\Z)', text, re.DOTALL)
     if project_section_match:
         project_section = project_section_match.group()
-        project_skills = extract_skills(project_section)
+        project_skills = extract_skills(project_section, ctx=ctx.sub(project_section_match.start(), project_section_match.end()))
         project_classified = classify_by_ontology_type(project_skills)
         all_project_tech = (
             project_classified['technical_skills'] +
@@ -1955,8 +2206,11 @@ def parse_resume_structured(text):
     
     return resume_data
 
-def parse_jd_structured(text):
-    all_keywords = extract_keywords([text])
+def parse_jd_structured(text, ctx=None):
+    if ctx is None:
+        ctx = DocumentContext(text)
+    
+    all_keywords = extract_keywords([text], ctx=ctx)
     
     classified = classify_jd_keywords(all_keywords, text)
     
@@ -2117,7 +2371,7 @@ def parse_jd_structured(text):
     responsibility_tech_terms = []
     if responsibilities_section:
         resp_text = responsibilities_section.group()
-        resp_skills = extract_keywords([resp_text])
+        resp_skills = extract_keywords([resp_text], ctx=ctx.sub(responsibilities_section.start(), responsibilities_section.end()))
         resp_classified = classify_jd_keywords(resp_skills, text)
         responsibility_tech_terms = (
             resp_classified['technical_skills'] +
@@ -2130,7 +2384,7 @@ def parse_jd_structured(text):
     nice_to_have_skills = []
     if nice_to_have_section:
         nice_section_text = nice_to_have_section.group()
-        nice_skills = extract_keywords([nice_section_text])
+        nice_skills = extract_keywords([nice_section_text], ctx=ctx.sub(nice_to_have_section.start(), nice_to_have_section.end()))
         nice_classified = classify_jd_keywords(nice_skills, text)
         nice_to_have_skills = (
             nice_classified['technical_skills'] +
@@ -3,20 +3,8 @@ import unicodedata
 import math
 from collections import Counter
 from sklearn.feature_extraction.text import TfidfVectorizer
-try:
-    import spacy
-    # spaCy loader globally
-    try:
-        # Model needing parser (for noun chunks and sents) and ner
-        nlp = spacy.load("en_core_web_sm", disable=["attribute_ruler", "lemmatizer", "morphologizer", "textcat"])
-    except Exception:
-        try:
-            nlp = spacy.blank("en")
-        except Exception:
-            nlp = None
-except Exception:
-    spacy = None
-    nlp = None
+# Shares the model loaded by nlp_engine (parser for noun chunks and sents, ner) instead of loading a second copy
+from .nlp_engine import analyze_phrases, nlp
 
 def get_spacy_model():
     return nlp
@@ -125,19 +113,33 @@ def normalize_whitespace(text):
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-def segment_sentences(text):
+def segment_sentences(text, ctx=None):
+    if ctx is not None and ctx.doc is not None:
+        return [sent.text.strip() for sent in ctx.sents]
     if not nlp:
         sentences = re.split(r'[.!?]+', text)
         return [s.strip() for s in sentences if s.strip()]
     doc = nlp(text[:1000000])
     return [sent.text.strip() for sent in doc.sents]
 
-def tokenize_text(text):
+def tokenize_text(text, ctx=None):
+    if ctx is not None and ctx.doc is not None:
+        return [piece for piece, _ in doc_token_pieces(ctx.doc)]
     if not nlp:
         return text.split()
     doc = nlp(text[:1000000])
     return [token.text for token in doc]
 
+def doc_token_pieces(doc):
+    # Applies the preprocess_text normalisation per token of an already parsed Doc
+    pieces = []
+    for token in doc:
+        cleaned = normalize_whitespace(cleanup_special_chars(lowercase_text(normalize_unicode(token.text))))
+        parts = cleaned.split()
+        for part in parts:
+            pieces.append((part, token.lemma_ if len(parts) == 1 else part))
+    return pieces
+
 def remove_stopwords(tokens):
     return [token for token in tokens if token.lower() not in combined_stopwords or token.lower() in technical_whitelist]
 
@@ -153,7 +155,12 @@ def filter_short_tokens(tokens, min_length=2):
 def filter_numeric_tokens(tokens):
     return [token for token in tokens if not token.isdigit()]
 
-def preprocess_text(text):
+def keep_token(token):
+    if token.lower() in combined_stopwords and token.lower() not in technical_whitelist:
+        return False
+    return len(token) >= 2 and not token.isdigit()
+
+def preprocess_text(text, ctx=None):
     if not text:
         return {
             "clean_tokens": [],
@@ -161,6 +168,19 @@ def preprocess_text(text):
             "reconstructed_clean_text": ""
         }
     
+    if ctx is not None:
+        if 'preprocessed' in ctx.cache:
+            return ctx.cache['preprocessed']
+        if ctx.doc is not None:
+            pairs = [(token, lemma) for token, lemma in doc_token_pieces(ctx.doc) if keep_token(token)]
+            tokens = [token for token, _ in pairs]
+            ctx.cache['preprocessed'] = {
+                "clean_tokens": tokens,
+                "lemmatized_tokens": [lemma for _, lemma in pairs],
+                "reconstructed_clean_text": ' '.join(tokens)
+            }
+            return ctx.cache['preprocessed']
+    
     text = normalize_unicode(text)
     text = lowercase_text(text)
     text = cleanup_special_chars(text)
@@ -175,17 +195,20 @@ def preprocess_text(text):
     
     reconstructed = ' '.join(tokens)
     
-    return {
+    result = {
         "clean_tokens": tokens,
         "lemmatized_tokens": lemmatized,
         "reconstructed_clean_text": reconstructed
     }
+    if ctx is not None:
+        ctx.cache['preprocessed'] = result
+    return result
 
-def extract_skills_hybrid(text):
+def extract_skills_hybrid(text, ctx=None):
     if not text:
         return []
     
-    processed = preprocess_text(text)
+    processed = preprocess_text(text, ctx=ctx)
     lemmatized = processed['lemmatized_tokens']
     
     skill_set = set()
@@ -194,9 +217,9 @@ def extract_skills_hybrid(text):
         if token in technical_whitelist:
             skill_set.add(token)
     
-    if nlp:
-        doc = nlp(text[:1000000])
-        for chunk in doc.noun_chunks:
+    doc = ctx.doc if ctx is not None else (nlp(text[:1000000]) if nlp else None)
+    if doc is not None:
+        for chunk in (ctx.noun_chunks if ctx is not None else doc.noun_chunks):
             chunk_lower = chunk.text.lower()
             words = chunk_lower.split()
             if 1 <= len(words) <= 4:
@@ -215,15 +238,10 @@ def extract_skills_hybrid(text):
                     skill_set.add(ent_lower)
     
     validated_skills = []
+    phrase_info = analyze_phrases(sorted(skill_set))
     for skill in skill_set:
         words = skill.split()
-        has_verb = False
-        if nlp:
-            skill_doc = nlp(skill)
-            for token in skill_doc:
-                if token.pos_ == 'VERB':
-                    has_verb = True
-                    break
+        has_verb = skill in phrase_info and phrase_info[skill].has_verb
         
         stopword_count = sum(1 for w in words if w in combined_stopwords)
         stopword_heavy = len(words) > 0 and (stopword_count / len(words)) > 0.5
@@ -233,11 +251,11 @@ def extract_skills_hybrid(text):
     
     return sorted(list(set(validated_skills)))[:30]
 
-def extract_keywords_hybrid(text):
+def extract_keywords_hybrid(text, ctx=None):
     if not text:
         return []
     
-    processed = preprocess_text(text)
+    processed = preprocess_text(text, ctx=ctx)
     lemmatized = processed['lemmatized_tokens']
     
     keyword_set = set()
@@ -246,9 +264,9 @@ def extract_keywords_hybrid(text):
         if token in technical_whitelist:
             keyword_set.add(token)
     
-    if nlp:
-        doc = nlp(text[:1000000])
-        for chunk in doc.noun_chunks:
+    doc = ctx.doc if ctx is not None else (nlp(text[:1000000]) if nlp else None)
+    if doc is not None:
+        for chunk in (ctx.noun_chunks if ctx is not None else doc.noun_chunks):
             chunk_lower = chunk.text.lower()
             words = chunk_lower.split()
             if 1 <= len(words) <= 4:
@@ -261,15 +279,10 @@ def extract_keywords_hybrid(text):
                     keyword_set.add(chunk_lower)
     
     validated_keywords = []
+    phrase_info = analyze_phrases(sorted(keyword_set))
     for keyword in keyword_set:
         words = keyword.split()
-        has_verb = False
-        if nlp:
-            kw_doc = nlp(keyword)
-            for token in kw_doc:
-                if token.pos_ == 'VERB':
-                    has_verb = True
-                    break
+        has_verb = keyword in phrase_info and phrase_info[keyword].has_verb
         
         stopword_count = sum(1 for w in words if w in combined_stopwords)
         stopword_heavy = len(words) > 0 and (stopword_count / len(words)) > 0.5
@@ -0,0 +1,126 @@
+from collections import Counter, deque
+
+
+def is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+def has_word_boundary(text, pos):
+    # Same test as the regex \b assertion at text position pos
+    before = pos > 0 and is_word_char(text[pos - 1])
+    after = pos < len(text) and is_word_char(text[pos])
+    return before != after
+
+
+class OntologyMatcher:
+    """Aho-Corasick automaton that finds every ontology term in a text in one linear pass."""
+
+    def __init__(self, terms):
+        self.vocabulary = frozenset(term for term in terms if term)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for term in sorted(self.vocabulary):
+            self._add(term)
+        self._link()
+
+    def _add(self, term):
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = nxt
+        self._output[state] = self._output[state] + (term,)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def iter_matches(self, text, whole_words=True):
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+            end = i + 1
+            for term in output[state]:
+                start = end - len(term)
+                if whole_words and not (has_word_boundary(text, start) and has_word_boundary(text, end)):
+                    continue
+                yield start, end, term
+
+    def find_all(self, text, whole_words=True):
+        # Occurrences of one term never overlap, mirroring re.findall(r'\bterm\b', text)
+        last_end = {}
+        matches = []
+        for start, end, term in self.iter_matches(text, whole_words):
+            if start < last_end.get(term, 0):
+                continue
+            last_end[term] = end
+            matches.append((start, end, term))
+        matches.sort()
+        return matches
+
+    def count_terms(self, text, whole_words=True):
+        return Counter(term for _, _, term in self.find_all(text, whole_words))
+
+    def terms_in(self, text, whole_words=True):
+        return {term for _, _, term in self.iter_matches(text, whole_words)}
+
+
+class OntologyIndex:
+    """Precomputed lookups over a typed ontology so phrase checks never scan every term.
+
+    ``contains_term`` answers "does the text contain an ontology term" via the
+    automaton, ``within_term`` answers "is the text part of an ontology term" via a
+    hash of every term substring. Types keep the order of the typed ontology.
+    """
+
+    def __init__(self, typed_terms):
+        self.types = list(typed_terms)
+        self.matcher = OntologyMatcher(set().union(*typed_terms.values()))
+        self._term_rank = {}
+        self._substring_rank = {}
+        for rank, terms in enumerate(typed_terms.values()):
+            for term in sorted(terms):
+                self._term_rank.setdefault(term, rank)
+                for i in range(len(term) + 1):
+                    for j in range(i, len(term) + 1):
+                        self._substring_rank.setdefault(term[i:j], rank)
+
+    def contains_term(self, text):
+        for _ in self.matcher.iter_matches(text, whole_words=False):
+            return True
+        return False
+
+    def within_term(self, text):
+        return text in self._substring_rank
+
+    def term_type(self, term):
+        rank = self._term_rank.get(term)
+        return self.types[rank] if rank is not None else None
+
+    def related_type(self, text):
+        # First type owning a term that contains the text or is contained in it
+        ranks = [self._term_rank[term] for term in self.matcher.terms_in(text, whole_words=False)]
+        if text in self._substring_rank:
+            ranks.append(self._substring_rank[text])
+        return self.types[min(ranks)] if ranks else None
@@ -0,0 +1,188 @@
+import hashlib
+import threading
+
+# Taxonomy categories compare_profiles scores on, in classify_skill's precedence order
+CORE_SKILL_CATEGORIES = ['languages', 'frameworks', 'tools', 'databases']
+COMPARISON_CATEGORIES = CORE_SKILL_CATEGORIES + ['libraries', 'concepts']
+# Terms classify_skills_by_taxonomy drops before and after canonicalization
+JUNK_SKILL_TERMS = {'general', 'dev', 'development', 'programming', 'coding', 'scripting',
+                    'software', 'web', 'application', 'system', 'technology'}
+RESOLVE_CACHE_SIZE = 50000
+
+
+class SkillRegistry:
+    """Every canonical skill known to any engine, compiled to integer IDs.
+
+    IDs follow sorted canonical names, so they are stable for a given set of
+    skill tables; `version` fingerprints those tables. Each skill carries a
+    bitmask of every category some engine files it under and its aliases.
+    """
+
+    def __init__(self, canonical_map, categorized_sources):
+        self.canonical_map = canonical_map
+        skill_categories = {}
+        for categories in categorized_sources:
+            for category, skills in categories.items():
+                for skill in skills:
+                    canonical = self.canonicalize(skill)
+                    if canonical:
+                        skill_categories.setdefault(canonical, []).append(category)
+        for alias, canonical in canonical_map.items():
+            skill_categories.setdefault(canonical, [])
+
+        self.names = sorted(skill_categories)
+        self.ids = {name: skill_id for skill_id, name in enumerate(self.names)}
+        self.category_bits = {}
+        self.masks = []
+        for name in self.names:
+            mask = 0
+            for category in skill_categories[name]:
+                if category not in self.category_bits:
+                    self.category_bits[category] = 1 << len(self.category_bits)
+                mask |= self.category_bits[category]
+            self.masks.append(mask)
+
+        self.aliases = [[] for _ in self.names]
+        for alias, canonical in canonical_map.items():
+            if alias != canonical:
+                self.aliases[self.ids[canonical]].append(alias)
+
+        # Bitset of the skills classify_skill puts in each comparison category
+        self.category_sets = {category: 0 for category in COMPARISON_CATEGORIES}
+        for skill_id, mask in enumerate(self.masks):
+            for category in COMPARISON_CATEGORIES:
+                if mask & self.category_bits.get(category, 0):
+                    self.category_sets[category] |= 1 << skill_id
+                    break
+        self.core_set = 0
+        for category in CORE_SKILL_CATEGORIES:
+            self.core_set |= self.category_sets[category]
+        for name in JUNK_SKILL_TERMS:
+            if name in self.ids:
+                self.core_set &= ~(1 << self.ids[name])
+
+        fingerprint = hashlib.sha1()
+        for name, mask, aliases in zip(self.names, self.masks, self.aliases):
+            fingerprint.update(f"{name}\0{mask}\0{','.join(sorted(aliases))}\n".encode("utf-8"))
+        fingerprint.update(repr(sorted(self.category_bits.items(), key=lambda c: c[1])).encode("utf-8"))
+        self.version = fingerprint.hexdigest()[:12]
+
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def canonicalize(self, skill):
+        if not skill:
+            return None
+        skill_lower = skill.lower().strip()
+        return self.canonical_map.get(skill_lower, skill_lower)
+
+    def core_skill_id(self, skill):
+        """ID of a raw skill string if compare_profiles counts it as a core skill."""
+        skill_id = self._resolved.get(skill, -1)
+        if skill_id != -1:
+            return skill_id
+        skill_id = None
+        # Same steps as normalize_and_canonicalize_skills followed by classify_skills_by_taxonomy
+        canonical = self.canonicalize(skill)
+        if canonical and canonical not in JUNK_SKILL_TERMS:
+            canonical = self.canonicalize(canonical)
+            candidate = self.ids.get(canonical) if canonical not in JUNK_SKILL_TERMS else None
+            if candidate is not None and self.core_set >> candidate & 1:
+                skill_id = candidate
+        with self._lock:
+            if len(self._resolved) >= RESOLVE_CACHE_SIZE:
+                self._resolved.clear()
+            self._resolved[skill] = skill_id
+        return skill_id
+
+    def core_skills(self, skills):
+        """Bitset of the canonical core skills in a raw skill list."""
+        bits = 0
+        for skill in skills:
+            if skill:
+                skill_id = self.core_skill_id(skill)
+                if skill_id is not None:
+                    bits |= 1 << skill_id
+        return SkillBitset(bits)
+
+    def get_stats(self):
+        return {
+            "version": self.version,
+            "skills": len(self.names),
+            "categories": len(self.category_bits),
+            "aliases": sum(len(a) for a in self.aliases),
+            "resolved_cache": len(self._resolved)
+        }
+
+
+class SkillBitset:
+    """Set of registry skills packed into one int; intersections and counts are integer operations."""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits=0):
+        self.bits = bits
+
+    def __and__(self, other):
+        return SkillBitset(self.bits & other.bits)
+
+    def __sub__(self, other):
+        return SkillBitset(self.bits & ~other.bits)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __eq__(self, other):
+        return isinstance(other, SkillBitset) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __iter__(self):
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def in_category(self, category):
+        """Skills compare_profiles classifies under category (languages, frameworks, ...)."""
+        return SkillBitset(self.bits & get_skill_registry().category_sets[category])
+
+    def names(self):
+        # IDs follow sorted names, so this is already in sorted order
+        names = get_skill_registry().names
+        return [names[skill_id] for skill_id in self]
+
+    def __repr__(self):
+        return f"SkillBitset({self.names()})"
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_skill_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                # Imported here: these modules import comparison_engine, which imports this one
+                from .comparison_engine import CANONICAL_SKILL_MAP, SKILL_TAXONOMY
+                from .nlp_engine import typed_technical_ontology
+                from .nlp_preprocessing import tech_specific_ontology
+                from .suggestion_engine import SKILL_CO_OCCURRENCE_MAP
+                co_occurrence = {
+                    "co_occurrence": set(SKILL_CO_OCCURRENCE_MAP),
+                    "co_occurrence_related": {s for related in SKILL_CO_OCCURRENCE_MAP.values() for s in related}
+                }
+                _registry = SkillRegistry(
+                    CANONICAL_SKILL_MAP,
+                    [SKILL_TAXONOMY, typed_technical_ontology, tech_specific_ontology, co_occurrence]
+                )
+    return _registry
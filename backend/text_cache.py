@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .text_extraction import EXTRACTOR_VERSION, extract_text_with_metadata
+
+TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "1") == "1"
+# Runtime state, never the source tree; point it at a persistent volume to keep entries across restarts
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "skillmatch", "text_cache"))
+TEXT_CACHE_MAX_MB = int(os.getenv("TEXT_CACHE_MAX_MB", "256"))
+TEXT_CACHE_TTL_DAYS = float(os.getenv("TEXT_CACHE_TTL_DAYS", "30"))
+# Optional shared tier so every worker and replica benefits from one extraction
+TEXT_CACHE_MONGO = os.getenv("TEXT_CACHE_MONGO", "0") == "1"
+
+
+def text_cache_key(data, ext):
+    return f"{hashlib.sha256(data).hexdigest()}-{ext}-v{EXTRACTOR_VERSION}"
+
+
+class TextCache:
+    """Content-addressed cache of extracted document text.
+
+    The disk tier keeps one JSON file per key, refreshes mtime on every hit and
+    evicts least recently used files once the directory grows past max_bytes.
+    The optional MongoDB tier relies on a TTL index for expiry. Entries older
+    than the TTL are ignored by both tiers.
+    """
+
+    def __init__(self, directory=TEXT_CACHE_DIR, max_bytes=TEXT_CACHE_MAX_MB * 1024 * 1024,
+                 ttl_seconds=TEXT_CACHE_TTL_DAYS * 86400, use_mongo=TEXT_CACHE_MONGO):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.use_mongo = use_mongo
+        self.stats = {"disk_hits": 0, "mongo_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self._mongo_indexed = False
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _scan(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _mongo_collection(self):
+        from .mongodb import extracted_text_cache_collection
+        collection = extracted_text_cache_collection()
+        if not self._mongo_indexed:
+            collection.create_index("created_at", expireAfterSeconds=int(self.ttl_seconds))
+            self._mongo_indexed = True
+        return collection
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if time.time() - entry["created_at"] <= self.ttl_seconds:
+                os.utime(path)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                return entry, "disk"
+            self._remove(path)
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+        if self.use_mongo:
+            try:
+                doc = self._mongo_collection().find_one({"_id": key})
+                if doc and datetime.utcnow() - doc["created_at"] <= timedelta(seconds=self.ttl_seconds):
+                    entry = {"text": doc["text"], "meta": doc.get("meta", {}), "created_at": time.time()}
+                    self._write_disk(key, entry)
+                    with self._lock:
+                        self.stats["mongo_hits"] += 1
+                    return entry, "mongo"
+            except Exception as e:
+                print(f"Text cache MongoDB read warning: {str(e)}")
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None, None
+
+    def put(self, key, text, meta):
+        entry = {"text": text, "meta": meta, "created_at": time.time()}
+        self._write_disk(key, entry)
+        if self.use_mongo:
+            try:
+                self._mongo_collection().replace_one(
+                    {"_id": key},
+                    {"_id": key, "text": text, "meta": meta, "created_at": datetime.utcnow()},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"Text cache MongoDB write warning: {str(e)}")
+
+    def _write_disk(self, key, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            # Write then rename so concurrent workers never read a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Text cache disk write warning: {str(e)}")
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(s for _, s, _ in self._scan())
+            else:
+                self._disk_bytes += size
+            over_budget = self._disk_bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        # Drop expired entries, then least recently used ones until 90% of the budget is free
+        now = time.time()
+        entries = sorted(self._scan())
+        total = sum(s for _, s, _ in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for mtime, size, path in entries:
+            if total <= target and now - mtime <= self.ttl_seconds:
+                continue
+            self._remove(path)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.stats["evictions"] += evicted
+
+    def get_stats(self, scan_disk=True):
+        with self._lock:
+            stats = dict(self.stats)
+        if not scan_disk:
+            return stats
+        entries = self._scan()
+        stats.update({
+            "disk_entries": len(entries),
+            "disk_bytes": sum(s for _, s, _ in entries),
+            "max_bytes": self.max_bytes,
+            "mongo_tier": self.use_mongo
+        })
+        return stats
+
+
+_text_cache = None
+
+def get_text_cache():
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = TextCache()
+    return _text_cache
+
+
+def extract_text_cached(data, ext):
+    if not TEXT_CACHE_ENABLED:
+        return extract_text_with_metadata(data, ext)
+    start = time.perf_counter()
+    cache = get_text_cache()
+    key = text_cache_key(data, ext)
+    entry, source = cache.get(key)
+    if entry is not None:
+        meta = dict(entry.get("meta", {}))
+        meta["cache"] = source
+        meta["extraction_wall_time_ms"] = meta.get("wall_time_ms")
+        meta["wall_time_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return entry["text"], meta
+    text, meta = extract_text_with_metadata(data, ext)
+    cache.put(key, text, meta)
+    meta = dict(meta)
+    meta["cache"] = "miss"
+    return text, meta
@@ -0,0 +1,282 @@
+import io
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import pdfplumber
+import docx
+import pytesseract
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps
+try:
+    import fitz # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Bump whenever extraction output can change; cached texts from older versions are then ignored
+EXTRACTOR_VERSION = "2"
+
+# Threads shared by every document for per-page OCR; tesseract and cv2 release the GIL
+PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", "4"))
+# Pages of a single document processed at once, so one long scan cannot take every thread
+PDF_PAGE_CONCURRENCY = int(os.getenv("PDF_PAGE_CONCURRENCY", "4"))
+
+_page_executor = None
+
+def get_page_executor():
+    global _page_executor
+    if _page_executor is None:
+        _page_executor = ThreadPoolExecutor(max_workers=max(PDF_PAGE_WORKERS, 1), thread_name_prefix="pdf-page")
+    return _page_executor
+
+def map_pages_ordered(func, page_numbers, limit=PDF_PAGE_CONCURRENCY):
+    # Yields func(page) in page order as soon as each page and all pages before it are done
+    executor = get_page_executor()
+    pending = deque()
+    for page_num in page_numbers:
+        if len(pending) >= max(limit, 1):
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, page_num))
+    while pending:
+        yield pending.popleft().result()
+
+def set_pytesseract_path():
+    import pytesseract
+    import platform
+    if platform.system() == 'Windows':
+        pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+def preprocess_image_for_ocr(image):
+    if image.mode != 'L':
+        image = image.convert('L')
+    
+    width, height = image.size
+    if width < 1500:
+        scale = 1500 / width
+        new_width = int(width * scale)
+        new_height = int(height * scale)
+        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    
+    import numpy as np
+    img_array = np.array(image)
+    
+    try:
+        import cv2
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        img_array = clahe.apply(img_array)
+        
+        img_array = cv2.fastNlMeansDenoising(img_array, None, 10, 7, 21)
+        
+        img_array = cv2.adaptiveThreshold(
+            img_array, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            cv2.THRESH_BINARY, 11, 2
+        )
+        
+        image = Image.fromarray(img_array)
+    except ImportError:
+        enhancer = ImageEnhance.Contrast(image)
+        image = enhancer.enhance(2.5)
+        
+        enhancer = ImageEnhance.Sharpness(image)
+        image = enhancer.enhance(2.0)
+        
+        enhancer = ImageEnhance.Brightness(image)
+        image = enhancer.enhance(1.2)
+        
+        from PIL import ImageOps
+        image = ImageOps.autocontrast(image, cutoff=2)
+        
+        image = image.filter(ImageFilter.MedianFilter(size=3))
+    
+    return image
+
+def is_text_quality_good(text):
+    if not text or len(text) < 50:
+        return False
+    
+    total_chars = len(text)
+    alpha_chars = sum(c.isalpha() or c.isspace() for c in text)
+    alpha_ratio = alpha_chars / total_chars if total_chars > 0 else 0
+    
+    if alpha_ratio < 0.7:
+        return False
+    
+    words = text.split()
+    if len(words) < 10:
+        return False
+    
+    avg_word_length = sum(len(w) for w in words) / len(words) if words else 0
+    if avg_word_length < 3 or avg_word_length > 15:
+        return False
+    
+    garbled_patterns = [
+        r'[a-z]{15,}',
+        r'\b[bcdfghjklmnpqrstvwxyz]{5,}\b',
+        r'[wxy]{3,}',
+        r'\b[a-z]{2,3}[wxy]{2,}[a-z]{2,3}\b',
+    ]
+    
+    garbled_count = 0
+    for pattern in garbled_patterns:
+        matches = re.findall(pattern, text.lower())
+        garbled_count += len(matches)
+    
+    if len(words) > 0 and garbled_count > len(words) * 0.15:
+        return False
+    
+    common_words = ['the', 'and', 'to', 'of', 'a', 'in', 'for', 'is', 'on', 'with', 'experience', 'skills', 'education', 'work', 'at', 'by', 'from', 'as', 'about', 'have', 'has', 'had', 'was', 'were', 'been', 'be', 'are', 'am']
+    common_word_count = sum(1 for word in words if word.lower() in common_words)
+    if len(words) > 30 and common_word_count < 3:
+        return False
+    
+    vowel_count = sum(1 for c in text.lower() if c in 'aeiou')
+    consonant_count = sum(1 for c in text.lower() if c.isalpha() and c not in 'aeiou')
+    if consonant_count > 0:
+        vowel_ratio = vowel_count / consonant_count
+        if vowel_ratio < 0.25 or vowel_ratio > 2.0:
+            return False
+    
+    return True
+
+def ocr_pdf_page(file_bytes, page_num):
+    pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
+    try:
+        page = pdf_document[page_num]
+        
+        mat = fitz.Matrix(2.0, 2.0)
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+        
+        img_bytes = pix.tobytes("png")
+    finally:
+        pdf_document.close()
+    img = Image.open(io.BytesIO(img_bytes))
+    
+    processed_img = preprocess_image_for_ocr(img)
+    
+    return pytesseract.image_to_string(
+        processed_img,
+        lang='eng',
+        config='--psm 6 --oem 3 -c preserve_interword_spaces=1'
+    )
+
+def read_pdf(file, meta=None):
+    if meta is None:
+        meta = {}
+    text = ""
+    file_bytes = file.read()
+    file.seek(0)
+    
+    start = time.perf_counter()
+    # Serial from one handle: pdfminer is pure Python and holds the GIL, so page threads would not help here
+    try:
+        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+            meta['pages'] = len(pdf.pages)
+            for page in pdf.pages:
+                t = page.extract_text()
+                # Drops the page's parsed layout so long documents do not keep every page in memory
+                page.close()
+                if t:
+                    text += t + " "
+    except Exception:
+        pass
+    meta['text_layer_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    meta['method'] = 'text_layer'
+    
+    if is_text_quality_good(text):
+        return text
+    
+    print(f"PDF text quality check failed. Extracted text length: {len(text)}")
+    print(f"Sample text: {text[:200] if text else 'No text'}")
+    
+    try:
+        if not fitz:
+            raise ImportError("PyMuPDF (fitz) not installed")
+        
+        pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
+        page_count = len(pdf_document)
+        pdf_document.close()
+        ocr_text = ""
+        
+        start = time.perf_counter()
+        for page_text in map_pages_ordered(lambda n: ocr_pdf_page(file_bytes, n), range(page_count)):
+            ocr_text += page_text + " "
+        meta['ocr_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        meta['ocr_pages'] = page_count
+        
+        print(f"OCR text length: {len(ocr_text)}")
+        print(f"OCR sample: {ocr_text[:200] if ocr_text else 'No OCR text'}")
+        
+        ocr_quality_ok = is_text_quality_good(ocr_text)
+        original_quality_ok = is_text_quality_good(text)
+        
+        if not ocr_quality_ok and not original_quality_ok:
+            raise Exception(
+                "Unable to extract readable text from PDF. This may be due to:\n"
+                "1. Poor scan quality (try rescanning at higher resolution)\n"
+                "2. Image-based PDF without proper text layer\n"
+                "3. Unusual fonts or encoding\n"
+                "Please provide a text-based PDF or higher quality scan."
+            )
+        
+        if ocr_quality_ok and not original_quality_ok:
+            meta['method'] = 'ocr'
+            return ocr_text
+        elif original_quality_ok and not ocr_quality_ok:
+            return text
+        elif ocr_quality_ok and original_quality_ok:
+            if len(ocr_text) > len(text):
+                meta['method'] = 'ocr'
+                return ocr_text
+            return text
+        elif len(ocr_text) > len(text) and len(ocr_text) > 100:
+            print("⚠️ WARNING: OCR text quality is poor but using it anyway (better than extracted text)")
+            meta['method'] = 'ocr'
+            return ocr_text
+        else:
+            print("⚠️ WARNING: Using extracted text despite poor quality")
+            if not text:
+                meta['method'] = 'ocr'
+            return text if text else ocr_text
+    except ImportError as e:
+        print(f"PyMuPDF import error: {e}")
+        if text:
+            return text
+        raise Exception("PyMuPDF not installed. Please install: pip install PyMuPDF")
+    except Exception as e:
+        print(f"OCR error: {str(e)}")
+        if text:
+            return text
+        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+def read_docx(file):
+    d = docx.Document(file)
+    return " ".join([p.text for p in d.paragraphs])
+
+def read_txt(file):
+    return file.read().decode('utf-8', errors='ignore')
+
+def read_image(file):
+    img = Image.open(file)
+    img = preprocess_image_for_ocr(img)
+    text = pytesseract.image_to_string(img, config='--psm 6 --oem 3')
+    return text
+
+def extract_text(file, ext, meta=None):
+    if ext == "pdf":
+        return read_pdf(file, meta)
+    elif ext == "docx":
+        return read_docx(file)
+    else:
+        set_pytesseract_path()
+        return read_image(file)
+
+def extract_text_from_bytes(data, ext):
+    # Picklable entry point for worker processes, which receive the upload as bytes
+    return extract_text(io.BytesIO(data), ext)
+
+def extract_text_with_metadata(data, ext):
+    meta = {'format': ext, 'bytes': len(data)}
+    start = time.perf_counter()
+    text = extract_text(io.BytesIO(data), ext, meta)
+    meta['wall_time_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return text, meta
@@ -0,0 +1,215 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .analysis_engine import get_analysis_engine
+from .nlp_engine import get_phrase_cache_stats
+from .text_cache import get_text_cache
+from .jd_cache import get_jd_cache
+from .skill_registry import get_skill_registry
+
+# Worker processes running extraction + NLP; 0 runs jobs on a single background thread instead
+ANALYSIS_POOL_WORKERS = int(os.getenv("ANALYSIS_POOL_WORKERS", "2"))
+# Jobs allowed to wait for a free worker before new requests are turned away
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "8"))
+ANALYSIS_RETRY_AFTER = int(os.getenv("ANALYSIS_RETRY_AFTER", "5"))
+
+
+class PoolSaturated(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Analysis queue is full")
+        self.retry_after = retry_after
+
+
+class PoolUnavailable(Exception):
+    pass
+
+
+def _init_worker():
+    # Runs once per worker process: loads spaCy and the ontology state, then freezes it
+    get_analysis_engine().warm_up()
+
+
+def cache_stats(scan_disk=True):
+    """Stats of the caches the analysis jobs use, as seen by the calling process."""
+    return {
+        "phrase_cache": get_phrase_cache_stats(),
+        "text_cache": get_text_cache().get_stats(scan_disk=scan_disk),
+        "jd_cache": get_jd_cache().get_stats(),
+        "skill_registry": get_skill_registry().get_stats()
+    }
+
+
+def _run_job(func, args, kwargs):
+    engine = get_analysis_engine()
+    in_worker = multiprocessing.parent_process() is not None
+    try:
+        result = func(engine, *args, **kwargs)
+    finally:
+        # Worker processes apply the engine's GC policy themselves; in thread mode the web process does
+        if in_worker:
+            engine.finish_request()
+    # The caches live in the worker, so each result carries that worker's counters back (no disk scan)
+    return result, (os.getpid(), cache_stats(scan_disk=False)) if in_worker else None
+
+
+def _analyze_documents(engine, *args, **kwargs):
+    return engine.analyze_documents(*args, **kwargs)
+
+
+def _extract_documents(engine, *args, **kwargs):
+    return engine.extract_documents(*args, **kwargs)
+
+
+def _analyze_texts(engine, *args, **kwargs):
+    return engine.analyze_texts(*args, **kwargs)
+
+
+def _prepare_jd(engine, jd_text=None, jd_bytes=None, jd_ext=None):
+    timings = {}
+    extraction_metadata = {}
+    if jd_bytes is not None:
+        jd_text, extraction_metadata['job_description'] = engine.run_stage("jd_extraction", engine.extract_text, jd_bytes, jd_ext, timings=timings)
+    jd_profile, source, jd_hash = engine.analyze_jd(jd_text, timings=timings)
+    extraction_metadata['jd_profile_cache'] = source
+    return {
+        "jd_text": jd_text,
+        "jd_hash": jd_hash,
+        "jd_profile": jd_profile,
+        "extraction_metadata": extraction_metadata,
+        "stage_timings": timings
+    }
+
+
+def _screen_resume(engine, *args, **kwargs):
+    return engine.screen_resume(*args, **kwargs)
+
+
+def _profile_resume(engine, *args, **kwargs):
+    return engine.profile_resume(*args, **kwargs)
+
+
+class AnalysisPool:
+    """Bounded, asyncio-friendly front to the analysis worker processes."""
+
+    def __init__(self, workers=ANALYSIS_POOL_WORKERS, queue_size=ANALYSIS_QUEUE_SIZE, retry_after=ANALYSIS_RETRY_AFTER):
+        self.workers = workers
+        self.capacity = max(workers, 1) + queue_size
+        self.retry_after = retry_after
+        self.uses_processes = workers > 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.crashed = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._worker_caches = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.uses_processes:
+                    # spawn, not fork: the web process already runs Mongo and event-loop threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+            return self._executor
+
+    def start(self):
+        # Spin the workers up (and through warm-up) before the first request arrives
+        executor = self._get_executor()
+        if self.uses_processes:
+            for _ in range(self.workers):
+                executor.submit(os.getpid)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func, *args, **kwargs):
+        # func must be a module-level function taking the engine as first argument
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturated(self.retry_after)
+        self.in_flight += 1
+        executor = self._get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            result, worker = await loop.run_in_executor(executor, _run_job, func, args, kwargs)
+            if worker is not None:
+                self._worker_caches[worker[0]] = worker[1]
+            self.completed += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); drop the pool so the next request gets a fresh one
+            self.crashed += 1
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+                    self._worker_caches.clear()
+            # Reaps the surviving workers and the management thread of the broken pool
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise PoolUnavailable("Analysis worker crashed")
+        finally:
+            self.in_flight -= 1
+
+    def _mirror_timings(self, result):
+        if self.uses_processes:
+            # Stage timings were recorded in the worker; mirror them into this process's engine
+            engine = get_analysis_engine()
+            for name, elapsed_ms in result.get("stage_timings", {}).items():
+                engine.record_stage(name, elapsed_ms)
+        return result
+
+    async def analyze_documents(self, *args, **kwargs):
+        return self._mirror_timings(await self.run(_analyze_documents, *args, **kwargs))
+
+    async def extract_documents(self, *args, **kwargs):
+        return self._mirror_timings(await self.run(_extract_documents, *args, **kwargs))
+
+    async def analyze_texts(self, *args, **kwargs):
+        return self._mirror_timings(await self.run(_analyze_texts, *args, **kwargs))
+
+    async def prepare_jd(self, **kwargs):
+        return self._mirror_timings(await self.run(_prepare_jd, **kwargs))
+
+    async def screen_resume(self, *args, **kwargs):
+        return self._mirror_timings(await self.run(_screen_resume, *args, **kwargs))
+
+    async def profile_resume(self, *args, **kwargs):
+        return self._mirror_timings(await self.run(_profile_resume, *args, **kwargs))
+
+    def get_cache_stats(self):
+        """Per-process cache stats: each worker's as of its last job, or this process's in thread mode."""
+        if not self.uses_processes:
+            return {"web": cache_stats()}
+        return {f"worker-{pid}": stats for pid, stats in sorted(self._worker_caches.items())}
+
+    def get_stats(self):
+        return {
+            "mode": "process" if self.uses_processes else "thread",
+            "workers": max(self.workers, 1),
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "crashed": self.crashed
+        }
+
+
+_pool = None
+
+def get_analysis_pool():
+    global _pool
+    if _pool is None:
+        _pool = AnalysisPool()
+    return _pool
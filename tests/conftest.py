@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend is imported as a package from the repository root, as uvicorn does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
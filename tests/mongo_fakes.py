@@ -0,0 +1,107 @@
+"""Motor- and transaction-shaped wrappers over mongomock, for tests that need them."""
+import pymongo.errors
+
+
+class AsyncCollection:
+    """The slice of Motor's collection API the backend uses, over a mongomock collection."""
+
+    def __init__(self, collection, client=None):
+        self._collection = collection
+        self.database = AsyncDatabase(client)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, client):
+        self.client = client
+
+
+class Transactions:
+    """start_session() for sync and async callers over one mongomock database.
+
+    with_transaction snapshots every collection and restores them if the callback
+    raises, which is all the all-or-nothing behaviour the tests rely on. With
+    supported=False it fails like a standalone server does.
+    """
+
+    def __init__(self, database, supported=True):
+        self.database = database
+        self.supported = supported
+        self.committed = 0
+
+    def start_session(self):
+        return Session(self)
+
+    def run(self, callback, session):
+        if not self.supported:
+            raise pymongo.errors.OperationFailure(
+                "Transaction numbers are only allowed on a replica set member or mongos", code=20)
+        snapshot = self._snapshot()
+        try:
+            result = callback(session)
+        except Exception:
+            self._restore(snapshot)
+            raise
+        self.committed += 1
+        return result
+
+    async def run_async(self, callback, session):
+        if not self.supported:
+            raise pymongo.errors.OperationFailure(
+                "Transaction numbers are only allowed on a replica set member or mongos", code=20)
+        snapshot = self._snapshot()
+        try:
+            result = await callback(session)
+        except Exception:
+            self._restore(snapshot)
+            raise
+        self.committed += 1
+        return result
+
+    def _snapshot(self):
+        return {name: list(self.database[name].find()) for name in self.database.list_collection_names()}
+
+    def _restore(self, snapshot):
+        for name in self.database.list_collection_names():
+            self.database[name].delete_many({})
+            if snapshot.get(name):
+                self.database[name].insert_many(snapshot[name])
+
+
+class AsyncTransactions(Transactions):
+    async def start_session(self):
+        return Session(self)
+
+
+class Session:
+    def __init__(self, transactions):
+        self.transactions = transactions
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def with_transaction(self, callback):
+        if isinstance(self.transactions, AsyncTransactions):
+            return self.transactions.run_async(callback, self)
+        return self.transactions.run(callback, self)
+
+
+def bulk_write(collection, requests, ordered=True, session=None):
+    """mongomock's bulk_write does not accept current pymongo UpdateOne objects; apply them one by one."""
+    for request in requests:
+        collection.update_one(request._filter, request._doc, upsert=request._upsert)
@@ -0,0 +1,211 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+import mongomock.aggregate
+
+from backend import admin
+
+CATEGORIES = ['languages', 'frameworks', 'tools', 'databases']
+SKILLS = ['python', 'docker', 'aws', 'node.js', 'sql', 'react', 'go', 'rust']
+ROLES = ['Backend Engineer', ' backend engineer ', 'BACKEND ENGINEER\n', 'Data Scientist', '  ', '',
+         'Not specified', 'ML Engineer']
+NOW = datetime.utcnow()
+
+
+# The Python counting the aggregations replaced, kept as the reference
+
+def reference_missing_skills(analyses):
+    counts = Counter()
+    for analysis in analyses:
+        counts.update(analysis.get('comparison', {}).get('missing_skills', []))
+    return counts
+
+
+def reference_job_roles(submissions):
+    counts = Counter()
+    for submission in submissions:
+        parsed_jd = submission.get('parsed_jd_fields', {})
+        if isinstance(parsed_jd, dict):
+            role = parsed_jd.get('job_role', '')
+            if role and role != 'Not specified':
+                counts[role.lower().strip()] += 1
+    return counts
+
+
+def reference_categories(analyses):
+    stats = {category: {'matched': 0, 'missing': 0} for category in CATEGORIES}
+    for analysis in analyses:
+        comparison = analysis.get('comparison', {})
+        for category in CATEGORIES:
+            stats[category]['matched'] += len(comparison.get(f'matched_{category}', []))
+            stats[category]['missing'] += len(comparison.get(f'missing_{category}', []))
+    return stats
+
+
+def reference_recommendations(analyses):
+    counts = Counter(a.get('comparison', {}).get('recommendation', 'Unknown') for a in analyses)
+    return {
+        'strong_fit': counts.get('Strong Fit', 0),
+        'moderate_fit': counts.get('Moderate Fit', 0),
+        'low_fit': counts.get('Low Fit', 0),
+        'not_suitable': counts.get('Not Suitable', 0),
+        'total': len(analyses)
+    }
+
+
+def reference_average(analyses):
+    recent = sorted(analyses, key=lambda a: a['created_at'], reverse=True)[:100]
+    return round(sum(a.get('match_percentage', 0) for a in recent) / len(recent), 2) if recent else 0
+
+
+def analysis_doc(rng, index):
+    doc = {'created_at': NOW - timedelta(days=rng.randint(0, 60), seconds=index), 'user_id': rng.randint(1, 30)}
+    shape = rng.random()
+    if shape < 0.05:
+        return doc  # no comparison at all
+    comparison = {}
+    if shape > 0.1:
+        if rng.random() < 0.85:
+            comparison['missing_skills'] = rng.sample(SKILLS, rng.randint(0, 4))
+        if rng.random() < 0.85:
+            comparison['matched_skills'] = rng.sample(SKILLS, rng.randint(0, 3))
+        for category in CATEGORIES:
+            if rng.random() < 0.8:
+                comparison[f'matched_{category}'] = ['x'] * rng.randint(0, 3)
+            if rng.random() < 0.8:
+                comparison[f'missing_{category}'] = ['y'] * rng.randint(0, 2)
+        recommendation = rng.choice(['Strong Fit', 'Moderate Fit', 'Low Fit', 'Not Suitable', None, 'Other'])
+        if recommendation:
+            comparison['recommendation'] = recommendation
+    doc['comparison'] = comparison
+    if rng.random() < 0.9:
+        doc['match_percentage'] = rng.uniform(0, 100)
+    return doc
+
+
+def submission_doc(rng, user_id):
+    parsed_jd = rng.choice([{'job_role': rng.choice(ROLES)}, {}, 'unparsed', None])
+    doc = {'user_id': user_id, 'created_at': NOW - timedelta(minutes=rng.randint(0, 10000))}
+    if parsed_jd is not None:
+        doc['parsed_jd_fields'] = parsed_jd
+    return doc
+
+
+@pytest.fixture
+def db():
+    database = mongomock.MongoClient().db
+    rng = random.Random(7)
+    analyses = [analysis_doc(rng, i) for i in range(600)]
+    database.analysis_results.insert_many(analyses)
+    database.submissions.insert_many([submission_doc(rng, a['user_id']) for a in analyses])
+    database.users.insert_many([{'user_id': u, 'email': f'user{u:02d}@example.com'} for u in range(1, 31)])
+    return database
+
+
+@pytest.fixture
+def empty_db():
+    return mongomock.MongoClient().db
+
+
+@pytest.fixture
+def lookup_pipelines(monkeypatch):
+    """mongomock has no $lookup with a sub-pipeline; run the sub-pipeline over the joined documents."""
+    original = mongomock.aggregate._handle_lookup_stage
+
+    def lookup(in_collection, database, options):
+        if 'pipeline' not in options:
+            return original(in_collection, database, options)
+        out = []
+        for doc in in_collection:
+            joined = [dict(d) for d in database[options['from']].find()
+                      if d.get(options['foreignField']) == doc.get(options['localField'])]
+            scratch = mongomock.MongoClient().db.scratch
+            if joined:
+                scratch.insert_many(joined)
+            out.append({**doc, options['as']: list(scratch.aggregate(options['pipeline'])) if joined else []})
+        return out
+
+    monkeypatch.setitem(mongomock.aggregate._PIPELINE_HANDLERS, '$lookup', lookup)
+
+
+def ranked(counts, limit):
+    return sorted(counts.items(), key=lambda c: (-c[1], c[0]))[:limit]
+
+
+def test_summary(db):
+    summary = admin.get_analytics_summary(db.users, db.submissions, db.analysis_results)
+    analyses = list(db.analysis_results.find())
+    assert summary['total_users'] == 30
+    assert summary['total_submissions'] == len(analyses)
+    assert summary['total_analyses'] == len(analyses)
+    assert summary['average_match_score'] == reference_average(analyses)
+
+
+def test_top_missing_skills(db):
+    analyses = list(db.analysis_results.find())
+    expected = reference_missing_skills(analyses)
+    rows = admin.get_top_missing_skills(db.analysis_results, limit=5)
+    assert [(r['skill'], r['count']) for r in rows] == ranked(expected, 5)
+    for row in rows:
+        assert row['percentage'] == round(row['count'] / len(analyses) * 100, 2)
+    everything = admin.get_top_missing_skills(db.analysis_results, limit=100)
+    assert {r['skill']: r['count'] for r in everything} == expected
+
+
+def test_top_job_roles_merge_case_and_whitespace(db):
+    expected = reference_job_roles(db.submissions.find())
+    rows = admin.get_top_job_roles(db.submissions, limit=100)
+    assert {r['role']: r['count'] for r in rows} == {role.title(): count for role, count in expected.items()}
+    assert [r['role'] for r in rows].count('Backend Engineer') == 1
+    assert [(r['role'], r['count']) for r in admin.get_top_job_roles(db.submissions, limit=2)] == \
+        [(role.title(), count) for role, count in ranked(expected, 2)]
+
+
+def test_distributions(db):
+    analyses = list(db.analysis_results.find())
+    assert admin.get_skill_category_distribution(db.analysis_results) == reference_categories(analyses)
+    assert admin.get_recommendation_distribution(db.analysis_results) == reference_recommendations(analyses)
+    assert admin.get_distributions(db.analysis_results) == {
+        'skill_category_distribution': reference_categories(analyses),
+        'recommendation_distribution': reference_recommendations(analyses)
+    }
+
+
+def test_trending_skills(db):
+    recent = list(db.analysis_results.find({'created_at': {'$gte': NOW - timedelta(days=30)}}))
+    matched = Counter(s for a in recent for s in a.get('comparison', {}).get('matched_skills', []))
+    missing = reference_missing_skills(recent)
+    trending = admin.get_trending_skills(db.analysis_results, days=30)
+    assert [(r['skill'], r['count']) for r in trending['most_matched']] == ranked(matched, 10)
+    assert [(r['skill'], r['count']) for r in trending['most_missing']] == ranked(missing, 10)
+
+
+def test_user_activity_stats(db, lookup_pipelines):
+    submissions = Counter(s['user_id'] for s in db.submissions.find())
+    analyses = Counter(a['user_id'] for a in db.analysis_results.find())
+    rows = admin.get_user_activity_stats(db.submissions, db.analysis_results)
+    assert [(r['user_id'], r['submissions']) for r in rows] == ranked(submissions, 20)
+    assert all(r['analyses'] == analyses[r['user_id']] for r in rows)
+
+
+def test_user_activity_page(db, lookup_pipelines):
+    submissions = Counter(s['user_id'] for s in db.submissions.find())
+    page = admin.get_user_activity_page(db.users, db.submissions, db.analysis_results, 'submissions', 'desc', 1, 10)
+    assert page['total'] == 30
+    assert [u['submissions'] for u in page['users']] == sorted(submissions.values(), reverse=True)[:10]
+    assert all(u['role'] == 'user' for u in page['users'])
+
+
+def test_empty_collections(empty_db):
+    assert admin.get_top_missing_skills(empty_db.analysis_results) == []
+    assert admin.get_top_job_roles(empty_db.submissions) == []
+    assert admin.get_distributions(empty_db.analysis_results) == {
+        'skill_category_distribution': reference_categories([]),
+        'recommendation_distribution': reference_recommendations([])
+    }
+    assert admin.get_analytics_summary(empty_db.users, empty_db.submissions, empty_db.analysis_results)['average_match_score'] == 0
+    assert admin.get_trending_skills(empty_db.analysis_results) == {'most_matched': [], 'most_missing': []}
@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+from mongo_fakes import AsyncCollection, AsyncTransactions, Transactions, bulk_write
+
+import backend.analytics_rollups as analytics_rollups
+import backend.mongodb as mongodb
+
+OLD = datetime.utcnow() - timedelta(days=2)
+COMPARISON = {'missing_skills': ['docker'], 'matched_languages': ['python'], 'recommendation': 'Strong Fit'}
+
+
+@pytest.fixture(params=[True, False], ids=["transactions", "standalone"])
+def db(request, monkeypatch):
+    database = mongomock.MongoClient().db
+    sync_transactions = Transactions(database, supported=request.param)
+    async_transactions = AsyncTransactions(database, supported=request.param)
+    monkeypatch.setattr(mongomock.MongoClient, "start_session", lambda self, **kwargs: sync_transactions.start_session(),
+                        raising=False)
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", bulk_write)
+    # The fake transactions roll back by snapshot, so mongomock can ignore the session argument
+    monkeypatch.setitem(mongomock.not_implemented._IGNORED_FEATURES, "session", True)
+    monkeypatch.setattr(mongodb, "analytics_rollups_collection", lambda: database.analytics_rollups)
+    monkeypatch.setattr(mongodb, "async_analytics_rollups_collection", lambda: AsyncCollection(database.analytics_rollups))
+    monkeypatch.setattr(analytics_rollups, "_indexed", False)
+    monkeypatch.setattr(analytics_rollups, "_async_indexed", False)
+    monkeypatch.setattr(analytics_rollups, "_transactions", None)
+    monkeypatch.setattr(analytics_rollups, "_sources_indexed", set())
+    monkeypatch.setattr(analytics_rollups, "BACKFILL_BATCH_SIZE", 3)
+    database.async_analysis_results = AsyncCollection(database.analysis_results, async_transactions)
+    return database
+
+
+def total(database, metric='analyses', key='total'):
+    return sum(d['count'] for d in database.analytics_rollups.find({'metric': metric, 'key': key}))
+
+
+def backfill(database):
+    return analytics_rollups.backfill(database.analysis_results, database.submissions)
+
+
+def record(database, doc):
+    doc['rolled_up'] = False
+    collection = database.async_analysis_results
+    asyncio.run(collection.insert_one(doc))
+    return asyncio.run(analytics_rollups.record_analysis(doc, collection))
+
+
+def test_backfill_counts_each_document_once(db):
+    db.analysis_results.insert_many([{'comparison': COMPARISON, 'created_at': OLD} for _ in range(7)])
+    db.submissions.insert_many([{'parsed_jd_fields': {'job_role': ' Dev '}, 'created_at': OLD} for _ in range(4)])
+    assert backfill(db)
+    assert total(db) == 7
+    assert total(db, 'job_role', 'dev') == 4
+    assert db.analysis_results.count_documents({'rolled_up': {'$ne': True}}) == 0
+    assert backfill(db)
+    assert total(db) == 7
+
+
+def test_live_record_counts_and_flags(db):
+    doc = {'comparison': COMPARISON, 'created_at': OLD}
+    record(db, doc)
+    assert total(db) == 1
+    assert db.analysis_results.find_one({'_id': doc['_id']})['rolled_up'] is True
+    backfill(db)
+    assert total(db) == 1
+
+
+def test_record_of_an_already_counted_document_is_a_no_op(db):
+    doc = {'comparison': COMPARISON, 'created_at': OLD}
+    db.analysis_results.insert_one(doc)
+    backfill(db)
+    if analytics_rollups._transactions is False:
+        pytest.skip("without transactions the live path cannot tell")
+    asyncio.run(analytics_rollups.record_analysis(doc, db.async_analysis_results))
+    assert total(db) == 1
+
+
+def test_failed_increment_is_counted_once_by_the_backfill(db, monkeypatch):
+    async def failing_apply(counts_by_day, session=None):
+        raise RuntimeError("rollups unavailable")
+    monkeypatch.setattr(analytics_rollups, "_apply_async", failing_apply)
+    doc = {'comparison': COMPARISON, 'created_at': OLD}
+    with pytest.raises(RuntimeError):
+        record(db, doc)
+    assert db.analysis_results.find_one({'_id': doc['_id']}).get('rolled_up') is not True
+    backfill(db)
+    assert total(db) == 1
+
+
+def test_failed_flag_after_increment(db, monkeypatch):
+    doc = {'comparison': COMPARISON, 'created_at': OLD}
+
+    async def failing_update(*args, **kwargs):
+        raise RuntimeError("flag write failed")
+    with monkeypatch.context() as patch:
+        patch.setattr(db.async_analysis_results, "update_one", failing_update, raising=False)
+        with pytest.raises(RuntimeError):
+            record(db, doc)
+    backfill(db)
+    if analytics_rollups._transactions is False:
+        # The documented standalone trade-off: counted live and again by the backfill
+        assert total(db) == 2
+    else:
+        assert total(db) == 1
+
+
+def test_live_lease_blocks_and_stale_lease_is_taken_over(db):
+    db.analysis_results.insert_many([{'comparison': COMPARISON, 'created_at': OLD} for _ in range(2)])
+    db.analytics_rollups.insert_one({'_id': analytics_rollups.BACKFILL_ID, 'status': 'running',
+                                     'lease_owner': 'other', 'heartbeat_at': datetime.utcnow()})
+    assert not backfill(db)
+    assert total(db) == 0
+    stale = datetime.utcnow() - timedelta(seconds=analytics_rollups.BACKFILL_LEASE_SECONDS + 1)
+    db.analytics_rollups.update_one({'_id': analytics_rollups.BACKFILL_ID}, {'$set': {'heartbeat_at': stale}})
+    assert backfill(db)
+    assert total(db) == 2
+    assert db.analytics_rollups.find_one({'_id': analytics_rollups.BACKFILL_ID})['status'] == 'done'
+
+
+def test_later_sweeps_only_read_documents_stored_unflagged(db):
+    db.analysis_results.insert_one({'comparison': COMPARISON, 'created_at': OLD})
+    backfill(db)
+    db.analysis_results.insert_one({'comparison': COMPARISON, 'created_at': OLD, 'rolled_up': False})
+    db.analysis_results.insert_one({'comparison': COMPARISON, 'created_at': OLD})
+    backfill(db)
+    assert total(db) == 2
+    indexes = db.analysis_results.index_information()
+    assert indexes['rolled_up_1']['partialFilterExpression'] == {'rolled_up': False}
+
+
+def test_catch_up_runs_the_backfill_again(db, monkeypatch):
+    monkeypatch.setattr(analytics_rollups, "ROLLUPS_CATCHUP_SECONDS", 0.01)
+
+    async def scenario():
+        analytics_rollups.start_catch_up(db.analysis_results, db.submissions)
+        await asyncio.sleep(0.2)
+        db.analysis_results.insert_one({'comparison': COMPARISON, 'created_at': OLD, 'rolled_up': False})
+        for _ in range(100):
+            if total(db):
+                break
+            await asyncio.sleep(0.02)
+        await analytics_rollups.stop_catch_up()
+
+    asyncio.run(scenario())
+    assert total(db) == 1
+    assert analytics_rollups._catch_up_task is None
@@ -0,0 +1,119 @@
+import random
+
+import pytest
+
+import backend.mongodb as mongodb
+from backend.bulk_comparison import ResumeMatrix, JobMatrix, compare_profiles_bulk
+from backend.comparison_engine import compare_profiles, SKILL_TAXONOMY, CANONICAL_SKILL_MAP
+from backend.jd_matching import JDSkillIndex
+
+VOCAB = (
+    sorted(set().union(*[set(v) for v in SKILL_TAXONOMY.values()]))
+    + list(CANONICAL_SKILL_MAP)[:80]
+    + ['Python ', 'REACT', 'nonsense', '', 'web']
+)
+DEGREES = ['Bachelor of Science', 'BSc', 'B.Tech', 'Master', 'PhD', 'MBA', 'Diploma']
+EXPERIENCE = ['', '3+ years', 'five', '10', None, '2-4 years', '7']
+
+
+def resume_profile(rng):
+    profile = {k: rng.sample(VOCAB, rng.randint(0, 7))
+               for k in ['technical_skills', 'programming_languages', 'frameworks', 'tools', 'databases']}
+    profile['experience_years_estimated'] = rng.choice([0, 1, 3, '4', 'x', 7, 2.5, 12])
+    profile['education_degrees'] = rng.sample(DEGREES, rng.randint(0, 2))
+    return profile
+
+
+def job_profile(rng):
+    profile = {k: rng.sample(VOCAB, rng.randint(0, rng.choice([0, 3, 9])))
+               for k in ['required_skills', 'required_languages', 'required_frameworks', 'required_tools', 'required_databases']}
+    profile['required_experience_years'] = rng.choice(EXPERIENCE)
+    profile['required_education'] = rng.sample(DEGREES, rng.randint(0, 2))
+    profile['job_role'] = rng.choice(['Backend Engineer', 'Data Scientist', None])
+    return profile
+
+
+def test_bulk_matches_scalar_compare_profiles():
+    rng = random.Random(0)
+    resumes = [resume_profile(rng) for _ in range(40)]
+    jobs = [job_profile(rng) for _ in range(60)]
+    bulk = compare_profiles_bulk(ResumeMatrix(resumes), JobMatrix(jobs))
+
+    for i, resume in enumerate(resumes):
+        for j, job in enumerate(jobs):
+            scalar = compare_profiles(resume, job)
+            expected = {
+                'matched_count': len(scalar['matched_skills']),
+                'missing_count': len(scalar['missing_skills']),
+                'additional_count': len(scalar['additional_skills']),
+                'required_count': scalar['weighted_scores']['required_count'],
+                **{k: scalar[k] for k in ['match_percentage', 'skill_match_ratio', 'language_ratio', 'framework_ratio',
+                                          'tool_ratio', 'database_ratio', 'education_match', 'experience_gap']}
+            }
+            for key, value in expected.items():
+                # Bit-identical floats, not approximately equal ones
+                assert repr(bulk[key][i, j].item()) == repr(value), (key, i, j)
+
+
+def test_bulk_handles_empty_job_matrix():
+    rng = random.Random(1)
+    bulk = compare_profiles_bulk(ResumeMatrix([resume_profile(rng)]), JobMatrix([]))
+    assert bulk['match_percentage'].shape == (1, 0)
+
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda d: d[key], reverse=direction < 0))
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    def find(self, query, projection=None):
+        after = query.get('_id', {}).get('$gt', -1)
+        return FakeCursor(d for d in self.docs if d['_id'] > after and 'profile' in d)
+
+
+@pytest.fixture
+def jd_collection(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(mongodb, 'job_descriptions_collection', lambda: collection)
+    return collection
+
+
+def add_jds(collection, rng, count, duplicates):
+    start = len(collection.docs)
+    for n in range(start, start + count):
+        collection.docs.append({
+            '_id': n, 'jd_id': f'jd-{n}', 'jd_hash': f'h{n % (start + count - duplicates)}',
+            'user_id': n % 5, 'profile': job_profile(rng), 'raw_text': ''
+        })
+
+
+def test_index_rank_matches_compare_profiles(jd_collection):
+    rng = random.Random(2)
+    index = JDSkillIndex(refresh_seconds=0)
+    add_jds(jd_collection, rng, 150, duplicates=10)
+    index.refresh()
+    # Incremental refresh, including JDs that supersede indexed ones
+    add_jds(jd_collection, rng, 50, duplicates=10)
+    index.refresh()
+
+    latest = {}
+    for doc in jd_collection.docs:
+        latest[doc['jd_hash']] = doc
+    for _ in range(5):
+        resume = resume_profile(rng)
+        ranking = index.rank(resume, top_k=len(latest))
+        expected = {d['jd_id']: compare_profiles(resume, d['profile'])['match_percentage'] for d in latest.values()}
+        assert ranking['index_ready']
+        assert ranking['total_jds'] == len(latest)
+        assert {r['jd_id']: r['match_percentage'] for r in ranking['results']} == expected
+        assert all(type(r['match_percentage']) is float for r in ranking['results'])
+
+
+def test_rank_before_first_build_is_empty():
+    ranking = JDSkillIndex().rank(resume_profile(random.Random(3)))
+    assert not ranking['index_ready']
+    assert ranking['results'] == []
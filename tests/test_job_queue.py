@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+from mongo_fakes import AsyncCollection
+
+import backend.mongodb as mongodb
+from backend.job_queue import JobQueue, JobDeferred, JobInterrupted
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    database = mongomock.MongoClient().db
+    collection = AsyncCollection(database.analysis_jobs)
+    monkeypatch.setattr(mongodb, "async_analysis_jobs_collection", lambda: collection)
+    monkeypatch.setattr(mongodb, "async_users_collection", lambda: AsyncCollection(database.users))
+    return database.analysis_jobs
+
+
+def run_claims(queue, runner, claims):
+    """Claims and runs queued jobs like a worker would, ignoring not_before so retries happen at once."""
+    async def run():
+        queue._runner = runner
+        job, _ = await queue.enqueue(1, b"resume", "pdf", job_description="jd")
+        for _ in range(claims):
+            await (await queue._collection()).update_many({}, {"$set": {"not_before": job["created_at"]}})
+            claimed = await queue._claim()
+            if claimed is None:
+                break
+            await queue._run_one(claimed)
+        return job["_id"]
+    return asyncio.run(run())
+
+
+def test_crashing_job_fails_after_max_attempts(jobs):
+    calls = []
+
+    async def crashing_runner(inputs, user_id):
+        calls.append(1)
+        raise JobInterrupted("Analysis worker crashed", 0)
+
+    queue = JobQueue(max_attempts=3)
+    job_id = run_claims(queue, crashing_runner, claims=10)
+    job = jobs.find_one({"_id": job_id})
+    assert len(calls) == 3
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert "interrupted too many times" in job["error"]
+    assert queue.stats["interrupted"] == 2 and queue.stats["failed"] == 1
+
+
+def test_deferred_job_does_not_use_up_attempts(jobs):
+    calls = []
+
+    async def busy_then_done(inputs, user_id):
+        calls.append(1)
+        if len(calls) <= 5:
+            raise JobDeferred(0)
+        return {"ok": True}
+
+    queue = JobQueue(max_attempts=3)
+    job_id = run_claims(queue, busy_then_done, claims=10)
+    job = jobs.find_one({"_id": job_id})
+    assert job["status"] == "done"
+    assert job["result"] == {"ok": True}
+    assert job["attempts"] == 1
+    assert queue.stats["deferred"] == 5
+
+
+def test_interrupted_job_can_still_succeed(jobs):
+    calls = []
+
+    async def crash_once(inputs, user_id):
+        calls.append(1)
+        if len(calls) == 1:
+            raise JobInterrupted("Analysis worker crashed", 0)
+        return {"ok": True}
+
+    queue = JobQueue(max_attempts=3)
+    job_id = run_claims(queue, crash_once, claims=10)
+    job = jobs.find_one({"_id": job_id})
+    assert job["status"] == "done"
+    assert job["attempts"] == 2
+
+
+class FailingPool:
+    retry_after = 7
+
+    def __init__(self, error):
+        self.error = error
+
+    async def extract_documents(self, *args, **kwargs):
+        raise self.error
+
+
+@pytest.mark.parametrize("error, expected", [
+    ("crashed", JobInterrupted),
+    ("saturated", JobDeferred),
+])
+def test_runner_only_defers_when_the_pool_is_busy(monkeypatch, error, expected):
+    main = pytest.importorskip("backend.main")
+    from backend.worker_pool import PoolSaturated, PoolUnavailable
+    pool_error = PoolUnavailable("Analysis worker crashed") if error == "crashed" else PoolSaturated(7)
+    monkeypatch.setattr(main, "get_analysis_pool", lambda: FailingPool(pool_error))
+    inputs = {"resume_bytes": b"resume", "resume_ext": "pdf", "job_description": "jd"}
+    with pytest.raises(expected) as raised:
+        asyncio.run(main.run_analysis_job(inputs, 1))
+    assert raised.value.retry_after == 7
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import backend.llm_client as llm_client
+from backend.llm_client import CircuitBreaker, LLMClient, LLMUnavailable
+
+GOOD_CONTENT = {"comparison": {"match_percentage": 77}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Chat completions endpoint answering with the next scripted reply ("ok" once the script runs out)."""
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append({"body": body, "authorization": self.headers.get("Authorization")})
+            reply = server.script.pop(0) if server.script else "ok"
+        if reply == "slow":
+            time.sleep(server.slow_seconds)
+            reply = "ok"
+        if reply == "ok":
+            self._send(200, {"choices": [{"message": {"content": json.dumps(GOOD_CONTENT)}}]})
+        elif reply == "not json":
+            self._send(200, {"choices": [{"message": {"content": "not json"}}]})
+        elif reply == 429:
+            self._send(429, {"error": "rate limited"}, {"Retry-After": "0.2"})
+        else:
+            self._send(reply, {"error": "stub"})
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client timed out and hung up
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.script = []
+    server.slow_seconds = 1.0
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_timeouts(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_READ_TIMEOUT", 0.3)
+    monkeypatch.setattr(llm_client, "LLM_TOTAL_TIMEOUT", 5.0)
+    monkeypatch.setattr(llm_client, "LLM_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(llm_client, "LLM_QUEUE_TIMEOUT", 0.5)
+
+
+def make_client(server, max_retries=2, threshold=3, cooldown=30):
+    client = LLMClient(base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="test-key", max_retries=max_retries)
+    client.breaker = CircuitBreaker(threshold=threshold, cooldown=cooldown)
+    return client
+
+
+def call(client, times=1):
+    async def run():
+        try:
+            results = []
+            for _ in range(times):
+                try:
+                    results.append(await client.chat_json([{"role": "user", "content": "hi"}]))
+                except LLMUnavailable as e:
+                    results.append(e)
+            return results
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def test_success_sends_json_mode_request(stub_server):
+    client = make_client(stub_server)
+    assert call(client) == [GOOD_CONTENT]
+    request = stub_server.requests[0]
+    assert request["authorization"] == "Bearer test-key"
+    assert request["body"]["response_format"] == {"type": "json_object"}
+    assert client.stats["succeeded"] == 1 and client.stats["retries"] == 0
+
+
+def test_retryable_status_is_retried(stub_server):
+    stub_server.script = [503, 500]
+    client = make_client(stub_server)
+    assert call(client) == [GOOD_CONTENT]
+    assert len(stub_server.requests) == 3
+    assert client.stats["retries"] == 2
+    assert client.breaker.state == "closed"
+
+
+def test_retry_after_header_is_honoured(stub_server):
+    stub_server.script = [429]
+    client = make_client(stub_server)
+    start = time.monotonic()
+    assert call(client) == [GOOD_CONTENT]
+    assert time.monotonic() - start >= 0.2
+    assert len(stub_server.requests) == 2
+
+
+def test_non_retryable_status_fails_without_retry(stub_server):
+    stub_server.script = [400]
+    client = make_client(stub_server)
+    [error] = call(client)
+    assert isinstance(error, LLMUnavailable) and "400" in str(error)
+    assert len(stub_server.requests) == 1
+    assert client.stats["failed"] == 1
+
+
+def test_retries_stop_after_max_retries(stub_server):
+    stub_server.script = [502] * 10
+    client = make_client(stub_server, max_retries=2)
+    [error] = call(client)
+    assert isinstance(error, LLMUnavailable)
+    assert len(stub_server.requests) == 3
+
+
+def test_read_timeout_is_retried(stub_server):
+    stub_server.script = ["slow"]
+    client = make_client(stub_server)
+    start = time.monotonic()
+    assert call(client) == [GOOD_CONTENT]
+    assert client.stats["timeouts"] == 1
+    # Gave up on the slow attempt at the read timeout instead of waiting for it
+    assert time.monotonic() - start < stub_server.slow_seconds
+
+
+def test_total_timeout_bounds_retries(stub_server, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_TOTAL_TIMEOUT", 0.5)
+    stub_server.script = ["slow"] * 10
+    client = make_client(stub_server, max_retries=10)
+    start = time.monotonic()
+    [error] = call(client)
+    assert isinstance(error, LLMUnavailable)
+    assert time.monotonic() - start < 1.0
+    assert len(stub_server.requests) <= 2
+
+
+def test_breaker_opens_and_short_circuits(stub_server):
+    stub_server.script = [500] * 3
+    client = make_client(stub_server, max_retries=0, threshold=3)
+    results = call(client, times=5)
+    assert all(isinstance(r, LLMUnavailable) for r in results)
+    # Only the calls before the breaker opened reached the server
+    assert len(stub_server.requests) == 3
+    assert client.stats["short_circuited"] == 2
+    assert client.breaker.state == "open"
+
+
+def test_half_open_trial_closes_breaker(stub_server):
+    stub_server.script = [500] * 2
+    client = make_client(stub_server, max_retries=0, threshold=2, cooldown=0.2)
+    call(client, times=2)
+    assert client.breaker.state == "open"
+    time.sleep(0.25)
+    assert client.breaker.state == "half_open"
+    assert call(client) == [GOOD_CONTENT]
+    assert client.breaker.state == "closed"
+
+
+def test_failed_half_open_trial_reopens_breaker(stub_server):
+    stub_server.script = [500] * 3
+    client = make_client(stub_server, max_retries=0, threshold=2, cooldown=0.2)
+    call(client, times=2)
+    time.sleep(0.25)
+    [error] = call(client)
+    assert isinstance(error, LLMUnavailable)
+    assert client.breaker.state == "open"
+    assert client.breaker.times_opened == 2
+
+
+def test_invalid_response_does_not_trip_breaker(stub_server):
+    stub_server.script = ["not json"]
+    client = make_client(stub_server, threshold=1)
+    [error] = call(client)
+    assert isinstance(error, LLMUnavailable)
+    assert client.stats["invalid_responses"] == 1
+    assert client.breaker.state == "closed"
+
+
+def test_missing_api_key_never_calls_the_api(stub_server):
+    client = make_client(stub_server)
+    client.api_key = ""
+    [error] = call(client)
+    assert isinstance(error, LLMUnavailable)
+    assert stub_server.requests == []